@@ -0,0 +1,54 @@
+"""
+Benchmark the sweep-line and bitmap-grid availability searches on a large attendee set.
+
+Usage: python -m benchmarks.availability_grid [participants] [events_per_participant] [resolution]
+"""
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from core.meeting_scheduler import MeetingScheduler
+
+
+async def populate(scheduler: MeetingScheduler, participants, events_per_participant: int, start: datetime):
+    rng = random.Random(42)
+    for participant in participants:
+        for _ in range(events_per_participant):
+            event_start = start + timedelta(minutes=5 * rng.randrange(0, 7 * 24 * 12))
+            await scheduler.calendar_api.create_event({
+                "title": "busy",
+                "participants": [participant],
+                "start_time": event_start,
+                "end_time": event_start + timedelta(minutes=rng.choice((15, 30, 60, 90)))
+            })
+
+
+async def main(participant_count: int, events_per_participant: int, resolution: int):
+    scheduler = MeetingScheduler(slot_granularity=resolution)
+    participants = [f"user{index}@example.com" for index in range(participant_count)]
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    window = {"start": start, "end": start + timedelta(days=7)}
+    await populate(scheduler, participants, events_per_participant, start)
+
+    def report(label: str, seconds: float, slots: int):
+        print(f"{label:<28} {seconds * 1000:9.1f} ms  {slots:6d} slots")
+
+    started = time.perf_counter()
+    slots, _ = await scheduler._find_available_slots(participants, 30, window)
+    report("sweep line (exact)", time.perf_counter() - started, len(slots))
+
+    started = time.perf_counter()
+    result = await scheduler.find_slots_grid(participants, 30, resolution, preferred_time_range=window)
+    report("bitmap grid (exact)", time.perf_counter() - started, len(result["slots"]))
+
+    quorum = int(participant_count * 0.8)
+    started = time.perf_counter()
+    result = await scheduler.find_slots_grid(participants, 30, resolution, quorum, window)
+    report(f"bitmap grid (quorum {quorum})", time.perf_counter() - started, len(result["slots"]))
+
+
+if __name__ == "__main__":
+    arguments = [int(value) for value in sys.argv[1:4]]
+    asyncio.run(main(*(arguments + [500, 20, 5][len(arguments):])))
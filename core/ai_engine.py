@@ -1,18 +1,54 @@
-from transformers import pipeline
-import spacy
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Dict, Iterable
+from core.batching import get_batcher
+from core.inference import InferenceExecutor, inference_executor
+from core.model_registry import (
+    ModelRegistry,
+    QA_MODEL,
+    SENTIMENT_MODEL,
+    SPACY_MODEL,
+    SUMMARIZATION_MODEL,
+    model_registry,
+)
+from core.result_cache import ResultCache, result_cache
+from core.text_chunking import approximate_tokens, chunk_text
+
+# Stages available to process_user_query_async
+QUERY_ANALYSES = ("sentiment", "entities", "answer", "summary")
 
 class AIEngine:
-    def __init__(self):
+    def __init__(
+        self,
+        registry: ModelRegistry = None,
+        executor: InferenceExecutor = None,
+        cache: ResultCache = None
+    ):
         """
         Initialize AI Engine with required NLP models and pipelines.
+        Models are shared through the model registry and loaded on first use.
+        The *_async methods run model calls on the inference executor.
+        Sentiment, summary and entity results are cached by content hash.
         """
-        # Load NLP models
-        self.nlp = spacy.load("en_core_web_sm")
-        
-        # Initialize Transformers pipelines
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
-        self.text_summarizer = pipeline("summarization")
-        self.question_answering = pipeline("question-answering")
+        self.registry = registry or model_registry
+        self.executor = executor or inference_executor
+        self.cache = cache or result_cache
+
+    @property
+    def nlp(self):
+        return self.registry.get(SPACY_MODEL)
+
+    @property
+    def sentiment_analyzer(self):
+        return self.registry.get(SENTIMENT_MODEL)
+
+    @property
+    def text_summarizer(self):
+        return self.registry.get(SUMMARIZATION_MODEL)
+
+    @property
+    def question_answering(self):
+        return self.registry.get(QA_MODEL)
 
     def analyze_sentiment(self, text: str) -> dict:
         """
@@ -22,8 +58,11 @@ class AIEngine:
         Returns:
             dict: Sentiment analysis result.
         """
-        result = self.sentiment_analyzer(text)
-        return result[0]  # Return the first result (most relevant)
+        return self.cache.get_or_compute(
+            "sentiment",
+            text,
+            lambda: self.sentiment_analyzer(text)[0]  # Return the first result (most relevant)
+        )
 
     def summarize_text(self, text: str, max_length: int = 50, min_length: int = 25) -> str:
         """
@@ -35,8 +74,13 @@ class AIEngine:
         Returns:
             str: The summarized text.
         """
-        summary = self.text_summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
-        return summary[0]["summary_text"]
+        def summarize():
+            summary = self.text_summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
+            return summary[0]["summary_text"]
+
+        return self.cache.get_or_compute(
+            "summary", text, summarize, max_length=max_length, min_length=min_length
+        )
 
     def extract_entities(self, text: str) -> dict:
         """
@@ -46,9 +90,11 @@ class AIEngine:
         Returns:
             dict: Dictionary containing entities and their types.
         """
-        doc = self.nlp(text)
-        entities = {ent.text: ent.label_ for ent in doc.ents}
-        return entities
+        def extract():
+            doc = self.nlp(text)
+            return {ent.text: ent.label_ for ent in doc.ents}
+
+        return self.cache.get_or_compute("entities", text, extract)
 
     def answer_question(self, question: str, context: str) -> str:
         """
@@ -80,4 +126,189 @@ class AIEngine:
             result["answer"] = self.answer_question(query, context)
 
         result["summary"] = self.summarize_text(query)
-        return result
\ No newline at end of file
+        return result
+
+    async def analyze_sentiment_async(self, text: str) -> dict:
+        """
+        Awaitable version of analyze_sentiment. Concurrent calls are micro-batched
+        into a single forward pass on the inference executor.
+        """
+        batcher = get_batcher(SENTIMENT_MODEL, executor=self.executor)
+        return await self.cache.get_or_compute_async("sentiment", text, lambda: batcher.submit(text))
+
+    async def summarize_text_async(self, text: str, max_length: int = 50, min_length: int = 25) -> str:
+        """
+        Awaitable version of summarize_text. Concurrent calls with the same lengths are
+        micro-batched into a single generate call on the inference executor.
+        """
+        batcher = get_batcher(SUMMARIZATION_MODEL, executor=self.executor)
+
+        async def summarize():
+            summary = await batcher.submit(
+                text, max_length=max_length, min_length=min_length, do_sample=False
+            )
+            return summary["summary_text"]
+
+        return await self.cache.get_or_compute_async(
+            "summary", text, summarize, max_length=max_length, min_length=min_length
+        )
+
+    async def extract_entities_async(self, text: str) -> dict:
+        """
+        Awaitable version of extract_entities that runs on the inference executor.
+        """
+        async def extract():
+            doc = await self.executor.run_model(SPACY_MODEL, text)
+            return {ent.text: ent.label_ for ent in doc.ents}
+
+        return await self.cache.get_or_compute_async("entities", text, extract)
+
+    async def answer_question_async(self, question: str, context: str) -> str:
+        """
+        Awaitable version of answer_question that runs on the inference executor.
+        """
+        result = await self.executor.run_model(QA_MODEL, question=question, context=context)
+        return result["answer"]
+
+    async def process_user_query_async(
+        self,
+        query: str,
+        context: str = None,
+        analyses: Iterable[str] = None,
+        max_length: int = 50,
+        min_length: int = 25
+    ) -> dict:
+        """
+        Process a user query, running the requested analyses concurrently.
+        Args:
+            query (str): The user's query.
+            context (str): Optional context for the query.
+            analyses (Iterable[str]): Stages to run, any of QUERY_ANALYSES (all by default).
+            max_length (int): Maximum length of the summary.
+            min_length (int): Minimum length of the summary.
+        Returns:
+            dict: Result of each stage that ran, the stages that were skipped and
+                  per-stage timings in milliseconds.
+        """
+        requested = QUERY_ANALYSES if analyses is None else tuple(analyses)
+        unknown = set(requested) - set(QUERY_ANALYSES)
+        if unknown:
+            raise ValueError(f"Unknown analyses: {', '.join(sorted(unknown))}")
+
+        stages = {}
+        skipped = []
+        for analysis in requested:
+            if analysis == "sentiment":
+                stages[analysis] = self.analyze_sentiment_async(query)
+            elif analysis == "entities":
+                stages[analysis] = self.extract_entities_async(query)
+            elif analysis == "answer":
+                # Question answering needs a context to answer from
+                if context:
+                    stages[analysis] = self.answer_question_async(query, context)
+                else:
+                    skipped.append(analysis)
+            elif analysis == "summary":
+                # A summary can't be shorter than min_length, so short queries are not summarized
+                if len(query.split()) > min_length:
+                    stages[analysis] = self.summarize_text_async(query, max_length, min_length)
+                else:
+                    skipped.append(analysis)
+
+        timings = {}
+
+        async def timed(name: str, stage: Awaitable):
+            started = time.perf_counter()
+            try:
+                return await stage
+            finally:
+                timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+        outputs = await asyncio.gather(*(timed(name, stage) for name, stage in stages.items()))
+
+        result = dict(zip(stages, outputs))
+        result["skipped"] = skipped
+        result["timings_ms"] = timings
+        return result
+
+    async def summarize_long_text_stream(
+        self,
+        text: str,
+        max_length: int = 50,
+        min_length: int = 25,
+        chunk_tokens: int = 512,
+        chunk_max_length: int = 80,
+        chunk_min_length: int = 20,
+        max_in_flight: int = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Summarize a document longer than the model's context with map-reduce.
+        The text is split into token-bounded chunks on sentence boundaries, chunks are
+        summarized concurrently (and micro-batched), and the chunk summaries are summarized
+        again until they fit in one chunk. Only a bounded number of chunks is in flight, so a
+        long document neither fills the inference queue nor waits out the call timeout there.
+        Args:
+            text (str): The input text to summarize.
+            max_length (int): Maximum length of the final summary.
+            min_length (int): Minimum length of the final summary.
+            chunk_tokens (int): Maximum tokens per chunk sent to the model.
+            chunk_max_length (int): Maximum length of each chunk summary.
+            chunk_min_length (int): Minimum length of each chunk summary.
+            max_in_flight (int): Chunks being summarized at once; defaults to one full batch
+                per executor worker.
+        Yields:
+            dict: {"type": "partial", "level", "index", "total", "summary"} for every chunk
+                  summary as it completes, then {"type": "final", "summary"}.
+        """
+        level = 0
+        chunks = chunk_text(text, chunk_tokens)
+        if max_in_flight is None:
+            batcher = get_batcher(SUMMARIZATION_MODEL, executor=self.executor)
+            max_in_flight = self.executor.max_workers * batcher.max_batch_size
+        in_flight = asyncio.Semaphore(max(max_in_flight, 1))
+
+        while len(chunks) > 1:
+            summaries = [None] * len(chunks)
+
+            async def summarize_chunk(index: int, chunk: str):
+                # Chunks already shorter than a chunk summary are kept as they are
+                if len(chunk.split()) <= chunk_min_length:
+                    return index, chunk
+                async with in_flight:
+                    return index, await self.summarize_text_async(chunk, chunk_max_length, chunk_min_length)
+
+            pending = [summarize_chunk(index, chunk) for index, chunk in enumerate(chunks)]
+            for finished in asyncio.as_completed(pending):
+                index, summary = await finished
+                summaries[index] = summary
+                yield {
+                    "type": "partial",
+                    "level": level,
+                    "index": index,
+                    "total": len(chunks),
+                    "summary": summary,
+                }
+
+            level += 1
+            combined = chunk_text(" ".join(summaries), chunk_tokens)
+            if len(combined) >= len(chunks):
+                # Summaries are not shrinking the text any more; reduce what we have in one pass
+                combined = [" ".join(summaries)]
+            chunks = combined
+
+        remaining = chunks[0] if chunks else ""
+        if approximate_tokens(remaining) > min_length:
+            summary = await self.summarize_text_async(remaining, max_length, min_length)
+        else:
+            summary = remaining
+        yield {"type": "final", "summary": summary}
+
+    async def summarize_long_text(self, text: str, max_length: int = 50, min_length: int = 25, **options) -> str:
+        """
+        Summarize a document of any length; see summarize_long_text_stream for the options.
+        """
+        summary = ""
+        async for event in self.summarize_long_text_stream(text, max_length, min_length, **options):
+            if event["type"] == "final":
+                summary = event["summary"]
+        return summary
\ No newline at end of file
@@ -0,0 +1,119 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from core.free_time import Interval
+
+
+class AvailabilityGrid:
+    def __init__(self, participants: List[str], start: datetime, end: datetime, resolution: int = 5):
+        """
+        Boolean availability matrix with one row per participant and one column per time slot.
+        Exact and quorum queries are answered with vectorized window sums instead of
+        per-event Python loops.
+        Args:
+            participants (List[str]): Row order of the grid.
+            start (datetime): Start of the first slot.
+            end (datetime): End of the searched range.
+            resolution (int): Slot length in minutes.
+        """
+        self.participants = list(participants)
+        self.start = start
+        self.resolution = timedelta(minutes=resolution)
+        self.slots = max(math.ceil((end - start) / self.resolution), 0)
+        self.free = np.ones((len(self.participants), self.slots), dtype=bool)
+        # Slots outside working hours are unusable for everyone
+        self.usable = np.ones(self.slots, dtype=bool)
+
+    def _slot_range(self, start: datetime, end: datetime) -> Tuple[int, int]:
+        # Any slot an interval touches counts as busy
+        first = math.floor((start - self.start) / self.resolution)
+        last = math.ceil((end - self.start) / self.resolution)
+        return min(max(first, 0), self.slots), min(max(last, 0), self.slots)
+
+    def _coverage(self, rows: List[int], intervals: List[Interval], height: int) -> np.ndarray:
+        # Difference array + cumulative sum marks every interval without a Python loop per slot
+        diff = np.zeros((height, self.slots + 1), dtype=np.int32)
+        if intervals:
+            bounds = np.array([self._slot_range(start, end) for start, end in intervals], dtype=np.int64)
+            rows = np.asarray(rows, dtype=np.int64)
+            np.add.at(diff, (rows, bounds[:, 0]), 1)
+            np.add.at(diff, (rows, bounds[:, 1]), -1)
+        return np.cumsum(diff, axis=1)[:, :self.slots] > 0
+
+    def mark_busy(self, busy: Dict[str, Iterable[Interval]]):
+        """
+        Mark busy intervals per participant.
+        """
+        rows, intervals = [], []
+        for row, participant in enumerate(self.participants):
+            for interval in busy.get(participant, ()):
+                rows.append(row)
+                intervals.append(interval)
+        self.free &= ~self._coverage(rows, intervals, len(self.participants))
+
+    def restrict_to(self, windows: List[Interval]):
+        """
+        Only allow slots inside the given windows (e.g. working hours).
+        """
+        self.usable &= self._coverage([0] * len(windows), windows, 1)[0]
+
+    def _window_counts(self, rows: np.ndarray, width: int) -> np.ndarray:
+        # Number of free slots in every window of width slots, per row
+        cumulative = np.zeros(rows.shape[:-1] + (rows.shape[-1] + 1,), dtype=np.int32)
+        np.cumsum(rows, axis=-1, out=cumulative[..., 1:])
+        return cumulative[..., width:] - cumulative[..., :-width]
+
+    def _width(self, duration: int) -> int:
+        return max(math.ceil(timedelta(minutes=duration) / self.resolution), 1)
+
+    def _slot_time(self, index: int) -> datetime:
+        return self.start + index * self.resolution
+
+    def common_starts(self, duration: int, limit: int = None) -> List[datetime]:
+        """
+        Return every start where all participants are free for duration minutes.
+        Rows are bit-packed before AND-ing, so the reduction touches 1/8 of the memory.
+        """
+        width = self._width(duration)
+        if self.slots < width:
+            return []
+
+        if len(self.participants):
+            packed = np.packbits(self.free, axis=1)
+            all_free = np.unpackbits(np.bitwise_and.reduce(packed, axis=0), count=self.slots).astype(bool)
+        else:
+            all_free = np.ones(self.slots, dtype=bool)
+
+        fits = self._window_counts(all_free & self.usable, width) == width
+        indexes = np.flatnonzero(fits)[:limit]
+        return [self._slot_time(index) for index in indexes]
+
+    def quorum_starts(self, duration: int, quorum: int, limit: int = None) -> List[Dict]:
+        """
+        Return every start where at least quorum participants are free for duration minutes,
+        best-attended first (earliest first among equals).
+        """
+        width = self._width(duration)
+        if self.slots < width:
+            return []
+
+        free_for_window = self._window_counts(self.free, width) == width
+        counts = free_for_window.sum(axis=0)
+        usable = self._window_counts(self.usable, width) == width
+
+        indexes = np.flatnonzero(usable & (counts >= quorum))
+        # Stable sort keeps earlier starts first among equally attended ones
+        indexes = indexes[np.argsort(-counts[indexes], kind="stable")][:limit]
+        return [
+            {
+                "start": self._slot_time(index),
+                "free_count": int(counts[index]),
+                "unavailable": [
+                    self.participants[row] for row in np.flatnonzero(~free_for_window[:, index])
+                ],
+            }
+            for index in indexes
+        ]
@@ -0,0 +1,153 @@
+import asyncio
+import os
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Tuple, Union
+
+from core.inference import InferenceExecutor, inference_executor
+from core.text_chunking import approximate_tokens
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        model_name: str,
+        executor: InferenceExecutor = None,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        bucket_width: int = 64,
+        length_fn: Callable[[str], int] = None
+    ):
+        """
+        Collect concurrent single-text calls to a transformers pipeline and run them as batches.
+        Args:
+            model_name (str): Registered model to call.
+            executor (InferenceExecutor): Executor running the batched calls.
+            max_batch_size (int): Flush as soon as this many texts are waiting.
+            max_wait_ms (float): Flush after the first text has waited this long.
+            bucket_width (int): Texts whose token lengths fall in the same bucket of this width
+                are padded together, so short texts are not padded to the longest one.
+            length_fn (Callable): Token length estimate used for bucketing.
+        """
+        self.model_name = model_name
+        self.executor = executor or inference_executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.bucket_width = bucket_width
+        self.length_fn = length_fn or approximate_tokens
+        # Pending texts grouped by call parameters, which must match within a batch
+        self._pending: Dict[Tuple, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[Tuple, asyncio.TimerHandle] = {}
+        self._tasks = set()
+
+    async def submit(self, text: str, **params):
+        """
+        Queue a text for the next batch and await its own pipeline result.
+        """
+        loop = asyncio.get_running_loop()
+        key = tuple(sorted(params.items()))
+        future = loop.create_future()
+
+        queue = self._pending.setdefault(key, [])
+        queue.append((text, future))
+
+        if len(queue) >= self.max_batch_size:
+            self._flush(key)
+        elif len(queue) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Tuple):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        items = self._pending.pop(key, None)
+        if not items:
+            return
+
+        for bucket in self._bucket(items):
+            task = asyncio.ensure_future(self._run_batch(bucket, dict(key)))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _bucket(self, items: List[Tuple[str, asyncio.Future]]) -> List[List[Tuple[str, asyncio.Future]]]:
+        buckets: Dict[int, List[Tuple[str, asyncio.Future]]] = {}
+        for item in items:
+            buckets.setdefault(self.length_fn(item[0]) // self.bucket_width, []).append(item)
+        return list(buckets.values())
+
+    async def _run_batch(self, items: List[Tuple[str, asyncio.Future]], params: Dict):
+        texts = [text for text, _ in items]
+        try:
+            results = await self.executor.run_model(self.model_name, texts, **params)
+        except Exception as exc:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        if len(results) != len(items):
+            # Results are matched to inputs by position, so a short or long answer can't be trusted
+            error = RuntimeError(
+                f"{self.model_name} returned {len(results)} results for a batch of {len(items)}"
+            )
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(items, results):
+            # Some pipelines wrap each input's result in a single-element list
+            if isinstance(result, list) and len(result) == 1:
+                result = result[0]
+            if not future.done():
+                future.set_result(result)
+
+    async def flush_all(self):
+        """
+        Flush every pending batch immediately and wait for the running batches.
+        """
+        for key in list(self._pending):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+_batchers: Dict[Tuple, MicroBatcher] = {}
+
+
+def get_batcher(model_name: str, **options) -> MicroBatcher:
+    """
+    Return the process-wide batcher for a model and options, creating it on first use.
+    Callers passing the same options share a batcher; different options get their own.
+    BATCH_MAX_SIZE and BATCH_MAX_WAIT_MS set the defaults for options not given.
+    """
+    options.setdefault("executor", inference_executor)
+    options.setdefault("max_batch_size", int(os.getenv("BATCH_MAX_SIZE", "16")))
+    options.setdefault("max_wait_ms", float(os.getenv("BATCH_MAX_WAIT_MS", "5")))
+    key = (model_name,) + tuple(sorted(options.items()))
+    batcher = _batchers.get(key)
+    if batcher is None:
+        batcher = _batchers[key] = MicroBatcher(model_name, **options)
+    return batcher
+
+
+async def chunked(items: Union[Iterable, AsyncIterable], size: int) -> AsyncIterator[List]:
+    """
+    Group a sync or async iterable into lists of at most size items
+    """
+    chunk = []
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
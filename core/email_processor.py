@@ -1,68 +1,166 @@
-from typing import Dict, List
-import spacy
-from transformers import pipeline
+import asyncio
+import os
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Union
+from core.batching import chunked, get_batcher
+from core.inference import InferenceExecutor, inference_executor
+from core.keyword_engine import KeywordEngine
+from core.model_registry import ModelRegistry, SENTIMENT_MODEL, SPACY_MODEL, model_registry
+from core.near_duplicate import NearDuplicateIndex
 from integrations.email_api import EmailAPI
 
+
 class EmailProcessor:
-    def __init__(self):
-        # Initialize NLP components
-        self.nlp = spacy.load("en_core_web_sm")
-        self.sentiment_analyzer = pipeline("sentiment-analysis")
+    def __init__(
+        self,
+        registry: ModelRegistry = None,
+        executor: InferenceExecutor = None,
+        keyword_engine: KeywordEngine = None,
+        near_duplicates: NearDuplicateIndex = None
+    ):
+        # NLP components are shared through the model registry and loaded on first use
+        self.registry = registry or model_registry
+        # Model calls run on the inference executor so they never block the event loop
+        self.executor = executor or inference_executor
+        # Categories, urgent terms and VIP senders come from EMAIL_RULES_PATH when set
+        if keyword_engine is None:
+            rules_path = os.getenv("EMAIL_RULES_PATH")
+            keyword_engine = KeywordEngine.from_file(rules_path) if rules_path else KeywordEngine()
+        self.keyword_engine = keyword_engine
+        # Near-identical emails (blasts, quoted reply chains, templates) are reported with a
+        # shared cluster id; NEAR_DUPLICATE_THRESHOLD=off disables it
+        if near_duplicates is None:
+            threshold = os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.95")
+            if threshold.lower() not in ("off", "0", "false", "no"):
+                near_duplicates = NearDuplicateIndex(
+                    threshold=float(threshold),
+                    memory_budget=int(os.getenv("NEAR_DUPLICATE_MEMORY_MB", 64)) * 1024 * 1024
+                )
+        self.near_duplicates = near_duplicates
         self.email_api = EmailAPI()
 
+    @property
+    def nlp(self):
+        return self.registry.get(SPACY_MODEL)
+
+    @property
+    def sentiment_analyzer(self):
+        return self.registry.get(SENTIMENT_MODEL)
+
     async def process(self, email_data: Dict) -> Dict:
         """
         Process incoming emails using NLP for categorization and automated responses
         """
+        # Not cached: triage is one keyword scan, cheaper than a cache lookup, and the
+        # near-duplicate verdict must reflect every email seen so far, resends included
+        return self._triage(email_data)
+
+    async def process_many(
+        self,
+        emails: Union[Iterable[Dict], AsyncIterable[Dict]],
+        batch_size: int = 64,
+        n_process: int = 1
+    ) -> AsyncIterator[Dict]:
+        """
+        Process a stream of emails in batches through nlp.pipe, yielding each result
+        as soon as its batch is done. The next batch is parsed while the current
+        one is being consumed.
+        """
+        index = 0
+        pending = None
+        async for chunk in chunked(emails, batch_size):
+            parse = asyncio.ensure_future(self._parse_many(chunk, batch_size, n_process))
+            if pending is not None:
+                for result in await self._finish_batch(*pending, index):
+                    yield result
+                index += len(pending[0])
+            pending = (chunk, parse)
+
+        if pending is not None:
+            for result in await self._finish_batch(*pending, index):
+                yield result
+
+    async def _parse_many(self, emails: List[Dict], batch_size: int, n_process: int) -> List:
+        contents = [email.get("content", "") for email in emails]
+        return await self.executor.run_model(
+            SPACY_MODEL, contents, method="pipe", batch_size=batch_size, n_process=n_process
+        )
+
+    async def _finish_batch(self, emails: List[Dict], parse: asyncio.Future, offset: int) -> List[Dict]:
+        docs = await parse
+        results = []
+        for position, (email_data, doc) in enumerate(zip(emails, docs)):
+            result = self._triage(email_data)
+            result["index"] = offset + position
+            if "id" in email_data:
+                result["id"] = email_data["id"]
+            result["entities"] = {ent.text: ent.label_ for ent in doc.ents}
+            results.append(result)
+        return results
+
+    def _triage(self, email_data: Dict) -> Dict:
+        """
+        Categorize and prioritize a single email with one keyword scan over its content
+        """
         # Extract email content
         content = email_data.get("content", "")
         sender = email_data.get("sender", "")
         subject = email_data.get("subject", "")
 
-        # Analyze email
-        category = self._categorize_email(content)
-        priority = self._determine_priority(content, sender)
+        # Analyze email; the keyword scan is cheap, so it always runs, even for near-duplicates
+        # (a one-word edit such as "urgent" must change the result)
+        matches = self.keyword_engine.scan(content)
+        category = self._categorize_email(content, matches)
+        priority = self._determine_priority(content, sender, matches)
+        group = self.near_duplicates.cluster(content) if self.near_duplicates is not None else None
         response = self._generate_response(content, category)
 
-        return {
+        result = {
             "category": category,
             "priority": priority,
             "suggested_response": response,
             "automated_actions": self._determine_actions(category, priority)
         }
+        if group is not None:
+            result["cluster_id"] = group["cluster_id"]
+            result["near_duplicate"] = group["duplicate"]
+            result["similarity"] = group["similarity"]
+        return result
 
-    def _categorize_email(self, content: str) -> str:
+    async def parse(self, content: str):
         """
-        Categorize email using NLP
+        Run the spaCy pipeline over the content on the inference executor
         """
-        doc = self.nlp(content)
-        # Implement email categorization logic
-        categories = {
-            "meeting": ["meet", "schedule", "appointment"],
-            "task": ["task", "todo", "deadline"],
-            "inquiry": ["question", "help", "support"],
-        }
-        
-        text_lower = content.lower()
-        for category, keywords in categories.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return category
-        return "other"
+        return await self.executor.run_model(SPACY_MODEL, content)
+
+    async def analyze_sentiment(self, content: str) -> Dict:
+        """
+        Run sentiment analysis over the content, micro-batched with concurrent callers
+        """
+        batcher = get_batcher(SENTIMENT_MODEL, executor=self.executor)
+        return await batcher.submit(content)
 
-    def _determine_priority(self, content: str, sender: str) -> int:
+    def _categorize_email(self, content: str, matches: Dict = None) -> str:
+        """
+        Categorize email from its keyword matches
+        """
+        if matches is None:
+            matches = self.keyword_engine.scan(content)
+        return matches["category"]
+
+    def _determine_priority(self, content: str, sender: str, matches: Dict = None) -> int:
         """
         Determine email priority (1-5)
         """
         priority = 3  # Default priority
-        
+
         # Check for urgent keywords
-        urgent_keywords = ["urgent", "asap", "emergency", "deadline"]
-        if any(keyword in content.lower() for keyword in urgent_keywords):
+        if matches is None:
+            matches = self.keyword_engine.scan(content)
+        if matches["urgent"]:
             priority += 1
 
         # Add sender importance check
-        vip_senders = ["boss@company.com", "client@important.com"]  # Example
-        if sender in vip_senders:
+        if self.keyword_engine.is_vip(sender):
             priority += 1
 
         return min(max(priority, 1), 5)  # Ensure priority is between 1-5
@@ -0,0 +1,30 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+
+async def bounded_gather(
+    calls: Dict[Hashable, Callable[[], Awaitable]],
+    limit: int = 10,
+    timeout: float = None
+) -> Tuple[Dict[Hashable, object], Dict[Hashable, str]]:
+    """
+    Run keyed async calls concurrently, at most limit at a time, each with its own timeout.
+    A failing call does not cancel the others.
+    Returns:
+        tuple: (results by key for calls that succeeded, error message by key for calls that failed)
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+    results: Dict[Hashable, object] = {}
+    errors: Dict[Hashable, str] = {}
+
+    async def run(key: Hashable, call: Callable[[], Awaitable]):
+        async with semaphore:
+            try:
+                results[key] = await asyncio.wait_for(call(), timeout)
+            except asyncio.TimeoutError:
+                errors[key] = f"timed out after {timeout}s"
+            except Exception as exc:
+                errors[key] = str(exc) or exc.__class__.__name__
+
+    await asyncio.gather(*(run(key, call) for key, call in calls.items()))
+    return results, errors
@@ -0,0 +1,91 @@
+import heapq
+from datetime import datetime, time, timedelta
+from typing import Iterable, List, Tuple
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(interval_lists: Iterable[Iterable[Interval]]) -> List[Interval]:
+    """
+    Sweep over several start-sorted interval lists at once and merge overlapping
+    or touching intervals into one sorted list.
+    """
+    merged: List[Interval] = []
+    for start, end in heapq.merge(*interval_lists):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def working_windows(
+    start: datetime,
+    end: datetime,
+    day_start: time = time(9),
+    day_end: time = time(17),
+    workdays: Iterable[int] = range(5)
+) -> List[Interval]:
+    """
+    Return the working-hour windows of each workday (0 = Monday) between start and end.
+    """
+    workdays = set(workdays)
+    windows: List[Interval] = []
+    day = start.date()
+    while day <= end.date():
+        if day.weekday() in workdays:
+            window_start = max(datetime.combine(day, day_start, start.tzinfo), start)
+            window_end = min(datetime.combine(day, day_end, start.tzinfo), end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += timedelta(days=1)
+    return windows
+
+
+def subtract_intervals(windows: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """
+    Remove sorted, merged busy intervals from sorted windows, leaving the free ranges.
+    """
+    free: List[Interval] = []
+    position = 0
+    for window_start, window_end in windows:
+        # Skip busy intervals that end before this window
+        while position < len(busy) and busy[position][1] <= window_start:
+            position += 1
+
+        current = window_start
+        scan = position
+        while scan < len(busy) and busy[scan][0] < window_end:
+            busy_start, busy_end = busy[scan]
+            if busy_start > current:
+                free.append((current, busy_start))
+            current = max(current, busy_end)
+            scan += 1
+        if current < window_end:
+            free.append((current, window_end))
+    return free
+
+
+def candidate_starts(
+    free_ranges: List[Interval],
+    duration: timedelta,
+    granularity: timedelta = None,
+    limit: int = None
+) -> List[datetime]:
+    """
+    Return meeting start times that fit duration inside the free ranges.
+    Each range contributes its own start and then one start every granularity
+    (only the range start when granularity is None).
+    """
+    starts: List[datetime] = []
+    for range_start, range_end in free_ranges:
+        current = range_start
+        while current + duration <= range_end:
+            starts.append(current)
+            if limit is not None and len(starts) >= limit:
+                return starts
+            if granularity is None:
+                break
+            current += granularity
+    return starts
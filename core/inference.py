@@ -0,0 +1,128 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict
+
+from core.model_registry import model_registry
+
+
+class InferenceQueueFullError(RuntimeError):
+    """
+    Raised when the inference executor already holds its maximum number of pending calls.
+    """
+
+
+class InferenceTimeoutError(TimeoutError):
+    """
+    Raised when an inference call does not finish within its timeout.
+    """
+
+
+def _invoke_model(name: str, method: str, args: tuple, kwargs: Dict):
+    """
+    Run a model call inside a worker. Module level so it can be sent to a process pool,
+    where each worker resolves (and lazily loads) its own copy of the model.
+    """
+    model = model_registry.get(name)
+    target = getattr(model, method) if method else model
+    result = target(*args, **kwargs)
+    # Generators (e.g. nlp.pipe) must be consumed before leaving the worker
+    if method and hasattr(result, "__next__"):
+        result = list(result)
+    return result
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: int = 2,
+        max_pending: int = 64,
+        timeout: float = 30.0
+    ):
+        """
+        Run blocking model calls in a thread or process pool so they never block the event loop.
+        Args:
+            mode (str): "thread" or "process".
+            max_workers (int): Number of pool workers.
+            max_pending (int): Maximum number of queued or running calls before new calls are rejected.
+            timeout (float): Default timeout in seconds for a single call (None to wait forever).
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError("mode must be 'thread' or 'process'")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool: Executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="inference"
+                )
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable, *args, timeout: float = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) in the pool and await its result.
+        In process mode fn and its arguments must be picklable.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise InferenceQueueFullError(
+                    f"Inference queue is full ({self.max_pending} pending calls)"
+                )
+            self._pending += 1
+
+        try:
+            future = self.pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is released when the work really finishes, not when the caller gives up
+        future.add_done_callback(self._release)
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise InferenceTimeoutError(f"Inference call timed out after {timeout}s")
+
+    async def run_model(self, name: str, *args, method: str = None, timeout: float = None, **kwargs):
+        """
+        Call a registered model (or one of its methods) in the pool and await the result.
+        """
+        return await self.run(_invoke_model, name, method, args, kwargs, timeout=timeout)
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+# Shared executor used by AIEngine and EmailProcessor
+inference_executor = InferenceExecutor(
+    mode=os.getenv("INFERENCE_MODE", "thread"),
+    max_workers=int(os.getenv("INFERENCE_WORKERS", "2")),
+    max_pending=int(os.getenv("INFERENCE_MAX_PENDING", "64")),
+    timeout=float(os.getenv("INFERENCE_TIMEOUT", "30")),
+)
@@ -0,0 +1,211 @@
+import os
+import re
+import time
+from importlib import metadata
+from typing import Dict, List
+
+BACKENDS = ("pytorch", "quantized", "onnx")
+
+# ORTModel*.from_pretrained(..., export=True) needs optimum 1.5+, which in turn needs a newer
+# transformers than the one pinned in requirements.txt
+ONNX_REQUIREMENTS = {"optimum": (1, 5), "onnxruntime": (1, 11), "transformers": (4, 26)}
+
+# Checkpoints transformers picks by default for each task; ONNX export needs an explicit id
+DEFAULT_MODELS = {
+    "sentiment-analysis": "distilbert-base-uncased-finetuned-sst-2-english",
+    "summarization": "sshleifer/distilbart-cnn-12-6",
+    "question-answering": "distilbert-base-cased-distilled-squad",
+}
+
+# Fixed evaluation set used to compare a backend against the fp32 baseline
+EVALUATION_SET = {
+    "sentiment-analysis": [
+        "Thanks so much, the meeting went really well!",
+        "This is the third time the invoice has been wrong. Very disappointing.",
+        "Please find the agenda for tomorrow attached.",
+        "I love how quickly the team resolved the outage.",
+        "The delivery is late again and nobody has replied to my emails.",
+        "Can we move the call to Thursday afternoon?",
+        "Great work on the quarterly report, the numbers look fantastic.",
+        "I'm frustrated that the deadline was changed without notice.",
+    ],
+    "summarization": [
+        "The quarterly planning meeting covered hiring, budget and the product roadmap. "
+        "Engineering will add two backend developers in the next quarter. The marketing budget "
+        "was reduced by ten percent to fund the new analytics platform. The roadmap now puts "
+        "the mobile release ahead of the reporting redesign, which moves to the following quarter.",
+        "Our customer reported that invoices generated since the last release show the wrong tax "
+        "rate for orders shipped to Canada. Finance confirmed the issue and asked engineering to "
+        "patch the tax table, re-issue the affected invoices and notify the customers involved "
+        "before the end of the month.",
+    ],
+    "question-answering": [
+        {"question": "When is the review?", "context": "The design review is scheduled for Friday at 3 PM in room 4."},
+        {"question": "Who approved the budget?", "context": "The budget was approved by Maria Lopez after the board meeting."},
+        {"question": "How many developers will be hired?", "context": "Engineering will hire two backend developers next quarter."},
+        {"question": "Where is the offsite?", "context": "This year's offsite will take place in Lisbon in early June."},
+    ],
+}
+
+
+def _version(package: str) -> tuple:
+    try:
+        return tuple(int(part) for part in re.findall(r"\d+", metadata.version(package))[:2])
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def check_backend(backend: str):
+    """
+    Raise if a backend is unknown or its packages are missing or too old, without importing them.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    if backend != "onnx":
+        return
+    problems = []
+    for package, minimum in ONNX_REQUIREMENTS.items():
+        installed = _version(package)
+        if installed is None or installed < minimum:
+            found = "not installed" if installed is None else ".".join(map(str, installed))
+            problems.append(f"{package}>={'.'.join(map(str, minimum))} ({found})")
+    if problems:
+        raise RuntimeError(
+            "The onnx inference backend needs " + ", ".join(problems)
+            + "; install a compatible set or choose the pytorch or quantized backend"
+        )
+
+
+def pipeline_backends() -> Dict[str, str]:
+    """
+    Read the per-pipeline backend choice from INFERENCE_BACKENDS,
+    e.g. "sentiment-analysis=quantized,summarization=onnx". Each choice is checked here,
+    so a backend that cannot load fails at startup rather than on the first request.
+    """
+    backends = {}
+    for entry in os.getenv("INFERENCE_BACKENDS", "").split(","):
+        if "=" in entry:
+            task, backend = (part.strip() for part in entry.split("=", 1))
+            check_backend(backend)
+            backends[task] = backend
+    return backends
+
+
+def build_pipeline(task: str, backend: str = "pytorch", model: str = None):
+    """
+    Build a transformers pipeline for the task on the requested CPU backend.
+    Args:
+        task (str): Pipeline task, e.g. "sentiment-analysis".
+        backend (str): "pytorch" (fp32), "quantized" (int8 dynamic quantization) or "onnx".
+        model (str): Optional checkpoint id; defaults to the task's default checkpoint.
+    """
+    check_backend(backend)
+    from transformers import pipeline
+
+    if backend == "pytorch":
+        return pipeline(task, model=model)
+
+    if backend == "quantized":
+        import torch
+
+        pipe = pipeline(task, model=model)
+        # Linear layers dominate transformer inference; int8 weights with dynamic activation scaling
+        pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipe
+
+    return _build_onnx_pipeline(task, model or DEFAULT_MODELS[task])
+
+
+def _build_onnx_pipeline(task: str, model: str):
+    from optimum.onnxruntime import (
+        ORTModelForQuestionAnswering,
+        ORTModelForSeq2SeqLM,
+        ORTModelForSequenceClassification,
+    )
+    from transformers import AutoTokenizer, pipeline
+
+    model_classes = {
+        "sentiment-analysis": ORTModelForSequenceClassification,
+        "summarization": ORTModelForSeq2SeqLM,
+        "question-answering": ORTModelForQuestionAnswering,
+    }
+
+    # Exported models are kept on disk so the export only happens once
+    export_dir = os.path.join(os.getenv("ONNX_EXPORT_DIR", "onnx_models"), model.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        ort_model = model_classes[task].from_pretrained(export_dir)
+    else:
+        ort_model = model_classes[task].from_pretrained(model, export=True)
+        ort_model.save_pretrained(export_dir)
+
+    return pipeline(task, model=ort_model, tokenizer=AutoTokenizer.from_pretrained(model))
+
+
+def _run(pipe, task: str, samples: List) -> List:
+    if task == "question-answering":
+        return [pipe(**sample)["answer"] for sample in samples]
+    if task == "summarization":
+        return [
+            pipe(sample, max_length=50, min_length=10, do_sample=False)[0]["summary_text"]
+            for sample in samples
+        ]
+    return [pipe(sample)[0] for sample in samples]
+
+
+def _token_f1(reference: str, candidate: str) -> float:
+    reference_tokens = reference.lower().split()
+    candidate_tokens = candidate.lower().split()
+    common = sum(min(reference_tokens.count(token), candidate_tokens.count(token)) for token in set(candidate_tokens))
+    if not common:
+        return 0.0
+    precision = common / len(candidate_tokens)
+    recall = common / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def check_parity(task: str, backend: str, model: str = None, min_agreement: float = 0.9) -> Dict:
+    """
+    Compare a backend against the fp32 PyTorch baseline on the fixed evaluation set.
+    Agreement is label agreement for sentiment, exact answer match for question answering
+    and mean token F1 against the baseline summary for summarization.
+    Returns:
+        dict: Agreement, timings, speedup and whether agreement meets min_agreement.
+    """
+    samples = EVALUATION_SET[task]
+    baseline = build_pipeline(task, "pytorch", model)
+    candidate = build_pipeline(task, backend, model)
+
+    # Warm both pipelines so one-off initialization is not timed
+    _run(baseline, task, samples[:1])
+    _run(candidate, task, samples[:1])
+
+    started = time.perf_counter()
+    expected = _run(baseline, task, samples)
+    baseline_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = _run(candidate, task, samples)
+    candidate_seconds = time.perf_counter() - started
+
+    report = {"task": task, "backend": backend, "samples": len(samples)}
+    if task == "sentiment-analysis":
+        report["agreement"] = sum(e["label"] == a["label"] for e, a in zip(expected, actual)) / len(samples)
+        report["mean_score_delta"] = sum(abs(e["score"] - a["score"]) for e, a in zip(expected, actual)) / len(samples)
+    elif task == "question-answering":
+        report["agreement"] = sum(e.strip() == a.strip() for e, a in zip(expected, actual)) / len(samples)
+    else:
+        report["agreement"] = sum(_token_f1(e, a) for e, a in zip(expected, actual)) / len(samples)
+
+    report["baseline_seconds"] = round(baseline_seconds, 4)
+    report["backend_seconds"] = round(candidate_seconds, 4)
+    report["speedup"] = round(baseline_seconds / candidate_seconds, 2) if candidate_seconds else None
+    report["passed"] = report["agreement"] >= min_agreement
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # Usage: python -m core.inference_backends <task> <backend>
+    print(json.dumps(check_parity(sys.argv[1], sys.argv[2]), indent=2))
@@ -0,0 +1,104 @@
+import json
+import re
+from typing import Dict, Iterable, List
+
+# Default rule set, used when no rules file is configured
+DEFAULT_CATEGORIES = {
+    "meeting": ["meet", "schedule", "appointment"],
+    "task": ["task", "todo", "deadline"],
+    "inquiry": ["question", "help", "support"],
+}
+DEFAULT_URGENT_TERMS = ["urgent", "asap", "emergency", "deadline"]
+DEFAULT_VIP_SENDERS = ["boss@company.com", "client@important.com"]
+
+URGENT = "__urgent__"
+
+
+class KeywordEngine:
+    def __init__(
+        self,
+        categories: Dict[str, List[str]] = None,
+        urgent_terms: Iterable[str] = None,
+        vip_senders: Iterable[str] = None,
+        match_inflections: bool = True
+    ):
+        """
+        Single-pass keyword matcher for email categorization and urgency detection.
+        All terms are compiled into one case-insensitive regex, so a scan costs
+        O(len(text)) regardless of how many keywords are configured.
+        Args:
+            categories (Dict[str, List[str]]): Category name to keywords, in priority order.
+            urgent_terms (Iterable[str]): Keywords that mark an email as urgent.
+            vip_senders (Iterable[str]): Sender addresses that raise priority.
+            match_inflections (bool): Let a term match at the start of a longer word
+                ("meet" matches "meeting"); otherwise only whole words match.
+        """
+        self.categories = categories if categories is not None else DEFAULT_CATEGORIES
+        self.urgent_terms = list(urgent_terms if urgent_terms is not None else DEFAULT_URGENT_TERMS)
+        self.vip_senders = frozenset(
+            self._normalize_sender(sender)
+            for sender in (vip_senders if vip_senders is not None else DEFAULT_VIP_SENDERS)
+        )
+        self._category_rank = {category: rank for rank, category in enumerate(self.categories)}
+
+        # Term -> labels it belongs to (categories and/or the urgent marker)
+        self._labels: Dict[str, List[str]] = {}
+        for category, keywords in self.categories.items():
+            for keyword in keywords:
+                self._labels.setdefault(keyword.lower(), []).append(category)
+        for term in self.urgent_terms:
+            self._labels.setdefault(term.lower(), []).append(URGENT)
+
+        self._pattern = self._compile(self._labels, match_inflections)
+
+    @classmethod
+    def from_file(cls, path: str) -> "KeywordEngine":
+        """
+        Build an engine from a JSON rules file with "categories", "urgent_terms" and "vip_senders".
+        """
+        with open(path) as rules_file:
+            rules = json.load(rules_file)
+        return cls(
+            categories=rules.get("categories"),
+            urgent_terms=rules.get("urgent_terms"),
+            vip_senders=rules.get("vip_senders"),
+            match_inflections=rules.get("match_inflections", True)
+        )
+
+    @staticmethod
+    def _compile(terms: Iterable[str], match_inflections: bool):
+        if not terms:
+            return None
+        # Longest first so that a term is never shadowed by one of its prefixes
+        alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+        suffix = r"\w*" if match_inflections else r"(?!\w)"
+        return re.compile(rf"(?<!\w)({alternation}){suffix}", re.IGNORECASE)
+
+    @staticmethod
+    def _normalize_sender(sender: str) -> str:
+        return sender.strip().lower()
+
+    def scan(self, text: str) -> Dict:
+        """
+        Scan the text once and return every category and urgent match.
+        Returns:
+            dict: {"category": best category or "other", "categories": {category: [terms]},
+                   "urgent": [terms]}
+        """
+        categories: Dict[str, List[str]] = {}
+        urgent: List[str] = []
+
+        if self._pattern is not None and text:
+            for match in self._pattern.finditer(text):
+                term = match.group(1).lower()
+                for label in self._labels[term]:
+                    if label == URGENT:
+                        urgent.append(term)
+                    else:
+                        categories.setdefault(label, []).append(term)
+
+        category = min(categories, key=self._category_rank.__getitem__) if categories else "other"
+        return {"category": category, "categories": categories, "urgent": urgent}
+
+    def is_vip(self, sender: str) -> bool:
+        return bool(sender) and self._normalize_sender(sender) in self.vip_senders
@@ -1,31 +1,64 @@
-from datetime import datetime, timedelta
-from typing import Dict, List
+import asyncio
+import math
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Tuple
+from core.availability_grid import AvailabilityGrid
+from core.fanout import bounded_gather
+from core.free_time import candidate_starts, merge_intervals, subtract_intervals, working_windows
 from integrations.calendar_api import CalendarAPI
+from integrations.interval_index import IntervalIndex, to_datetime
 
 class MeetingScheduler:
-    def __init__(self):
+    def __init__(
+        self,
+        slot_granularity: int = 30,
+        search_days: int = 7,
+        max_concurrency: int = 10,
+        call_timeout: float = 10.0,
+        background_invitations: bool = True
+    ):
         self.calendar_api = CalendarAPI()
+        self.slot_granularity = slot_granularity  # minutes between candidate starts in a free range
+        self.search_days = search_days  # how far ahead to look when no end is preferred
+        self.max_concurrency = max_concurrency  # concurrent calendar backend calls per fan-out
+        self.call_timeout = call_timeout  # seconds allowed for each calendar backend call
+        # Send invitations after the scheduling response instead of before it
+        self.background_invitations = background_invitations
+        self._invitation_tasks = set()
+        self.invitation_reports = OrderedDict()  # event id -> invitation delivery report
+        self.max_invitation_reports = 10000
 
     async def schedule(self, meeting_data: Dict) -> Dict:
         """
-        Schedule meetings based on availability and preferences
+        Schedule meetings based on availability and preferences.
+        Nothing is booked when a participant's calendar could not be fetched, since their
+        conflicts were not checked, unless meeting_data sets "ignore_calendar_errors".
         """
         participants = meeting_data.get("participants", [])
         duration = meeting_data.get("duration", 60)  # minutes
         preferred_time_range = meeting_data.get("preferred_time_range", {})
 
         # Find available slots
-        available_slots = await self._find_available_slots(
+        available_slots, calendar_errors = await self._find_available_slots(
             participants,
             duration,
             preferred_time_range
         )
 
+        if calendar_errors and not meeting_data.get("ignore_calendar_errors"):
+            return {
+                "success": False,
+                "message": "Could not check every participant's calendar",
+                "calendar_errors": calendar_errors
+            }
+
         if not available_slots:
             return {
                 "success": False,
                 "message": "No available slots found",
-                "suggested_alternatives": await self._suggest_alternatives(participants)
+                "suggested_alternatives": await self._suggest_alternatives(participants, duration),
+                "calendar_errors": calendar_errors
             }
 
         # Schedule the meeting
@@ -40,22 +73,119 @@ class MeetingScheduler:
         return {
             "success": True,
             "meeting_details": scheduled_meeting,
-            "scheduled_time": available_slots[0].isoformat()
+            "scheduled_time": available_slots[0].isoformat(),
+            "invitations": self.invitation_reports.get(scheduled_meeting["id"], {"status": "sending"}),
+            # Only non-empty when the caller opted to book despite unchecked calendars
+            "calendar_errors": calendar_errors
         }
 
+    async def schedule_batch(self, meetings: List[Dict]) -> Dict:
+        """
+        Schedule many meetings in one pass without conflicts between them.
+        Calendars are fetched once into a shared availability view that is updated in place
+        as each meeting is placed; the most constrained meetings (fewest candidate slots,
+        then most participants, then longest) are placed first. Meetings with a participant
+        whose calendar could not be fetched stay unscheduled unless they set
+        "ignore_calendar_errors".
+        Returns:
+            dict: {"scheduled": [...], "unscheduled": [...], "calendar_errors": {...}},
+                  each entry carrying the meeting's index in the input list.
+        """
+        everyone = [participant for meeting in meetings for participant in meeting.get("participants", [])]
+        calendars, calendar_errors = await self._fetch_calendars(everyone)
+
+        candidates = []
+        for meeting in meetings:
+            meeting_calendars = {
+                participant: calendars[participant]
+                for participant in meeting.get("participants", [])
+                if participant in calendars
+            }
+            candidates.append(self._find_common_free_time(
+                meeting_calendars,
+                meeting.get("duration", 60),
+                meeting.get("preferred_time_range", {})
+            ))
+
+        order = sorted(
+            range(len(meetings)),
+            key=lambda index: (
+                len(candidates[index]),
+                -len(meetings[index].get("participants", [])),
+                -meetings[index].get("duration", 60)
+            )
+        )
+
+        scheduled = []
+        unscheduled = []
+        for index in order:
+            meeting = meetings[index]
+            participants = meeting.get("participants", [])
+            duration = timedelta(minutes=meeting.get("duration", 60))
+
+            unchecked = [participant for participant in participants if participant in calendar_errors]
+            if unchecked and not meeting.get("ignore_calendar_errors"):
+                unscheduled.append({
+                    "index": index,
+                    "title": meeting.get("title", ""),
+                    "reason": f"Could not check the calendars of: {', '.join(unchecked)}"
+                })
+                continue
+
+            # Placements only ever remove free time, so the first candidate still free is taken
+            slot = next(
+                (
+                    candidate for candidate in candidates[index]
+                    if all(
+                        calendars[participant].is_free(candidate, candidate + duration)
+                        for participant in participants
+                        if participant in calendars
+                    )
+                ),
+                None
+            )
+            if slot is None:
+                unscheduled.append({
+                    "index": index,
+                    "title": meeting.get("title", ""),
+                    "reason": "No available slots found" if not candidates[index]
+                    else "Available slots were taken by other meetings in the batch"
+                })
+                continue
+
+            event = await self._create_meeting(
+                participants,
+                slot,
+                meeting.get("duration", 60),
+                meeting.get("title", ""),
+                meeting.get("description", "")
+            )
+            # Keep the view current even if the calendar backend hands out copies of its indexes
+            for participant in participants:
+                if participant in calendars and event["id"] not in calendars[participant]:
+                    calendars[participant].add(event["id"], event["start_time"], event["end_time"], event)
+
+            scheduled.append({
+                "index": index,
+                "meeting_details": event,
+                "scheduled_time": slot.isoformat()
+            })
+
+        scheduled.sort(key=lambda placement: placement["index"])
+        unscheduled.sort(key=lambda placement: placement["index"])
+        return {"scheduled": scheduled, "unscheduled": unscheduled, "calendar_errors": calendar_errors}
+
     async def _find_available_slots(
         self,
         participants: List[str],
         duration: int,
         preferred_time_range: Dict
-    ) -> List[datetime]:
+    ) -> Tuple[List[datetime], Dict[str, str]]:
         """
         Find available time slots for all participants
+        Returns the slots and the participants whose calendars could not be fetched
         """
-        # Get each participant's calendar
-        calendars = {}
-        for participant in participants:
-            calendars[participant] = await self.calendar_api.get_calendar(participant)
+        calendars, calendar_errors = await self._fetch_calendars(participants)
 
         # Find common free time slots
         common_slots = self._find_common_free_time(
@@ -64,7 +194,20 @@ class MeetingScheduler:
             preferred_time_range
         )
 
-        return common_slots
+        return common_slots, calendar_errors
+
+    async def _fetch_calendars(self, participants: List[str]) -> Tuple[Dict[str, IntervalIndex], Dict[str, str]]:
+        """
+        Fetch each participant's calendar index concurrently, bounded by max_concurrency
+        """
+        return await bounded_gather(
+            {
+                participant: (lambda participant=participant: self.calendar_api.get_calendar_index(participant))
+                for participant in dict.fromkeys(participants)
+            },
+            limit=self.max_concurrency,
+            timeout=self.call_timeout
+        )
 
     def _find_common_free_time(
         self,
@@ -73,65 +216,121 @@ class MeetingScheduler:
         preferred_time_range: Dict
     ) -> List[datetime]:
         """
-        Find common free time slots among all participants
+        Find common free time slots among all participants.
+        Busy intervals of all participants are merged with a sweep line and subtracted
+        from the working-hour windows, so free ranges are computed directly.
+        preferred_time_range may contain "start"/"end" (datetime or ISO string) bounding
+        the search and "day_start"/"day_end" (hour or "HH:MM") overriding working hours.
         """
-        # Implementation for finding common free time slots
-        # This is a simplified version
-        available_slots = []
-        start_time = datetime.now()
-        end_time = start_time + timedelta(days=7)
+        start_time, end_time = self._search_window(preferred_time_range)
+        windows = self._working_windows(start_time, end_time, preferred_time_range)
+        busy = merge_intervals(
+            calendar.busy_intervals(start_time, end_time) for calendar in calendars.values()
+        )
+        free_ranges = subtract_intervals(windows, busy)
+
+        return candidate_starts(
+            free_ranges,
+            timedelta(minutes=duration),
+            timedelta(minutes=self.slot_granularity) if self.slot_granularity else None
+        )
 
-        current_slot = start_time
-        while current_slot < end_time:
-            if self._is_slot_available(current_slot, duration, calendars):
-                available_slots.append(current_slot)
-            current_slot += timedelta(minutes=30)
+    def _search_window(self, preferred_time_range: Dict) -> Tuple[datetime, datetime]:
+        now = datetime.now()
+        start_time = preferred_time_range.get("start")
+        start_time = max(to_datetime(start_time), now) if start_time else now
+        end_time = preferred_time_range.get("end")
+        end_time = to_datetime(end_time) if end_time else start_time + timedelta(days=self.search_days)
+        return start_time, end_time
 
-        return available_slots
+    def _working_windows(self, start_time: datetime, end_time: datetime, preferred_time_range: Dict) -> List:
+        return working_windows(
+            start_time,
+            end_time,
+            self._time_of_day(preferred_time_range.get("day_start"), time(9)),
+            self._time_of_day(preferred_time_range.get("day_end"), time(17))
+        )
+
+    @staticmethod
+    def _time_of_day(value, default: time) -> time:
+        if value is None:
+            return default
+        if isinstance(value, time):
+            return value
+        if isinstance(value, int):
+            return time(value)
+        return time.fromisoformat(value)
 
-    def _is_slot_available(
+    async def find_slots_grid(
         self,
-        slot: datetime,
-        duration: int,
-        calendars: Dict
-    ) -> bool:
+        participants: List[str],
+        duration: int = 60,
+        resolution: int = 5,
+        quorum: int = None,
+        preferred_time_range: Dict = None,
+        limit: int = None
+    ) -> Dict:
         """
-        Check if a time slot is available for all participants
+        Vectorized availability search for large attendee sets at fine resolution.
+        Every participant's calendar becomes a boolean slot array; exact queries AND the
+        arrays and quorum queries count free attendees per window.
+        Args:
+            participants (List[str]): Attendees to check.
+            duration (int): Meeting length in minutes.
+            resolution (int): Slot length in minutes.
+            quorum (int): Minimum number of free attendees; None requires everyone.
+            preferred_time_range (Dict): Same keys as for schedule().
+            limit (int): Maximum number of slots to return.
+        Returns:
+            dict: {"slots": [{"start", "free_count", "unavailable"}], "calendar_errors": {...}}
         """
-        # Check working hours (9 AM to 5 PM)
-        if slot.hour < 9 or slot.hour >= 17:
-            return False
-
-        # Check weekends
-        if slot.weekday() >= 5:  # Saturday or Sunday
-            return False
+        grid, calendar_errors = await self._build_grid(participants, resolution, preferred_time_range or {})
 
-        # Check each participant's calendar
-        for calendar in calendars.values():
-            if not self._is_participant_available(slot, duration, calendar):
-                return False
+        if quorum is None:
+            slots = [
+                {"start": start, "free_count": len(grid.participants), "unavailable": []}
+                for start in grid.common_starts(duration, limit)
+            ]
+        else:
+            slots = grid.quorum_starts(duration, quorum, limit)
 
-        return True
+        return {"slots": slots, "calendar_errors": calendar_errors}
 
-    def _is_participant_available(
+    async def _build_grid(
         self,
-        slot: datetime,
-        duration: int,
-        calendar: List[Dict]
-    ) -> bool:
-        """
-        Check if a participant is available during a specific time slot
-        """
-        slot_end = slot + timedelta(minutes=duration)
-        
-        for event in calendar:
-            event_start = event['start']
-            event_end = event['end']
-            
-            if (slot < event_end and slot_end > event_start):
-                return False
-        
-        return True
+        participants: List[str],
+        resolution: int,
+        preferred_time_range: Dict
+    ) -> Tuple[AvailabilityGrid, Dict[str, str]]:
+        calendars, calendar_errors = await self._fetch_calendars(participants)
+        start_time, end_time = self._search_window(preferred_time_range)
+
+        # Start the grid on a resolution boundary so slots fall on round times
+        step = timedelta(minutes=resolution)
+        midnight = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        start_time = midnight + math.ceil((start_time - midnight) / step) * step
+
+        grid = AvailabilityGrid(list(calendars), start_time, end_time, resolution)
+        grid.mark_busy({
+            participant: calendar.busy_intervals(start_time, end_time)
+            for participant, calendar in calendars.items()
+        })
+        grid.restrict_to(self._working_windows(start_time, end_time, preferred_time_range))
+        return grid, calendar_errors
+
+    async def _suggest_alternatives(self, participants: List[str], duration: int = 60) -> List[Dict]:
+        """
+        Suggest the best-attended slots when no slot suits every participant
+        """
+        if len(participants) < 2:
+            return []
+        result = await self.find_slots_grid(
+            participants, duration, resolution=30, quorum=len(participants) - 1, limit=3
+        )
+        return [
+            {**slot, "start": slot["start"].isoformat()}
+            for slot in result["slots"]
+        ]
 
     async def _create_meeting(
         self,
@@ -155,17 +354,41 @@ class MeetingScheduler:
         # Create calendar event
         event = await self.calendar_api.create_event(meeting_details)
 
-        # Send meeting invitations
-        await self._send_invitations(meeting_details)
+        # Send meeting invitations; callers may reformat the returned event, so send a copy
+        invitation = self._send_invitations(dict(meeting_details))
+        if self.background_invitations:
+            task = asyncio.ensure_future(invitation)
+            self._invitation_tasks.add(task)
+            task.add_done_callback(self._invitation_tasks.discard)
+        else:
+            await invitation
 
         return event
 
-    async def _send_invitations(self, meeting_details: Dict):
+    async def _send_invitations(self, meeting_details: Dict) -> Dict:
+        """
+        Send meeting invitations to all participants concurrently and record the delivery report
+        """
+        self.invitation_reports[meeting_details["id"]] = {"status": "sending"}
+        while len(self.invitation_reports) > self.max_invitation_reports:
+            self.invitation_reports.popitem(last=False)
+        sent, failed = await bounded_gather(
+            {
+                participant: (
+                    lambda participant=participant: self.calendar_api.send_invitation(participant, meeting_details)
+                )
+                for participant in meeting_details["participants"]
+            },
+            limit=self.max_concurrency,
+            timeout=self.call_timeout
+        )
+        report = {"status": "sent" if not failed else "partial", "sent": list(sent), "failed": failed}
+        self.invitation_reports[meeting_details["id"]] = report
+        return report
+
+    async def wait_for_invitations(self):
         """
-        Send meeting invitations to all participants
+        Wait until all background invitation deliveries have finished
         """
-        for participant in meeting_details["participants"]:
-            await self.calendar_api.send_invitation(
-                participant,
-                meeting_details
-            )
\ No newline at end of file
+        if self._invitation_tasks:
+            await asyncio.gather(*list(self._invitation_tasks), return_exceptions=True)
\ No newline at end of file
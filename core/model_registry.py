@@ -0,0 +1,134 @@
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List
+
+from core.inference_backends import build_pipeline, pipeline_backends
+
+# Names under which the shared models are registered
+SPACY_MODEL = "en_core_web_sm"
+SENTIMENT_MODEL = "sentiment-analysis"
+SUMMARIZATION_MODEL = "summarization"
+QA_MODEL = "question-answering"
+
+
+def _current_rss() -> int:
+    """
+    Return the resident set size of this process in bytes.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Fall back to peak RSS where /proc is not available (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Process-wide registry handing out one shared, lazily loaded instance per model.
+        """
+        self._loaders: Dict[str, Callable[[], object]] = {}
+        self._models: Dict[str, object] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], object]):
+        """
+        Register a loader for a model. The loader is only called on first use.
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str):
+        """
+        Return the shared instance of a model, loading it on first use.
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"Model '{name}' is not registered")
+
+        # Only one thread loads a given model; the others wait for it
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name: str):
+        rss_before = _current_rss()
+        started = time.perf_counter()
+        model = self._loaders[name]()
+        load_time = time.perf_counter() - started
+
+        self._stats[name] = {
+            "load_time_seconds": round(load_time, 3),
+            "rss_delta_bytes": max(_current_rss() - rss_before, 0),
+            "loaded_at": time.time(),
+        }
+        self._models[name] = model
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm_up(self, names: Iterable[str] = None) -> Dict[str, Dict]:
+        """
+        Load the given models (all registered models by default) ahead of first use.
+        """
+        for name in list(names or self._loaders):
+            self.get(name)
+        return self.report()
+
+    def unload(self, name: str) -> bool:
+        """
+        Drop a loaded model so it is reloaded on next use.
+        """
+        with self._locks.get(name, self._lock):
+            self._stats.pop(name, None)
+            return self._models.pop(name, None) is not None
+
+    def report(self) -> Dict[str, Dict]:
+        """
+        Report load state, load time and RSS growth for every registered model.
+        """
+        report = {}
+        for name in self._loaders:
+            entry = {"loaded": name in self._models}
+            entry.update(self._stats.get(name, {}))
+            report[name] = entry
+        return report
+
+    def models(self) -> List[str]:
+        return list(self._loaders)
+
+
+def _load_spacy(name: str):
+    import spacy
+    return spacy.load(name)
+
+
+# The CPU backend (fp32, int8 quantized or ONNX) is chosen per pipeline through INFERENCE_BACKENDS;
+# read once at import so a misconfigured backend stops the app from starting
+PIPELINE_BACKENDS = pipeline_backends()
+
+
+def _load_pipeline(task: str):
+    return build_pipeline(task, PIPELINE_BACKENDS.get(task, "pytorch"))
+
+
+# Shared registry used by AIEngine and EmailProcessor
+model_registry = ModelRegistry()
+model_registry.register(SPACY_MODEL, lambda: _load_spacy(SPACY_MODEL))
+model_registry.register(SENTIMENT_MODEL, lambda: _load_pipeline(SENTIMENT_MODEL))
+model_registry.register(SUMMARIZATION_MODEL, lambda: _load_pipeline(SUMMARIZATION_MODEL))
+model_registry.register(QA_MODEL, lambda: _load_pipeline(QA_MODEL))
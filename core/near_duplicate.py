@@ -0,0 +1,141 @@
+import itertools
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+_MASK = (1 << 64) - 1
+# Rough per-entry footprint: fingerprint, cluster id, LRU node and band bucket slots
+ENTRY_BYTES = 640
+
+
+def simhash(text: str, min_tokens: int = 5) -> int:
+    """
+    64-bit SimHash of the text's term frequencies; None for texts too short to compare.
+    Term hashes use Python's hash, which is stable within a process (the index is in-memory).
+    """
+    counts = Counter(_TOKEN.findall(text.lower()))
+    if sum(counts.values()) < min_tokens:
+        return None
+    hashes = np.fromiter((hash(term) & _MASK for term in counts), dtype=np.uint64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    # Bit i of every term hash votes +weight or -weight; the sign of each column is bit i
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = weights @ (bits.astype(np.float64) * 2 - 1)
+    return int(np.packbits(votes > 0, bitorder="little").view(np.uint64)[0])
+
+
+def _distance(left: int, right: int) -> int:
+    return bin(left ^ right).count("1")
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = 0.95, memory_budget: int = 64 * 1024 * 1024, min_tokens: int = 5):
+        """
+        Groups near-identical texts by SimHash with LSH banding.
+        The 64-bit fingerprint is cut into (max distance + 1) bands, so any two fingerprints
+        within the allowed Hamming distance share at least one band exactly and a lookup
+        only compares against the few entries in matching band buckets.
+        Args:
+            threshold (float): Minimum similarity (1 - Hamming distance / 64) to count as a duplicate.
+            memory_budget (int): Approximate bytes the index may hold; least recently matched
+                entries are evicted beyond it.
+            min_tokens (int): Texts with fewer tokens are never matched.
+        """
+        self.max_distance = int((1 - threshold) * 64)
+        if not 0 <= self.max_distance < 16:
+            raise ValueError("threshold must be between 0.75 and 1.0")
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.max_entries = max(memory_budget // ENTRY_BYTES, 1)
+
+        band_count = self.max_distance + 1
+        width = 64 // band_count
+        # (shift, mask) per band; the last band takes the leftover bits
+        self._bands: List[Tuple[int, int]] = [
+            (index * width, (1 << (width if index < band_count - 1 else 64 - index * width)) - 1)
+            for index in range(band_count)
+        ]
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in self._bands]
+        # entry id -> (fingerprint, cluster id), least recently matched first
+        self._entries: "OrderedDict[int, Tuple[int, str]]" = OrderedDict()
+        self._entry_ids = itertools.count()
+        self._cluster_ids = itertools.count(1)
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> shift) & mask for shift, mask in self._bands]
+
+    def find(self, fingerprint: int) -> Tuple[int, int]:
+        """
+        Return (entry id, distance) of the closest indexed fingerprint within the threshold, or None.
+        """
+        best = None
+        seen = set()
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            for entry_id in buckets.get(key, ()):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                distance = _distance(fingerprint, self._entries[entry_id][0])
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (entry_id, distance)
+                    if not distance:
+                        return best
+        return best
+
+    def _add(self, fingerprint: int, cluster_id: str):
+        entry_id = next(self._entry_ids)
+        self._entries[entry_id] = (fingerprint, cluster_id)
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            buckets.setdefault(key, []).append(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._evict()
+
+    def _evict(self):
+        entry_id, (fingerprint, _) = self._entries.popitem(last=False)
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            bucket = buckets[key]
+            bucket.remove(entry_id)
+            if not bucket:
+                del buckets[key]
+        self.stats["evictions"] += 1
+
+    def cluster(self, text: str) -> Dict:
+        """
+        Assign text to the cluster of an earlier near-duplicate, or start a new cluster.
+        Returns {"cluster_id", "duplicate", "similarity"}.
+        """
+        fingerprint = simhash(text, self.min_tokens)
+        if fingerprint is None:
+            self.stats["misses"] += 1
+            return {"cluster_id": f"cluster_{next(self._cluster_ids)}", "duplicate": False, "similarity": None}
+
+        match = self.find(fingerprint)
+        if match is not None:
+            entry_id, distance = match
+            self._entries.move_to_end(entry_id)
+            _, cluster_id = self._entries[entry_id]
+            if distance:
+                # Index the variant too, so a slowly drifting thread stays in its cluster
+                self._add(fingerprint, cluster_id)
+            self.stats["hits"] += 1
+            return {"cluster_id": cluster_id, "duplicate": True, "similarity": round(1 - distance / 64, 4)}
+
+        cluster_id = f"cluster_{next(self._cluster_ids)}"
+        self._add(fingerprint, cluster_id)
+        self.stats["misses"] += 1
+        return {"cluster_id": cluster_id, "duplicate": False, "similarity": None}
+
+    def report(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            **self.stats,
+        }
@@ -0,0 +1,257 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+from integrations.task_api import TaskAPI
+from integrations.task_index import parse_timestamp
+
+# Receives a batch of deliveries: {"task_id", "task", "reminder", "due", "late"}
+ReminderSink = Callable[[List[Dict]], Awaitable[None]]
+
+FINISHED_STATUSES = ("completed", "done", "cancelled")
+
+logger = logging.getLogger(__name__)
+
+
+async def print_sink(deliveries: List[Dict]):
+    """
+    Default sink: simulate sending the notifications.
+    """
+    for delivery in deliveries:
+        name = delivery["task"].get("name") or delivery["task"].get("title") or delivery["task_id"]
+        print(f"Reminder ({delivery['reminder'].get('type', 'reminder')}) for task '{name}' due {delivery['due']}.")
+
+
+class ReminderDispatcher:
+    def __init__(
+        self,
+        task_api: TaskAPI,
+        sink: ReminderSink = None,
+        batch_size: int = 500,
+        retry_delay: float = 30.0,
+        max_attempts: int = 5,
+        max_sleep: float = 60.0
+    ):
+        """
+        Fires TaskAPI reminders when they come due.
+        Pending reminders sit in one heap ordered by due time and a single background task
+        sleeps until the earliest one, so idle cost does not grow with the number of reminders.
+        Each reminder is claimed in the store before it is sent, so several dispatchers can
+        share a store without delivering a reminder twice.
+        Args:
+            task_api (TaskAPI): Store whose tasks and reminders are dispatched.
+            sink (ReminderSink): Async callable receiving batches of due reminders.
+            batch_size (int): Most reminders handed to the sink in one call.
+            retry_delay (float): Seconds before a failed batch is first retried; doubles with
+                each further attempt.
+            max_attempts (int): Deliveries attempted per reminder before it is dropped.
+            max_sleep (float): Longest single sleep, so wall-clock changes are noticed.
+        """
+        self.task_api = task_api
+        self.sink = sink or print_sink
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.max_sleep = max_sleep
+        # (due, seq, task_id, reminder, attempts, generation); seq keeps reminders from being compared
+        self._heap: List[Tuple] = []
+        self._seq = itertools.count()
+        # Cancelling a task bumps its generation; entries of an older generation are skipped
+        # when popped, so cancel() needn't rebuild the heap
+        self._generations: Dict[str, int] = {}
+        self._queued: Dict[str, int] = {}  # Live heap entries per task
+        self._stale = 0  # Heap entries of cancelled generations, not yet popped
+        self._wakeup: asyncio.Event = None
+        self._runner: asyncio.Task = None
+        self.stats = {"delivered": 0, "dropped": 0, "failed": 0, "late": 0, "claimed_elsewhere": 0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap) - self._stale
+
+    def _push(self, due: datetime, seq: int, task_id: str, reminder: Dict, attempts: int):
+        heapq.heappush(self._heap, (due, seq, task_id, reminder, attempts, self._generations.get(task_id, 0)))
+        self._queued[task_id] = self._queued.get(task_id, 0) + 1
+
+    def _pop(self) -> Tuple:
+        # Pops the earliest live entry, discarding cancelled ones on the way; None when empty
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            task_id = entry[2]
+            if entry[5] != self._generations.get(task_id, 0):
+                self._stale -= 1
+                continue
+            if self._queued[task_id] > 1:
+                self._queued[task_id] -= 1
+            else:
+                del self._queued[task_id]
+            return entry
+        return None
+
+    def _drop_stale(self):
+        # Lets the heap top be trusted for timing and reporting
+        while self._heap and self._heap[0][5] != self._generations.get(self._heap[0][2], 0):
+            heapq.heappop(self._heap)
+            self._stale -= 1
+
+    def schedule(self, task_id: str, reminder: Dict):
+        """
+        Queue a stored reminder; wakes the timer only if it is now the earliest one.
+        """
+        due = parse_timestamp(reminder.get("time"))
+        if due is None or reminder.get("delivered_at"):
+            return
+        self._push(due, next(self._seq), task_id, reminder, 0)
+        if self._wakeup is not None and self._heap[0][3] is reminder:
+            self._wakeup.set()
+
+    def cancel(self, task_id: str):
+        """
+        Drop every queued reminder of a task, e.g. when its reminders are re-planned.
+        """
+        queued = self._queued.pop(task_id, 0)
+        if queued:
+            self._generations[task_id] = self._generations.get(task_id, 0) + 1
+            self._stale += queued
+            if self._stale > len(self._heap) // 2:
+                # Mostly dead entries: compact once, amortized over the cancels that made them
+                self._heap = [entry for entry in self._heap if entry[5] == self._generations.get(entry[2], 0)]
+                heapq.heapify(self._heap)
+                self._stale = 0
+
+    async def _load_pending(self):
+        # Rebuild from the store, which also catches up on reminders that came due while stopped
+        self._heap = [
+            (due, next(self._seq), task_id, reminder, 0, 0)
+            for task_id, reminder in await self.task_api.get_pending_reminders()
+            for due in (parse_timestamp(reminder.get("time")),)
+            if due is not None
+        ]
+        heapq.heapify(self._heap)
+        self._generations, self._queued, self._stale = {}, {}, 0
+        for entry in self._heap:
+            self._queued[entry[2]] = self._queued.get(entry[2], 0) + 1
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        await self._load_pending()
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        self._wakeup = None
+
+    async def _live_tasks(self, batch: List[Tuple]) -> Dict[str, Dict]:
+        # The batch's tasks as they are now, fetched together; reminders whose task is gone or
+        # finished (or that were delivered meanwhile) should no longer fire
+        task_ids = list(dict.fromkeys(task_id for _, _, task_id, reminder, *_ in batch if not reminder.get("delivered_at")))
+        tasks = await self.task_api.get_tasks_by_id(task_ids) if task_ids else {}
+        return {
+            task_id: task for task_id, task in tasks.items()
+            if str(task.get("status", "")).lower() not in FINISHED_STATUSES
+        }
+
+    async def _run(self):
+        while True:
+            self._drop_stale()
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = (self._heap[0][0] - datetime.now()).total_seconds()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(delay, self.max_sleep))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._take_due()
+            try:
+                await self._dispatch(batch)
+            except Exception:
+                # A store error must not stop the runner and lose the popped reminders
+                logger.exception("Reminder dispatch failed; retrying %d reminders", len(batch))
+                self._retry(batch)
+
+    def _take_due(self) -> List[Tuple]:
+        now = datetime.now()
+        batch = []
+        while len(batch) < self.batch_size:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            batch.append(self._pop())
+        return batch
+
+    def _retry(self, batch: List[Tuple]):
+        self.stats["failed"] += len(batch)
+        now = datetime.now()
+        for due, seq, task_id, reminder, attempts, generation in batch:
+            if generation != self._generations.get(task_id, 0):
+                continue  # Cancelled while being dispatched
+            if attempts + 1 < self.max_attempts:
+                retry_at = now + timedelta(seconds=self.retry_delay * 2 ** attempts)
+                self._push(retry_at, seq, task_id, reminder, attempts + 1)
+            else:
+                self.stats["dropped"] += 1
+
+    async def _dispatch(self, batch: List[Tuple]):
+        tasks = await self._live_tasks(batch)
+        live = [entry for entry in batch if entry[2] in tasks and not entry[3].get("delivered_at")]
+        self.stats["dropped"] += len(batch) - len(live)
+        if not live:
+            return
+
+        # Claim before sending; reminders another dispatcher claimed first are skipped
+        claimed_at = datetime.now().isoformat()
+        claimed = await self.task_api.claim_reminders([(task_id, reminder) for _, _, task_id, reminder, *_ in live], claimed_at)
+        won = {id(reminder) for _, reminder in claimed}
+        self.stats["claimed_elsewhere"] += len(live) - len(won)
+        live = [entry for entry in live if id(entry[3]) in won]
+        if not live:
+            return
+
+        now = datetime.now()
+        deliveries = [
+            {
+                "task_id": task_id,
+                "task": tasks[task_id],
+                "reminder": reminder,
+                "due": due.isoformat(),
+                "late": (now - due) > timedelta(seconds=self.max_sleep),
+            }
+            for due, _, task_id, reminder, *_ in live
+        ]
+        try:
+            await self.sink(deliveries)
+        except Exception:
+            logger.exception("Reminder sink failed; retrying %d reminders", len(live))
+            await self.task_api.release_reminders(claimed, claimed_at)
+            self._retry(live)
+            return
+
+        self.stats["late"] += sum(delivery["late"] for delivery in deliveries)
+        self.stats["delivered"] += len(live)
+
+    def report(self) -> Dict:
+        self._drop_stale()
+        return {
+            "pending": self.pending,
+            "next_due": self._heap[0][0].isoformat() if self._heap else None,
+            "running": self._runner is not None,
+            **self.stats,
+        }
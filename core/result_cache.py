@@ -0,0 +1,201 @@
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict
+
+_MISSING = object()
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0, disk_path: str = None):
+        """
+        Content-addressed cache for model results.
+        Keys hash the operation, its parameters and the whitespace-normalized text.
+        Args:
+            max_entries (int): Maximum entries kept in memory (least recently used are evicted).
+            ttl (float): Seconds an entry stays valid, in memory and on disk (None for no expiry).
+            disk_path (str): Optional SQLite file used as a second tier that survives restarts.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        # The disk tier has its own lock so sqlite I/O never holds up memory lookups; it is
+        # opened on first use, which the async methods make in an executor thread
+        self._disk_path = disk_path
+        self._disk = None
+        self._disk_lock = threading.Lock()
+
+    def _open_disk(self) -> sqlite3.Connection:
+        # Called with _disk_lock held
+        if self._disk is None:
+            self._disk = sqlite3.connect(self._disk_path, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            # Drop entries that expired while the process was down
+            self._disk.execute("DELETE FROM result_cache WHERE expires_at < ?", (time.time(),))
+            self._disk.commit()
+        return self._disk
+
+    @staticmethod
+    def make_key(operation: str, text: str, **params) -> str:
+        normalized = " ".join(text.split())
+        digest = hashlib.sha256()
+        digest.update(operation.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        digest.update(b"\0")
+        digest.update(normalized.encode())
+        return digest.hexdigest()
+
+    def _expiry(self) -> float:
+        return time.time() + self.ttl if self.ttl is not None else None
+
+    def _get_memory(self, key: str, now: float):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+                self._stats["expirations"] += 1
+        return _MISSING
+
+    def _get_disk(self, key: str, now: float):
+        if not self._disk_path:
+            return _MISSING
+        with self._disk_lock:
+            row = self._open_disk().execute(
+                "SELECT value, expires_at FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return _MISSING
+        value = json.loads(row[0])
+        with self._lock:
+            self._store_memory(key, value, row[1])
+            self._stats["disk_hits"] += 1
+        return copy.deepcopy(value)
+
+    def _count_miss(self):
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def _set_memory(self, key: str, value, expires_at: float):
+        with self._lock:
+            self._store_memory(key, copy.deepcopy(value), expires_at)
+
+    def _set_disk(self, key: str, value, expires_at: float):
+        if not self._disk_path:
+            return
+        data = json.dumps(value)
+        with self._disk_lock:
+            disk = self._open_disk()
+            disk.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, expires_at)
+            )
+            disk.commit()
+
+    def get(self, operation: str, text: str, default=None, **params):
+        """
+        Return the cached result, or default on a miss.
+        """
+        key = self.make_key(operation, text, **params)
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is _MISSING:
+            value = self._get_disk(key, now)
+        if value is _MISSING:
+            self._count_miss()
+            return default
+        return value
+
+    def set(self, operation: str, text: str, value, **params):
+        """
+        Store a JSON-serializable result.
+        """
+        key = self.make_key(operation, text, **params)
+        expires_at = self._expiry()
+        self._set_memory(key, value, expires_at)
+        self._set_disk(key, value, expires_at)
+
+    def _store_memory(self, key: str, value, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_or_compute(self, operation: str, text: str, compute: Callable[[], object], **params):
+        value = self.get(operation, text, _MISSING, **params)
+        if value is _MISSING:
+            value = compute()
+            self.set(operation, text, value, **params)
+        return value
+
+    async def get_or_compute_async(
+        self, operation: str, text: str, compute: Callable[[], Awaitable], **params
+    ):
+        # Memory hits are answered inline; the sqlite tier runs in the default executor so
+        # disk reads and commits never block the event loop
+        loop = asyncio.get_running_loop()
+        key = self.make_key(operation, text, **params)
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is _MISSING and self._disk_path:
+            value = await loop.run_in_executor(None, self._get_disk, key, now)
+        if value is not _MISSING:
+            return value
+
+        self._count_miss()
+        value = await compute()
+        expires_at = self._expiry()
+        self._set_memory(key, value, expires_at)
+        if self._disk_path:
+            await loop.run_in_executor(None, self._set_disk, key, value, expires_at)
+        return value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._memory)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._disk_path:
+            with self._disk_lock:
+                disk = self._open_disk()
+                disk.execute("DELETE FROM result_cache")
+                disk.commit()
+
+    def close(self):
+        with self._disk_lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+
+# Shared cache used by AIEngine and EmailProcessor
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+    disk_path=os.getenv("RESULT_CACHE_PATH"),
+)
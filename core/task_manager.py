@@ -1,10 +1,25 @@
-from typing import Dict, List
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Union
 import datetime
+from core.batching import chunked
+from core.reminder_dispatcher import FINISHED_STATUSES, ReminderDispatcher, ReminderSink
 from integrations.task_api import TaskAPI
 
+# Fields a task update may change; the last three feed the priority and reminder plan
+UPDATABLE_FIELDS = ("name", "title", "description", "status", "deadline", "priority", "complexity")
+REPLANNING_FIELDS = ("deadline", "priority", "complexity")
+
+
+class InvalidTask(ValueError):
+    """
+    Task data with a field of the wrong type or an unusable value.
+    """
+
+
 class TaskManager:
-    def __init__(self):
+    def __init__(self, reminder_sink: ReminderSink = None):
         self.task_api = TaskAPI()
+        # Fires stored reminders when they come due; started with the app
+        self.reminder_dispatcher = ReminderDispatcher(self.task_api, sink=reminder_sink)
         self.priority_levels = {
             "high": 3,
             "medium": 2,
@@ -16,7 +31,7 @@ class TaskManager:
         Process and manage tasks
         """
         # Validate and enhance task data
-        enhanced_task = self._enhance_task_data(task_data)
+        enhanced_task = self._enhance_task_data(self._validated(task_data))
         
         # Determine priority and deadline
         priority = self._calculate_priority(enhanced_task)
@@ -35,27 +50,107 @@ class TaskManager:
             "reminders": reminders
         }
 
-    def _enhance_task_data(self, task_data: Dict) -> Dict:
+    async def import_tasks(
+        self,
+        rows: Union[Iterable[Dict], AsyncIterable[Dict]],
+        batch_size: int = 1000
+    ) -> AsyncIterator[Dict]:
+        """
+        Create tasks and their reminders from a stream of rows, one batch at a time, yielding
+        a result per row in input order. Rows that are invalid (or exceptions standing in for
+        rows that could not be parsed) get an error result and the import carries on.
+        Only one batch is held in memory.
+        """
+        index = 0
+        async for chunk in chunked(rows, batch_size):
+            # One clock reading per batch for defaults and priorities
+            now = datetime.datetime.now()
+            results = [None] * len(chunk)
+            prepared = []
+            for position, row in enumerate(chunk):
+                try:
+                    if isinstance(row, Exception):
+                        raise row
+                    if not isinstance(row, dict):
+                        raise ValueError("Row is not an object")
+                    task = self._enhance_task_data(self._validated(row), now)
+                    task["priority"] = self._calculate_priority(task, now)
+                    reminders = self._plan_reminders(task)
+                except (ValueError, TypeError, AttributeError) as error:
+                    results[position] = {"index": index + position, "status": "error", "error": str(error)}
+                    continue
+                prepared.append((position, task, reminders))
+
+            stored = await self.task_api.create_tasks([task for _, task, _ in prepared])
+            planned = [
+                (task["id"], reminder)
+                for task, (_, _, reminders) in zip(stored, prepared)
+                for reminder in reminders
+            ]
+            await self.task_api.create_reminders(planned)
+            for task_id, reminder in planned:
+                self.reminder_dispatcher.schedule(task_id, reminder)
+
+            for task, (position, _, reminders) in zip(stored, prepared):
+                results[position] = {
+                    "index": index + position,
+                    "status": "created",
+                    "task_id": task["id"],
+                    "priority": task["priority"],
+                    "reminders": len(reminders)
+                }
+            for result in results:
+                yield result
+            index += len(chunk)
+
+    def _validated(self, task_data: Dict, update: bool = False) -> Dict:
+        """
+        Check the fields the manager relies on and return a copy with the deadline as naive
+        local ISO time. Updates may only carry UPDATABLE_FIELDS.
+        """
+        if update:
+            unknown = sorted(set(task_data) - set(UPDATABLE_FIELDS))
+            if unknown:
+                raise InvalidTask(f"Unknown fields: {', '.join(unknown)}")
+        validated = dict(task_data)
+        for field in ("name", "title", "description", "status"):
+            if field in task_data and not isinstance(task_data[field], str):
+                raise InvalidTask(f"{field} must be a string")
+        for field in ("priority", "complexity"):
+            if field in task_data and (
+                not isinstance(task_data[field], str) or task_data[field].lower() not in self.priority_levels
+            ):
+                raise InvalidTask(f"{field} must be one of: {', '.join(self.priority_levels)}")
+        if "deadline" in task_data:
+            try:
+                deadline = datetime.datetime.fromisoformat(task_data["deadline"])
+            except (TypeError, ValueError):
+                raise InvalidTask("deadline must be an ISO 8601 date-time")
+            if deadline.tzinfo is not None:
+                deadline = deadline.astimezone().replace(tzinfo=None)
+            validated["deadline"] = deadline.isoformat()
+        return validated
+
+    def _enhance_task_data(self, task_data: Dict, now: datetime.datetime = None) -> Dict:
         """
         Enhance task data with additional information and validations
         """
         enhanced_task = task_data.copy()
+        now = now or datetime.datetime.now()
 
         # Add default deadline if not provided
         if "deadline" not in enhanced_task:
-            enhanced_task["deadline"] = (
-                datetime.datetime.now() + datetime.timedelta(days=7)
-            ).isoformat()
+            enhanced_task["deadline"] = (now + datetime.timedelta(days=7)).isoformat()
 
         # Add default status if not provided
         enhanced_task["status"] = enhanced_task.get("status", "pending")
 
         # Add creation timestamp
-        enhanced_task["created_at"] = datetime.datetime.now().isoformat()
+        enhanced_task["created_at"] = now.isoformat()
 
         return enhanced_task
 
-    def _calculate_priority(self, task_data: Dict) -> int:
+    def _calculate_priority(self, task_data: Dict, now: datetime.datetime = None) -> int:
         """
         Calculate task priority based on various factors
         """
@@ -63,7 +158,7 @@ class TaskManager:
 
         # Consider deadline
         deadline = datetime.datetime.fromisoformat(task_data["deadline"])
-        days_until_deadline = (deadline - datetime.datetime.now()).days
+        days_until_deadline = (deadline - (now or datetime.datetime.now())).days
 
         if days_until_deadline <= 1:
             priority_score += 3
@@ -95,6 +190,19 @@ class TaskManager:
         """
         Set up automated reminders for the task
         """
+        reminders = self._plan_reminders(task)
+
+        # Store reminders in the system
+        await self.task_api.create_reminders([(task["id"], reminder) for reminder in reminders])
+        for reminder in reminders:
+            self.reminder_dispatcher.schedule(task["id"], reminder)
+
+        return reminders
+
+    def _plan_reminders(self, task: Dict) -> List[Dict]:
+        """
+        Reminders for the task based on its deadline and priority
+        """
         deadline = datetime.datetime.fromisoformat(task["deadline"])
         reminders = []
 
@@ -115,23 +223,45 @@ class TaskManager:
                 {"time": deadline - datetime.timedelta(days=1), "type": "24h_reminder"}
             )
 
-        # Store reminders in the system
-        for reminder in reminders:
-            await self.task_api.create_reminder(task["id"], reminder)
-
         return reminders
 
-    async def get_tasks(self, filters: Dict = None) -> List[Dict]:
+    async def get_tasks(self, filters: Dict = None, **options) -> List[Dict]:
         """
-        Get tasks based on filters
+        Get tasks based on filters (options: sort_by, descending, limit, cursor)
         """
-        return await self.task_api.get_tasks(filters)
+        return await self.task_api.get_tasks(filters, **options)
+
+    async def get_tasks_page(self, filters: Dict = None, **options) -> Dict:
+        """
+        Get one page of tasks and the cursor for the next one
+        """
+        return await self.task_api.get_tasks_page(filters, **options)
 
     async def update_task(self, task_id: str, updates: Dict) -> Dict:
         """
-        Update task details
+        Update task details (UPDATABLE_FIELDS). A new deadline, priority or complexity
+        recomputes the priority and replaces the task's pending reminders.
+        Raises InvalidTask for bad updates and ValueError when the task doesn't exist.
         """
-        return await self.task_api.update_task(task_id, updates)
+        updates = self._validated(updates, update=True)
+        if not any(field in updates for field in REPLANNING_FIELDS):
+            return await self.task_api.update_task(task_id, updates)
+
+        task = await self.task_api.get_task(task_id)
+        if task is None:
+            raise ValueError("Task not found")
+        planned = {**task, **updates}
+        if "priority" not in updates:
+            # The stored priority is the computed score, not a level the calculation accepts
+            planned.pop("priority", None)
+        updates["priority"] = self._calculate_priority(planned)
+        stored = await self.task_api.update_task(task_id, updates)
+
+        await self.task_api.delete_pending_reminders(task_id)
+        self.reminder_dispatcher.cancel(task_id)
+        if str(stored.get("status", "")).lower() not in FINISHED_STATUSES:
+            await self._setup_reminders(stored)
+        return stored
 
     async def delete_task(self, task_id: str) -> bool:
         """
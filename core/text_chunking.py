@@ -0,0 +1,56 @@
+import re
+from typing import Callable, List
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n{2,}")
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Cheap token count estimate (words are ~1.3 subword tokens on average).
+    """
+    return int(len(text.split()) * 1.3) + 1
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences on terminal punctuation and paragraph breaks.
+    """
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence and sentence.strip()]
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int,
+    count_tokens: Callable[[str], int] = approximate_tokens
+) -> List[str]:
+    """
+    Pack whole sentences into chunks of at most max_tokens tokens.
+    Sentences longer than max_tokens on their own are split on word boundaries.
+    """
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+
+        if tokens > max_tokens:
+            # Flush what we have, then cut the oversized sentence into word windows
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            words = sentence.split()
+            step = max(int(len(words) * max_tokens / tokens), 1)
+            for start in range(0, len(words), step):
+                chunks.append(" ".join(words[start:start + step]))
+            continue
+
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -1,13 +1,41 @@
-from typing import Dict, List
+import asyncio
+import itertools
+from typing import BinaryIO, Dict, List, Union
 from datetime import datetime, timedelta
+from urllib.parse import quote
+from integrations.http_client import BackendError, get_client
+from integrations.ics import iter_ics_events, write_ics
+from integrations.interval_index import IntervalIndex, to_datetime
+from integrations.storage import CollectionMirror, StorageBackend, get_storage, run_storage
+from integrations.task_index import decode_cursor, encode_cursor
 
 class CalendarAPI:
-    def __init__(self, api_key: str = None, client_id: str = None, client_secret: str = None):
-        self.calendars = {}  # Simulate in-memory storage for calendars
+    def __init__(
+        self,
+        api_key: str = None,
+        client_id: str = None,
+        client_secret: str = None,
+        storage: StorageBackend = None,
+        api_url: str = None
+    ):
+        self.calendars = {}  # Simulate in-memory storage for calendars: user -> {event id: event}
+        self.indexes = {}  # Per-user events sorted by start time, for overlap queries
+        self.events = {}  # Event id -> event, shared by all participants' calendars
+        self._event_ids = itertools.count(1)
+        # Optional durable store; STORAGE_URL configures the default. When set it is the source
+        # of truth and worker processes can share it; the calendars and interval indexes then act
+        # as a write-through cache, brought up to date from the backend's change log before reads
+        self.storage = storage if storage is not None else get_storage()
+        self._mirror = None
+        if self.storage is not None:
+            self._mirror = CollectionMirror(self.storage, "events", self._apply, self._clear)
         self.api_key = api_key
         self.client_id = client_id
         self.client_secret = client_secret
+        self.api_url = api_url or "https://api.calendar-service.example.com"
+        self.headers = {"Authorization": f"Bearer {self.api_key}"} if api_key else {}
         self.service = None
+        self.client = None
         
         # Initialize real calendar service if credentials are provided
         if api_key or (client_id and client_secret):
@@ -24,45 +52,229 @@ class CalendarAPI:
         # 
         # credentials = Credentials(self.api_key)
         # self.service = build('calendar', 'v3', credentials=credentials)
-        pass
+        if self.api_key:
+            # Real-API calls share one pooled client per backend (see integrations.http_client)
+            self.client = get_client(self.api_url, self.headers)
         
+    async def _persist(self, events: List[Dict]):
+        if self.storage is not None and events:
+            await run_storage(self.storage, "put_many", "events", [(event["id"], event) for event in events])
+
+    async def _forget(self, event_ids: List[str]):
+        if self.storage is not None and event_ids:
+            await run_storage(self.storage, "delete_many", "events", event_ids)
+
+    async def _allocate(self, count: int) -> List[int]:
+        # IDs come from a monotonic counter, so they stay unique after deletes; with storage
+        # the counter lives in the backend so other processes never reuse them
+        if self.storage is not None:
+            first = await run_storage(self.storage, "allocate_ids", "events", count)
+            return list(range(first, first + count))
+        return [next(self._event_ids) for _ in range(count)]
+
     async def get_calendar(self, user_email: str) -> List[Dict]:
         """
         Fetch the calendar events for a specific user.
         """
+        if self.client is not None:
+            # Concurrent fetches of the same calendar share one request
+            return await self.client.get(f"/calendars/{quote(user_email)}/events")
+        if self._mirror is not None:
+            await self._mirror.sync()
         # Return the user's calendar; create an empty calendar if it doesn't exist
         if user_email not in self.calendars:
-            self.calendars[user_email] = []
-        return self.calendars[user_email]
+            self.calendars[user_email] = {}
+        return list(self.calendars[user_email].values())
+
+    def _index_for(self, user_email: str) -> IntervalIndex:
+        if user_email not in self.indexes:
+            self.indexes[user_email] = IntervalIndex()
+        return self.indexes[user_email]
+
+    async def get_calendar_index(self, user_email: str) -> IntervalIndex:
+        """
+        Fetch a user's events as an interval index for fast availability checks.
+        """
+        if self.client is not None:
+            index = IntervalIndex()
+            for event in await self.get_calendar(user_email):
+                index.add(event["id"], event["start"], event["end"], event)
+            return index
+        if self._mirror is not None:
+            await self._mirror.sync()
+        return self._index_for(user_email)
+
+    async def get_calendar_page(
+        self,
+        user_email: str,
+        start: datetime = None,
+        end: datetime = None,
+        limit: int = 100,
+        cursor: str = None
+    ) -> Dict:
+        """
+        Get one page of a user's events starting in [start, end), in start order,
+        plus the cursor for the next page (None on the last page).
+        """
+        after = None
+        if cursor:
+            position = decode_cursor(cursor)
+            if not isinstance(position, dict) or not isinstance(position.get("id"), str) or "start" not in position:
+                raise ValueError("Invalid cursor")
+            # Resume strictly after the last event sent, even if it has since been deleted
+            after = (to_datetime(position["start"]), position["id"])
+        index = await self.get_calendar_index(user_email)
+        # One extra tells whether another page exists
+        events = list(itertools.islice(index.scan(start, end, after), limit + 1))
+        next_cursor = None
+        if len(events) > limit:
+            events = events[:limit]
+            last = events[-1]
+            next_cursor = encode_cursor({"start": to_datetime(last["start"]).isoformat(), "id": last["id"]})
+        return {"events": events, "next_cursor": next_cursor}
+
+    async def get_event(self, event_id: str) -> Dict:
+        """
+        Fetch a single event by ID.
+        """
+        if self.client is not None:
+            try:
+                return await self.client.get(f"/events/{quote(event_id)}")
+            except BackendError as error:
+                if error.status == 404:
+                    return None
+                raise
+        if self.storage is not None:
+            return await run_storage(self.storage, "get", "events", event_id)
+        return self.events.get(event_id)
 
     async def create_event(self, event_data: Dict) -> Dict:
         """
         Create a new event in the calendar.
         """
-        participants = event_data.get("participants", [])
-        
-        # Generate a unique event ID based on total events across all calendars
-        total_events = sum(len(calendar) for calendar in self.calendars.values())
-        event_id = f"event_{total_events + 1}"
+        if self.client is not None:
+            # Only the server-assigned id is taken; the echoed times would come back as strings
+            event_data["id"] = (await self.client.post("/events", event_data))["id"]
+            return event_data
+        return (await self.create_events([event_data]))[0]
+
+    def _add_event(self, event_data: Dict, number: int) -> Dict:
+        event_id = f"event_{number}"
         event_data["id"] = event_id
 
-        # Add the event to each participant's calendar
-        for participant in participants:
-            if participant not in self.calendars:
-                self.calendars[participant] = []
-            self.calendars[participant].append({
-                "id": event_id,
-                "title": event_data["title"],
-                "description": event_data.get("description", ""),  # Handle missing description
-                "start": event_data["start_time"],
-                "end": event_data["end_time"]
-            })
-        return event_data
+        # One shared record per event; every participant's calendar points at it
+        event = {
+            "id": event_id,
+            "title": event_data["title"],
+            "description": event_data.get("description", ""),  # Handle missing description
+            "start": event_data["start_time"],
+            "end": event_data["end_time"],
+            "participants": list(dict.fromkeys(event_data.get("participants", [])))
+        }
+        if event_data.get("uid"):
+            event["uid"] = event_data["uid"]  # External (iCalendar) identifier
+        return event
+
+    async def create_events(self, events: List[Dict]) -> List[Dict]:
+        """
+        Create many events at once.
+        """
+        if self.client is not None:
+            # The client's pool bounds how many of these are in flight at once
+            return list(await asyncio.gather(*(self.create_event(event_data) for event_data in events)))
+        numbers = await self._allocate(len(events))
+        records = [self._add_event(event_data, number) for event_data, number in zip(events, numbers)]
+        # One batched storage write for the whole set, before the calendars show the events
+        await self._persist(records)
+        for event in records:
+            self._apply(event["id"], event)
+        return events
+
+    async def import_ics(
+        self,
+        source: Union[str, BinaryIO],
+        user_email: str = None,
+        window_start: datetime = None,
+        window_end: datetime = None,
+        use_mmap: bool = False,
+        batch_size: int = 10000
+    ) -> int:
+        """
+        Stream events from an iCalendar file into the calendars; returns the number imported.
+        One-off events are all imported. Recurring events are expanded only between
+        window_start and window_end (now to 90 days ahead by default).
+        Events go to their organizer and attendees, plus user_email when given.
+        """
+        window_start = window_start or datetime.now()
+        window_end = window_end or window_start + timedelta(days=90)
+
+        imported = 0
+        batch = []
+        for event_data in iter_ics_events(source, window_start, window_end, use_mmap):
+            if user_email and user_email not in event_data["participants"]:
+                event_data["participants"].append(user_email)
+            if not event_data["participants"]:
+                continue
+            batch.append(event_data)
+            if len(batch) >= batch_size:
+                imported += len(await self.create_events(batch))
+                batch = []
+        if batch:
+            imported += len(await self.create_events(batch))
+        return imported
+
+    async def export_ics(self, user_email: str, target: BinaryIO) -> int:
+        """
+        Stream a user's calendar, in start order, into an iCalendar file; returns the event count.
+        """
+        return write_ics(iter(await self.get_calendar_index(user_email)), target)
+
+    async def _remote_delete(self, path: str) -> bool:
+        try:
+            await self.client.delete(path)
+            return True
+        except BackendError as error:
+            if error.status == 404:
+                return False
+            raise
+
+    def _attach(self, participant: str, event: Dict):
+        if participant not in self.calendars:
+            self.calendars[participant] = {}
+        self.calendars[participant][event["id"]] = event
+        self._index_for(participant).add(event["id"], event["start"], event["end"], event)
+
+    def _detach(self, participant: str, event_id: str) -> bool:
+        calendar = self.calendars.get(participant)
+        if not calendar or calendar.pop(event_id, None) is None:
+            return False
+        self._index_for(participant).remove(event_id)
+        return True
+
+    def _apply(self, event_id: str, event: Dict):
+        # Put a stored version of an event (None once deleted) on its participants' calendars
+        old = self.events.pop(event_id, None)
+        for participant in old["participants"] if old is not None else ():
+            if event is None or participant not in event["participants"]:
+                self._detach(participant, event_id)
+        if event is not None:
+            self.events[event_id] = event
+            # Add the event to each participant's calendar
+            for participant in event["participants"]:
+                self._attach(participant, event)
+
+    def _clear(self):
+        self.calendars.clear()
+        self.indexes.clear()
+        self.events.clear()
 
     async def send_invitation(self, participant_email: str, event_data: Dict):
         """
         Simulate sending a meeting invitation to a participant.
         """
+        if self.client is not None:
+            await self.client.post(f"/events/{quote(event_data['id'])}/invitations", {"participant": participant_email})
+            return
         # Simulate sending an invitation (print/log for demonstration purposes)
         print(f"Invitation sent to {participant_email} for event '{event_data['title']}' on {event_data['start_time']}.")
 
@@ -70,15 +282,92 @@ class CalendarAPI:
         """
         Delete an event from a user's calendar.
         """
-        if user_email not in self.calendars:
+        if self.client is not None:
+            return await self._remote_delete(f"/calendars/{quote(user_email)}/events/{quote(event_id)}")
+        event = await self.get_event(event_id)
+        if event is None or user_email not in event["participants"]:
             return False
 
-        user_calendar = self.calendars[user_email]
-        for event in user_calendar:
-            if event["id"] == event_id:
-                user_calendar.remove(event)
-                return True
-        return False
+        event = dict(event, participants=[participant for participant in event["participants"] if participant != user_email])
+        # Drop the event entirely once nobody has it on their calendar
+        if not event["participants"]:
+            await self._forget([event_id])
+            self._apply(event_id, None)
+        else:
+            await self._persist([event])
+            self._apply(event_id, event)
+        return True
+
+    async def cancel_event(self, event_id: str) -> bool:
+        """
+        Delete an event from every participant's calendar.
+        """
+        if self.client is not None:
+            return await self._remote_delete(f"/events/{quote(event_id)}")
+        return await self.delete_events([event_id]) == 1
+
+    def _remove_event(self, event_id: str) -> bool:
+        event = self.events.pop(event_id, None)
+        if event is None:
+            return False
+        for participant in event["participants"]:
+            self._detach(participant, event_id)
+        return True
+
+    async def delete_events(self, event_ids: List[str]) -> int:
+        """
+        Delete many events from every participant's calendar; returns how many existed.
+        """
+        if self.client is not None:
+            return sum(await asyncio.gather(*(self.cancel_event(event_id) for event_id in event_ids)))
+        if self.storage is not None:
+            removed = list(await run_storage(self.storage, "get_many", "events", event_ids))
+            await self._forget(removed)
+            for event_id in removed:
+                self._apply(event_id, None)
+            return len(removed)
+        return sum(self._remove_event(event_id) for event_id in event_ids)
+
+    async def update_event(self, event_id: str, updates: Dict) -> Dict:
+        """
+        Update an event for all of its participants.
+        Accepts title, description, start_time, end_time and participants.
+        """
+        if self.client is not None:
+            try:
+                return await self.client.patch(f"/events/{quote(event_id)}", updates)
+            except BackendError as error:
+                if error.status == 404:
+                    raise ValueError("Event not found")
+                raise
+        event = await self.get_event(event_id)
+        if event is None:
+            raise ValueError("Event not found")
+
+        if "title" in updates:
+            event["title"] = updates["title"]
+        if "description" in updates:
+            event["description"] = updates["description"]
+
+        old_participants = list(event["participants"])
+        if "participants" in updates:
+            event["participants"] = list(dict.fromkeys(updates["participants"]))
+
+        rescheduled = "start_time" in updates or "end_time" in updates
+        event["start"] = updates.get("start_time", event["start"])
+        event["end"] = updates.get("end_time", event["end"])
+
+        if self.storage is not None:
+            await self._persist([event])
+            self._apply(event_id, event)
+            return event
+        for participant in old_participants:
+            if participant not in event["participants"]:
+                self._detach(participant, event_id)
+        for participant in event["participants"]:
+            if rescheduled or participant not in old_participants:
+                self._attach(participant, event)
+        return event
 
     async def get_available_time_slots(
         self, user_email: str, start_time: datetime, end_time: datetime, duration: int
@@ -86,30 +375,21 @@ class CalendarAPI:
         """
         Find available time slots for a user between start_time and end_time.
         """
-        if user_email not in self.calendars:
-            self.calendars[user_email] = []
-
-        # Get the user's calendar and sort by start time
-        user_calendar = sorted(self.calendars[user_email], key=lambda x: x.get("start") or x.get("start_time"))
+        slot = timedelta(minutes=duration)
         available_slots = []
         current_time = start_time
 
-        while current_time + timedelta(minutes=duration) <= end_time:
-            # Check if current_time overlaps with any existing event
-            overlap = False
-            for event in user_calendar:
-                event_start = datetime.fromisoformat(event["start"])
-                event_end = datetime.fromisoformat(event["end"])
-                if current_time < event_end and current_time + timedelta(minutes=duration) > event_start:
-                    overlap = True
-                    current_time = event_end  # Move to the end of the overlapping event
-                    break
-            
-            if not overlap:
+        # Busy intervals come from the index already sorted and parsed; fill each gap between them
+        index = await self.get_calendar_index(user_email)
+        for event_start, event_end in index.busy_intervals(start_time, end_time):
+            while current_time + slot <= min(event_start, end_time):
                 available_slots.append(current_time)
-                current_time += timedelta(minutes=duration)
-            else:
-                current_time += timedelta(minutes=15)  # Increment to avoid infinite loops
+                current_time += slot
+            current_time = max(current_time, event_end)  # Move to the end of the overlapping event
+
+        while current_time + slot <= end_time:
+            available_slots.append(current_time)
+            current_time += slot
 
         return available_slots
 
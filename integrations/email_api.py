@@ -1,55 +1,215 @@
-from typing import Dict, List
+import itertools
+from typing import Dict, List, Set
+from integrations.http_client import get_client
+from integrations.storage import CollectionMirror, StorageBackend, get_storage, run_storage
+from integrations.text_index import InvertedIndex
+
+# Inbox fields with maintained value -> email id indexes
+INDEXED_FIELDS = ("sender", "category")
+SUBJECT_WEIGHT = 2.0  # A subject term counts as much as two body terms in search
 
 class EmailAPI:
-    def __init__(self, api_key: str = None, api_url: str = None):
-        self.inbox = []  # Simulate an inbox
+    def __init__(self, api_key: str = None, api_url: str = None, storage: StorageBackend = None):
+        self.inbox = {}  # Simulate an inbox: email id -> email, in arrival order
         self.sent_emails = []  # Simulate a sent folder
+        self.field_indexes = {field: {} for field in INDEXED_FIELDS}  # field -> value -> email ids
+        self.text_index = InvertedIndex()  # Subject and content, for search
+        self._email_ids = itertools.count(1)
+        self._arrival = {}  # email id -> arrival sequence, to order indexed subsets
+        self._arrivals = itertools.count()
+        # Optional durable store; STORAGE_URL configures the default. When set it is the source
+        # of truth and worker processes can share it; the inbox and its indexes then act as a
+        # write-through cache, brought up to date from the backend's change log before reads
+        self.storage = storage if storage is not None else get_storage()
+        self._mirror = None
+        if self.storage is not None:
+            self._mirror = CollectionMirror(self.storage, "emails", self._apply, self._clear)
         self.api_key = api_key  # Store API key for real service
         self.api_url = api_url or "https://api.email-service.example.com"
         self.headers = {"Authorization": f"Bearer {self.api_key}"} if api_key else {}
+        # Real-API calls share one pooled client per backend (see integrations.http_client)
+        self.client = get_client(self.api_url, self.headers) if api_key else None
         
+    async def _persist(self, collection: str, emails: List[Dict]):
+        if self.storage is not None and emails:
+            await run_storage(self.storage, "put_many", collection, [(email["id"], email) for email in emails])
+
+    async def _allocate(self, collection: str, count: int) -> List[int]:
+        # With storage the counter lives in the backend so other processes never reuse an id
+        if self.storage is not None:
+            first = await run_storage(self.storage, "allocate_ids", collection, count)
+            return list(range(first, first + count))
+        if collection == "sent_emails":
+            return list(range(len(self.sent_emails) + 1, len(self.sent_emails) + count + 1))
+        return [next(self._email_ids) for _ in range(count)]
+
+    def _index(self, email: Dict):
+        # A stored email already in the inbox is re-indexed in place, keeping its arrival order
+        if email["id"] in self.inbox:
+            self._unindex(email["id"])
+        else:
+            self._arrival[email["id"]] = next(self._arrivals)
+        self.inbox[email["id"]] = email
+        for field in INDEXED_FIELDS:
+            if email.get(field) is not None:
+                self.field_indexes[field].setdefault(email[field], set()).add(email["id"])
+        self.text_index.add(
+            email["id"], ((email.get("subject", ""), SUBJECT_WEIGHT), (email.get("content", ""), 1.0))
+        )
+
+    def _unindex_field(self, email: Dict, field: str):
+        ids = self.field_indexes[field].get(email.get(field))
+        if ids is not None:
+            ids.discard(email["id"])
+            if not ids:
+                del self.field_indexes[field][email[field]]
+
+    async def add_email(self, email: Dict) -> Dict:
+        """
+        Receive an email into the inbox
+        """
+        return (await self.add_emails([email]))[0]
+
+    async def add_emails(self, emails: List[Dict]) -> List[Dict]:
+        """
+        Receive many emails into the inbox, with one storage write
+        """
+        unnamed = [email for email in emails if not email.get("id")]
+        for number, email in zip(await self._allocate("emails", len(unnamed)), unnamed):
+            email["id"] = f"inbox_{number}"
+        await self._persist("emails", emails)
+        for email in emails:
+            if email["id"] in self.inbox:
+                self._remove(email["id"])
+            self._index(email)
+        return emails
+
+    receive_email = add_email
+
+    async def get_email(self, email_id: str) -> Dict:
+        """
+        Fetch a single inbox email by ID
+        """
+        if self.storage is not None:
+            return await run_storage(self.storage, "get", "emails", email_id)
+        return self.inbox.get(email_id)
+
+    def _candidates(self, filters: Dict) -> Set[str]:
+        # Intersect the indexed fields' id sets, smallest first; None means no indexed filter
+        candidates = None
+        for ids in sorted(
+            (self.field_indexes[field].get(value, set()) for field, value in filters.items() if field in INDEXED_FIELDS),
+            key=len
+        ):
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                break
+        return candidates
+
     async def get_inbox(self, filters: Dict = None) -> List[Dict]:
         """
         Fetch emails from the inbox
         """
+        if self._mirror is not None:
+            await self._mirror.sync()
         if not filters:
-            return self.inbox
+            return list(self.inbox.values())
 
-        filtered_emails = []
-        for email in self.inbox:
-            match = all(email.get(key) == value for key, value in filters.items())
-            if match:
-                filtered_emails.append(email)
-        return filtered_emails
+        candidates = self._candidates(filters)
+        if candidates is None:
+            emails = self.inbox.values()
+        elif len(candidates) * 8 >= len(self.inbox):
+            emails = (email for email_id, email in self.inbox.items() if email_id in candidates)
+        else:
+            # Only the indexed subset is touched, put back in arrival order
+            emails = (self.inbox[email_id] for email_id in sorted(candidates, key=self._arrival.__getitem__))
+        return [email for email in emails if all(email.get(key) == value for key, value in filters.items())]
+
+    async def search(self, query: str, limit: int = 10, filters: Dict = None) -> List[Dict]:
+        """
+        Full-text search over subject and content, ranked by BM25.
+        Returns up to limit {"email", "score"} results, best first; filters narrow the
+        results as in get_inbox.
+        """
+        if self._mirror is not None:
+            # Emails received by other processes are indexed before ranking
+            await self._mirror.sync()
+        candidates = None
+        if filters:
+            candidates = {email["id"] for email in await self.get_inbox(filters)}
+            if not candidates:
+                return []
+        return [
+            {"email": self.inbox[email_id], "score": round(score, 4)}
+            for email_id, score in self.text_index.search(query, limit, candidates)
+        ]
 
     async def send_email(self, email_data: Dict) -> Dict:
         """
         Send an email
         """
-        email_id = f"email_{len(self.sent_emails) + 1}"
-        email_data["id"] = email_id
-        self.sent_emails.append(email_data)
+        if self.client is not None:
+            email_data["id"] = (await self.client.post("/emails", email_data))["id"]
+            return email_data
+        email_data["id"] = f"email_{(await self._allocate('sent_emails', 1))[0]}"
+        if self.storage is None:
+            self.sent_emails.append(email_data)
+        await self._persist("sent_emails", [email_data])
         return email_data
 
+    def _unindex(self, email_id: str):
+        for field in INDEXED_FIELDS:
+            self._unindex_field(self.inbox[email_id], field)
+        self.text_index.remove(email_id)
+
+    def _remove(self, email_id: str) -> Dict:
+        if email_id not in self.inbox:
+            return None
+        self._unindex(email_id)
+        del self._arrival[email_id]
+        return self.inbox.pop(email_id)
+
+    def _apply(self, email_id: str, email: Dict):
+        # Put a stored version of an email (None once deleted) into the local inbox and indexes
+        if email is None:
+            self._remove(email_id)
+        else:
+            self._index(email)
+
+    def _clear(self):
+        self.inbox.clear()
+        self._arrival.clear()
+        self.field_indexes = {field: {} for field in INDEXED_FIELDS}
+        self.text_index = InvertedIndex()
+
     async def delete_email(self, email_id: str) -> bool:
         """
         Delete an email from the inbox
         """
-        for email in self.inbox:
-            if email.get("id") == email_id:
-                self.inbox.remove(email)
-                return True
-        return False
+        if self.storage is not None:
+            if await self.get_email(email_id) is None:
+                return False
+            await run_storage(self.storage, "delete_many", "emails", [email_id])
+            self._remove(email_id)
+            return True
+        return self._remove(email_id) is not None
 
     async def categorize_email(self, email_id: str, category: str) -> bool:
         """
         Categorize an email
         """
-        for email in self.inbox:
-            if email.get("id") == email_id:
-                email["category"] = category
-                return True
-        return False
+        email = await self.get_email(email_id)
+        if email is None:
+            return False
+        if self.storage is not None:
+            email["category"] = category
+            await self._persist("emails", [email])
+            self._index(email)
+            return True
+        self._unindex_field(email, "category")
+        self.field_indexes["category"].setdefault(category, set()).add(email_id)
+        email["category"] = category
+        return True
 
 # from typing import Dict, List
 
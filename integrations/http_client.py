@@ -0,0 +1,241 @@
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import date, datetime
+from typing import Dict, Tuple
+
+import aiohttp
+
+# Statuses worth retrying: throttling and transient upstream failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses where the backend rejected the request before acting on it, so even POST is safe to retry
+REJECTED_STATUSES = {429, 503}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+
+class BackendError(RuntimeError):
+    def __init__(self, method: str, url: str, status: int, body: str = ""):
+        super().__init__(f"{method} {url} failed with HTTP {status}: {body[:200]}")
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def dumps(value) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Allow rate requests per second on average, with bursts of up to capacity.
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BackendClient:
+    def __init__(
+        self,
+        base_url: str,
+        headers: Dict = None,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        rate: float = None,
+        burst: float = None,
+        retries: int = 3,
+        backoff: float = 0.2,
+        max_backoff: float = 5.0,
+        timeout: float = 10.0,
+        keepalive_timeout: float = 30.0
+    ):
+        """
+        Long-lived HTTP client for one backend.
+        One aiohttp session (and so one keep-alive connection pool) is reused for every call,
+        so requests don't pay a new TCP/TLS handshake. Identical in-flight GETs are coalesced
+        into one request.
+        Args:
+            base_url (str): Prefix for every request path.
+            headers (Dict): Sent with every request (e.g. Authorization).
+            limit (int): Connections in the pool overall.
+            limit_per_host (int): Concurrent connections per host.
+            rate (float): Requests per second allowed by the token bucket (None: unlimited).
+            burst (float): Token bucket capacity (defaults to one second's worth).
+            retries (int): Retries after the first attempt for transient failures.
+            backoff (float): Base delay in seconds for exponential backoff with full jitter.
+            max_backoff (float): Cap on a single backoff delay.
+            timeout (float): Total seconds allowed per attempt.
+            keepalive_timeout (float): Seconds an idle pooled connection is kept open.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.headers = dict(headers or {})
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session: aiohttp.ClientSession = None
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.stats = {"requests": 0, "retries": 0, "coalesced": 0, "failures": 0}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                json_serialize=dumps
+            )
+        return self._session
+
+    def _delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def request(self, method: str, path: str, params: Dict = None, json_body=None):
+        """
+        Send a request and return the decoded JSON body (None for empty responses).
+        GETs with the same path and params that are already in flight share one response,
+        which callers should treat as read-only.
+        """
+        method = method.upper()
+        if method != "GET":
+            return await self._send(method, path, params, json_body)
+
+        key = (path, tuple(sorted((params or {}).items())))
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._send(method, path, params, None)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _send(self, method: str, path: str, params: Dict, json_body):
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        session = self._get_session()
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                await self.bucket.acquire()
+            self.stats["requests"] += 1
+            retry_after = None
+            try:
+                async with session.request(method, url, params=params, json=json_body) as response:
+                    if response.status < 400:
+                        if response.status == 204 or response.content_length == 0:
+                            return None
+                        return await response.json(content_type=None)
+                    body = await response.text()
+                    retryable = response.status in (
+                        RETRY_STATUSES if method in IDEMPOTENT_METHODS else REJECTED_STATUSES
+                    )
+                    if not retryable or attempt >= self.retries:
+                        self.stats["failures"] += 1
+                        raise BackendError(method, url, response.status, body)
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                # A request that may have reached the backend is only resent when idempotent
+                if method not in IDEMPOTENT_METHODS or attempt >= self.retries:
+                    self.stats["failures"] += 1
+                    raise
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(self._delay(attempt, retry_after))
+
+    async def get(self, path: str, params: Dict = None):
+        return await self.request("GET", path, params=params)
+
+    async def post(self, path: str, json_body=None, params: Dict = None):
+        return await self.request("POST", path, params=params, json_body=json_body)
+
+    async def patch(self, path: str, json_body=None):
+        return await self.request("PATCH", path, json_body=json_body)
+
+    async def delete(self, path: str):
+        return await self.request("DELETE", path)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_clients: Dict[Tuple[str, str], BackendClient] = {}
+
+
+def get_client(base_url: str, headers: Dict = None, **options) -> BackendClient:
+    """
+    Shared client per (base URL, credentials), so every API object talking to the same
+    backend reuses one connection pool. Defaults come from HTTP_POOL_LIMIT,
+    HTTP_LIMIT_PER_HOST, HTTP_RATE_LIMIT and HTTP_RETRIES.
+    """
+    key = (base_url, dumps(sorted((headers or {}).items())))
+    if key not in _clients:
+        rate = os.getenv("HTTP_RATE_LIMIT")
+        settings = {
+            "limit": int(os.getenv("HTTP_POOL_LIMIT", 100)),
+            "limit_per_host": int(os.getenv("HTTP_LIMIT_PER_HOST", 20)),
+            "rate": float(rate) if rate else None,
+            "retries": int(os.getenv("HTTP_RETRIES", 3)),
+        }
+        settings.update(options)
+        _clients[key] = BackendClient(base_url, headers, **settings)
+    return _clients[key]
+
+
+async def close_clients():
+    """
+    Close every shared client's connection pool (call on shutdown).
+    """
+    for client in list(_clients.values()):
+        await client.close()
+    _clients.clear()
@@ -0,0 +1,346 @@
+import mmap
+import re
+from functools import lru_cache
+from datetime import date, datetime, timedelta, timezone
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+from dateutil.rrule import rruleset, rrulestr
+from dateutil.tz import gettz, tzlocal
+
+_DURATION = re.compile(
+    r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?"
+)
+# One content line: NAME, optional ;PARAMS (quoted values may contain ":") and VALUE
+_PROPERTY = re.compile(rb'^([A-Za-z0-9-]+)((?:;(?:[^:;"\r\n]|"[^"\r\n]*")*)*):([^\r\n]*)', re.M)
+_NESTED = re.compile(rb"^BEGIN:([A-Za-z-]+)\r?$.*?^END:\1\r?$", re.M | re.S)
+_ESCAPES = {"n": "\n", "N": "\n", ",": ",", ";": ";", "\\": "\\"}
+
+# Properties kept from each VEVENT; everything else is skipped without decoding
+_WANTED = {
+    b"UID", b"SUMMARY", b"DESCRIPTION", b"DTSTART", b"DTEND", b"DURATION",
+    b"RRULE", b"EXDATE", b"RDATE", b"ATTENDEE", b"ORGANIZER", b"STATUS", b"LOCATION", b"RECURRENCE-ID",
+}
+
+
+def _unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return re.sub(r"\\(.)", lambda match: _ESCAPES.get(match.group(1), match.group(1)), value)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def parse_ics_datetime(value: str, tzid: str = None) -> datetime:
+    """
+    Parse an iCalendar DATE or DATE-TIME into naive local time, matching the rest of the
+    scheduler. UTC and TZID times are converted; floating times (no zone) are taken as local,
+    as are TZIDs that do not name a known zone.
+    """
+    value = value.strip()
+    if len(value) == 8:
+        return datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+
+    parsed = datetime(
+        int(value[0:4]), int(value[4:6]), int(value[6:8]),
+        int(value[9:11]), int(value[11:13]), int(value[13:15] or 0)
+    )
+    if value.endswith("Z"):
+        parsed += _local_offset(parsed.year, parsed.month, parsed.day, parsed.hour)
+    elif tzid:
+        parsed += _zone_shift(tzid, parsed.year, parsed.month, parsed.day, parsed.hour)
+    return parsed
+
+
+@lru_cache(maxsize=65536)
+def _local_offset(year: int, month: int, day: int, hour: int) -> timedelta:
+    # UTC offset of local time at the given UTC hour; cached because converting every
+    # timestamp through astimezone dominates parsing time on large files
+    moment = datetime(year, month, day, hour, tzinfo=timezone.utc)
+    return moment.astimezone().utcoffset()
+
+
+@lru_cache(maxsize=65536)
+def _zone_shift(tzid: str, year: int, month: int, day: int, hour: int) -> timedelta:
+    # Local offset minus the zone's offset at the given wall-clock hour in that zone
+    zone = gettz(tzid)
+    if zone is None:
+        return timedelta(0)
+    moment = datetime(year, month, day, hour, tzinfo=zone)
+    return moment.astimezone().utcoffset() - moment.utcoffset()
+
+
+def _tzid(params: bytes) -> str:
+    for param in params.split(b";"):
+        name, _, value = param.partition(b"=")
+        if name.strip().upper() == b"TZID":
+            return value.strip().strip(b'"').decode("utf-8", "replace")
+    return None
+
+
+def parse_ics_duration(value: str) -> timedelta:
+    match = _DURATION.fullmatch(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration '{value}'")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0),
+        hours=int(hours or 0), minutes=int(minutes or 0), seconds=int(seconds or 0)
+    )
+    return -duration if sign == "-" else duration
+
+
+def _iter_blocks(data, start: int = 0) -> Iterator[Tuple[bytes, int]]:
+    """
+    Yield (VEVENT body, offset after it) for every complete VEVENT in data from start.
+    """
+    while True:
+        begin = data.find(b"BEGIN:VEVENT", start)
+        if begin == -1:
+            return
+        end = data.find(b"END:VEVENT", begin)
+        if end == -1:
+            return
+        start = end + 10
+        yield data[begin + 12:end], start
+
+
+def _iter_event_blocks(handle: BinaryIO, use_mmap: bool, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    if use_mmap:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for block, _ in _iter_blocks(mapped):
+                yield block
+        finally:
+            mapped.close()
+        return
+
+    # Read fixed-size chunks and carry the incomplete tail over, so memory stays bounded
+    buffer = b""
+    while True:
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk
+        consumed = 0
+        for block, consumed in _iter_blocks(buffer):
+            yield block
+        buffer = buffer[consumed:]
+
+
+def _iter_properties(block: bytes) -> List[Tuple[bytes, bytes, bytes]]:
+    """
+    Unfold continuation lines and return the event's own (name, params, value) properties.
+    """
+    block = block.replace(b"\r\n ", b"").replace(b"\r\n\t", b"").replace(b"\n ", b"").replace(b"\n\t", b"")
+    if b"BEGIN:" in block:
+        block = _NESTED.sub(b"", block)  # e.g. VALARM inside the event
+    return _PROPERTY.findall(block)
+
+
+def _address(value: str) -> str:
+    return value[7:] if value[:7].lower() == "mailto:" else value
+
+
+def _to_event(properties: Dict[bytes, List[Tuple[bytes, str]]]) -> Dict:
+    def first(name: bytes, default: str = None) -> str:
+        values = properties.get(name)
+        return values[0][1] if values else default
+
+    def first_datetime(name: bytes) -> datetime:
+        params, value = properties[name][0]
+        return parse_ics_datetime(value, _tzid(params))
+
+    start_value = first(b"DTSTART")
+    if start_value is None:
+        return None
+    start = first_datetime(b"DTSTART")
+    all_day = len(start_value.strip()) == 8
+
+    if b"DTEND" in properties:
+        end = first_datetime(b"DTEND")
+    elif b"DURATION" in properties:
+        end = start + parse_ics_duration(first(b"DURATION"))
+    else:
+        end = start + timedelta(days=1) if all_day else start
+
+    participants = [_address(value) for _, value in properties.get(b"ORGANIZER", ())]
+    participants += [_address(value) for _, value in properties.get(b"ATTENDEE", ())]
+
+    event = {
+        "uid": first(b"UID"),
+        "title": _unescape(first(b"SUMMARY", "")),
+        "description": _unescape(first(b"DESCRIPTION", "")),
+        "start_time": start,
+        "end_time": end,
+        "participants": list(dict.fromkeys(participants)),
+    }
+    if b"RRULE" in properties:
+        event["rrule"] = first(b"RRULE")
+        # Zone the series repeats in, so occurrences keep their wall-clock time across DST
+        event["tzid"] = _tzid(properties[b"DTSTART"][0][0]) or ("UTC" if start_value.strip().endswith("Z") else None)
+        event["exdates"] = [
+            parse_ics_datetime(value, _tzid(params))
+            for params, values in properties.get(b"EXDATE", ())
+            for value in values.split(",")
+        ]
+        event["rdates"] = [
+            parse_ics_datetime(value, _tzid(params))
+            for params, values in properties.get(b"RDATE", ())
+            if b"PERIOD" not in params.upper()
+            for value in values.split(",")
+        ]
+    return event
+
+
+def _utc_until(rule: str, zone) -> str:
+    # With a zoned DTSTART dateutil wants UNTIL in UTC; a floating UNTIL is wall time in the zone
+    parts = []
+    for part in rule.split(";"):
+        if part.upper().startswith("UNTIL=") and not part.endswith("Z"):
+            value = part[6:].strip()
+            until = datetime.strptime(value, "%Y%m%d" if len(value) == 8 else "%Y%m%dT%H%M%S")
+            part = "UNTIL=" + until.replace(tzinfo=zone).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        parts.append(part)
+    return ";".join(parts)
+
+
+def expand_recurrences(event: Dict, window_start: datetime, window_end: datetime) -> Iterator[Dict]:
+    """
+    Yield the occurrences of a recurring event that overlap [window_start, window_end).
+    The rule is expanded in the event's own zone (TZID, UTC, or local time for floating
+    times), then each occurrence is converted to naive local time.
+    """
+    zone = (gettz(event["tzid"]) if event.get("tzid") else None) or tzlocal()
+    duration = event["end_time"] - event["start_time"]
+    # Naive values are local time; astimezone makes them zone-aware without moving them
+    rules = rruleset()
+    rules.rrule(rrulestr(_utc_until(event["rrule"], zone), dtstart=event["start_time"].astimezone(zone)))
+    for rdate in event.get("rdates", ()):
+        rules.rdate(rdate.astimezone(zone))
+    for exdate in event.get("exdates", ()):
+        rules.exdate(exdate.astimezone(zone))
+
+    for occurrence in rules.between((window_start - duration).astimezone(zone), window_end.astimezone(zone), inc=True):
+        occurrence = occurrence.astimezone().replace(tzinfo=None)
+        if occurrence + duration <= window_start and duration:
+            continue
+        instance = {key: value for key, value in event.items() if key not in ("rrule", "exdates", "rdates", "tzid")}
+        instance["start_time"] = occurrence
+        instance["end_time"] = occurrence + duration
+        instance["recurrence_id"] = occurrence.isoformat()
+        yield instance
+
+
+def iter_ics_events(
+    source: Union[str, BinaryIO],
+    window_start: datetime = None,
+    window_end: datetime = None,
+    use_mmap: bool = False
+) -> Iterator[Dict]:
+    """
+    Stream VEVENTs out of an iCalendar file in constant memory.
+    One-off events are always yielded. Recurring events are expanded only inside
+    [window_start, window_end); without a window they are yielded once with their "rrule".
+    Modified instances (RECURRENCE-ID) are yielded as standalone events in place of the
+    occurrence they replace, and cancelled events or instances (STATUS:CANCELLED) are
+    skipped. Recurring events are yielded last, as their instances may follow them in the file.
+    Args:
+        source (str | BinaryIO): Path or binary file object.
+        window_start (datetime): Start of the recurrence expansion window.
+        window_end (datetime): End of the recurrence expansion window.
+        use_mmap (bool): Memory-map the file instead of reading it in chunks.
+    """
+    handle = open(source, "rb") if isinstance(source, str) else source
+    masters = []  # Recurring events; far fewer than their occurrences
+    replaced: Dict[str, List[datetime]] = {}  # UID -> starts of occurrences modified or cancelled
+    try:
+        for block in _iter_event_blocks(handle, use_mmap):
+            properties = {}
+            for name, params, value in _iter_properties(block):
+                name = name.upper()
+                if name in _WANTED:
+                    properties.setdefault(name, []).append((params[1:], value.decode("utf-8", "replace")))
+
+            event = _to_event(properties)
+            if event is None:
+                continue
+            if b"RECURRENCE-ID" in properties:
+                # One instance of a series: it stands alone and the master skips that occurrence
+                params, value = properties[b"RECURRENCE-ID"][0]
+                if event["uid"]:
+                    replaced.setdefault(event["uid"], []).append(parse_ics_datetime(value, _tzid(params)))
+                for key in ("rrule", "exdates", "rdates", "tzid"):
+                    event.pop(key, None)
+            if properties.get(b"STATUS", [(b"", "")])[0][1].strip().upper() == "CANCELLED":
+                continue
+            if "rrule" in event:
+                masters.append(event)
+            else:
+                yield event
+
+        for event in masters:
+            event["exdates"].extend(replaced.get(event["uid"], ()))
+            if window_start is not None and window_end is not None:
+                yield from expand_recurrences(event, window_start, window_end)
+            else:
+                yield event
+    finally:
+        if isinstance(source, str):
+            handle.close()
+
+
+def _format_datetime(value: Union[str, datetime, date]) -> str:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def _fold(line: str) -> bytes:
+    # Lines longer than 75 octets are folded with CRLF + space, without splitting UTF-8 sequences
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return data + b"\r\n"
+    parts = []
+    start, limit = 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end])
+        start, limit = end, 74
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def write_ics(events: Iterable[Dict], target: BinaryIO, product_id: str = "-//AI Business Automation//EN") -> int:
+    """
+    Stream events (CalendarAPI event records) into an iCalendar file; returns the event count.
+    """
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    target.write(_fold("BEGIN:VCALENDAR") + _fold("VERSION:2.0") + _fold(f"PRODID:{product_id}"))
+
+    count = 0
+    for event in events:
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{event.get('uid') or event['id']}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_format_datetime(event['start'])}",
+            f"DTEND:{_format_datetime(event['end'])}",
+            f"SUMMARY:{_escape(event.get('title', ''))}",
+        ]
+        if event.get("description"):
+            lines.append(f"DESCRIPTION:{_escape(event['description'])}")
+        for participant in event.get("participants", ()):
+            lines.append(f"ATTENDEE:mailto:{participant}")
+        lines.append("END:VEVENT")
+        target.write(b"".join(_fold(line) for line in lines))
+        count += 1
+
+    target.write(_fold("END:VCALENDAR"))
+    return count
@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple, Union
+
+
+def to_datetime(value: Union[str, datetime]) -> datetime:
+    """
+    Parse an ISO 8601 string into a datetime; datetimes are returned unchanged.
+    """
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class IntervalIndex:
+    def __init__(self):
+        """
+        Events of one calendar kept sorted by start time, with times parsed once on insert.
+        Overlap queries bisect to the window [start - longest event, end), so they cost
+        O(log n + k) instead of a scan over the whole calendar.
+        """
+        # (start, event_id, end, event_id, event); ids are unique so events are never compared,
+        # and (start, id) is a stable position to resume paging from
+        self._items: List[Tuple] = []
+        self._keys: Dict[str, Tuple[datetime, str]] = {}
+        # Events per duration, so the longest duration can shrink again when events are removed
+        self._durations: Dict[timedelta, int] = {}
+        self._max_duration = timedelta(0)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._keys
+
+    def __iter__(self) -> Iterator[Dict]:
+        """
+        Iterate over the events in start order.
+        """
+        return (item[4] for item in self._items)
+
+    def add(self, event_id: str, start: Union[str, datetime], end: Union[str, datetime], event: Dict = None):
+        """
+        Insert an event; an existing event with the same id is replaced.
+        """
+        if event_id in self._keys:
+            self.remove(event_id)
+
+        start, end = to_datetime(start), to_datetime(end)
+        key = (start, event_id)
+        position = bisect_left(self._items, key)
+        self._items.insert(position, key + (end, event_id, event))
+        self._keys[event_id] = key
+        duration = end - start
+        self._durations[duration] = self._durations.get(duration, 0) + 1
+        self._max_duration = max(self._max_duration, duration)
+
+    def remove(self, event_id: str) -> bool:
+        key = self._keys.pop(event_id, None)
+        if key is None:
+            return False
+        position = bisect_left(self._items, key)
+        duration = self._items[position][2] - key[0]
+        del self._items[position]
+        if self._durations[duration] > 1:
+            self._durations[duration] -= 1
+        else:
+            del self._durations[duration]
+            if duration == self._max_duration:
+                # Calendars hold few distinct durations, so this max is cheap
+                self._max_duration = max(self._durations, default=timedelta(0))
+        return True
+
+    def get(self, event_id: str) -> Dict:
+        key = self._keys.get(event_id)
+        if key is None:
+            return None
+        return self._items[bisect_left(self._items, key)][4]
+
+    def _window(self, start: datetime, end: datetime) -> Iterator[Tuple]:
+        # Only events starting within the longest event duration before start can reach into the window
+        low = bisect_left(self._items, (start - self._max_duration,))
+        high = bisect_left(self._items, (end,))
+        for position in range(low, high):
+            item = self._items[position]
+            if item[2] > start:
+                yield item
+
+    def overlapping(self, start: Union[str, datetime], end: Union[str, datetime]) -> List[Dict]:
+        """
+        Return the events overlapping [start, end), in start order.
+        """
+        return [item[4] for item in self._window(to_datetime(start), to_datetime(end))]
+
+    def busy_intervals(self, start: Union[str, datetime], end: Union[str, datetime]) -> List[Tuple[datetime, datetime]]:
+        """
+        Return (start, end) of every event overlapping [start, end), in start order.
+        """
+        return [(item[0], item[2]) for item in self._window(to_datetime(start), to_datetime(end))]
+
+    def is_free(self, start: Union[str, datetime], end: Union[str, datetime]) -> bool:
+        """
+        Check that no event overlaps [start, end).
+        """
+        for _ in self._window(to_datetime(start), to_datetime(end)):
+            return False
+        return True
+
+    def starting_between(self, start: Union[str, datetime], end: Union[str, datetime]) -> List[Dict]:
+        """
+        Return the events starting in [start, end), in start order.
+        """
+        low = bisect_left(self._items, (to_datetime(start),))
+        high = bisect_left(self._items, (to_datetime(end),))
+        return [item[4] for item in self._items[low:high]]
+
+    def scan(
+        self,
+        start: Union[str, datetime] = None,
+        end: Union[str, datetime] = None,
+        after: Tuple[datetime, str] = None
+    ) -> Iterator[Dict]:
+        """
+        Iterate over the events starting in [start, end) in (start, id) order, resuming
+        strictly after the (start, id) position after when given, whether or not that
+        event is still in the index.
+        """
+        low = bisect_left(self._items, (to_datetime(start),)) if start is not None else 0
+        if after is not None:
+            position = bisect_left(self._items, after)
+            if position < len(self._items) and self._items[position][:2] == after:
+                position += 1
+            low = max(low, position)
+        end = to_datetime(end) if end is not None else None
+        for position in range(low, len(self._items)):
+            item = self._items[position]
+            if end is not None and item[0] >= end:
+                return
+            yield item[4]
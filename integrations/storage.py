@@ -0,0 +1,990 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Set, Tuple
+
+from integrations.task_index import compare, normalize_conditions
+
+# Per collection: indexed scalar columns (name -> SQL type) and an optional list field
+# whose members get their own indexed link table (e.g. an event's participants)
+COLLECTIONS: Dict[str, Dict] = {
+    "tasks": {
+        "columns": {"status": "TEXT", "priority": "INTEGER", "deadline": "TEXT", "created_at": "TEXT"},
+        "list_field": None,
+    },
+    "reminders": {
+        "columns": {"task_id": "TEXT", "time": "TEXT", "delivered_at": "TEXT"},
+        "list_field": None,
+    },
+    "events": {
+        "columns": {"start": "TEXT", "end": "TEXT", "uid": "TEXT"},
+        "list_field": "participants",
+    },
+    "emails": {
+        "columns": {"sender": "TEXT", "category": "TEXT"},
+        "list_field": None,
+    },
+    "sent_emails": {
+        "columns": {"to": "TEXT"},
+        "list_field": None,
+    },
+}
+
+_SQL_OPERATORS = {"eq": "=", "ne": "<>", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+
+# Write batches kept in each collection's change log; a reader further behind reloads instead
+CHANGE_LOG_VERSIONS = 10000
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def _decode(value: Dict):
+    if len(value) == 1:
+        if "$datetime" in value:
+            return datetime.fromisoformat(value["$datetime"])
+        if "$date" in value:
+            return date.fromisoformat(value["$date"])
+    return value
+
+
+def dumps(record: Dict) -> str:
+    """
+    Serialize a record to JSON, keeping datetimes round-trippable.
+    """
+    return json.dumps(record, default=_encode, separators=(",", ":"))
+
+
+def loads(data) -> Dict:
+    if isinstance(data, dict):  # psycopg2 already decodes JSONB
+        data = json.dumps(data)
+    return json.loads(data, object_hook=_decode)
+
+
+def _column_value(value):
+    # Datetimes are stored as ISO strings so they sort and compare correctly in SQL
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return None
+    return value
+
+
+def _collection(name: str) -> Dict:
+    if name not in COLLECTIONS:
+        raise ValueError(f"Unknown collection '{name}'")
+    return COLLECTIONS[name]
+
+
+def _swap_field(collection: str, field: str) -> Dict:
+    spec = _collection(collection)
+    if field not in spec["columns"]:
+        raise ValueError(f"'{field}' is not an indexed field of '{collection}'")
+    return spec
+
+
+def _row(spec: Dict, record: Dict) -> Dict:
+    # A record's indexed values as the SQL backends keep them in columns; the list field as a tuple
+    row = {column: _column_value(record.get(column)) for column in spec["columns"]}
+    if spec["list_field"]:
+        row[spec["list_field"]] = tuple(str(value) for value in dict.fromkeys(record.get(spec["list_field"]) or ()))
+    return row
+
+
+class StorageBackend:
+    """
+    Durable store for the integrations' records, grouped in collections (see COLLECTIONS).
+    Methods are synchronous; the integrations call them through run_storage so blocking
+    backends run off the event loop.
+    """
+
+    # Whether calls block on I/O and should run in a worker thread
+    blocking = True
+
+    def put(self, collection: str, record_id: str, record: Dict):
+        self.put_many(collection, [(record_id, record)])
+
+    def put_many(self, collection: str, records: List[Tuple[str, Dict]]):
+        raise NotImplementedError
+
+    def delete(self, collection: str, record_id: str):
+        self.delete_many(collection, [record_id])
+
+    def delete_many(self, collection: str, record_ids: List[str]):
+        raise NotImplementedError
+
+    def get(self, collection: str, record_id: str) -> Dict:
+        raise NotImplementedError
+
+    def get_many(self, collection: str, record_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Return {id: record} for those of record_ids that exist.
+        """
+        found = {}
+        for record_id in record_ids:
+            record = self.get(collection, record_id)
+            if record is not None:
+                found[record_id] = record
+        return found
+
+    def changes_since(self, collection: str, version: int = None) -> Tuple[int, List[str]]:
+        """
+        Return the collection's current change version and the ids written or deleted after
+        version, by any process sharing the store. The ids are None when version is None or
+        older than the retained change log; the caller then reloads the whole collection.
+        """
+        raise NotImplementedError
+
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        """
+        Yield every (id, record) of a collection.
+        """
+        raise NotImplementedError
+
+    def load_all(self, collection: str) -> List[Tuple[str, Dict]]:
+        return list(self.load(collection))
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        """
+        Reserve count consecutive id numbers for new records of a collection and return the
+        first. Numbers are never handed out twice, even to other processes sharing the store.
+        """
+        raise NotImplementedError
+
+    def compare_and_set(self, collection: str, record_ids: List[str], field: str, expected, value) -> List[str]:
+        """
+        Atomically set an indexed field to value on those of record_ids whose field still
+        equals expected (None: missing) and return their ids. Concurrent callers, in this
+        process or another sharing the store, never both win the same record.
+        """
+        raise NotImplementedError
+
+    def query(
+        self,
+        collection: str,
+        filters: Dict = None,
+        order_by: str = None,
+        descending: bool = False,
+        limit: int = None
+    ) -> List[Dict]:
+        """
+        Return records matching filters on indexed fields (values or {operator: operand},
+        as in TaskAPI.get_tasks; the list field matches on membership). A None value
+        matches records where the field is missing.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InMemoryStorage(StorageBackend):
+    blocking = False
+
+    def __init__(self):
+        self.collections: Dict[str, Dict[str, str]] = {name: {} for name in COLLECTIONS}
+        # Indexed values per record, so queries filter without decoding every record
+        self.rows: Dict[str, Dict[str, Dict]] = {name: {} for name in COLLECTIONS}
+        # collection -> field -> value -> record ids, for equality and membership filters
+        self._lookups: Dict[str, Dict[str, Dict[object, Set[str]]]] = {
+            name: {field: {} for field in _row(spec, {})} for name, spec in COLLECTIONS.items()
+        }
+        self._sequences: Dict[str, int] = {}
+        self._versions: Dict[str, int] = {}
+        self._changes: Dict[str, Deque[Tuple[int, Tuple[str, ...]]]] = {
+            name: deque(maxlen=CHANGE_LOG_VERSIONS) for name in COLLECTIONS
+        }
+        self._lock = threading.Lock()
+
+    def _link(self, collection: str, record_id: str, row: Dict, add: bool):
+        lookups = self._lookups[collection]
+        for field, value in row.items():
+            for member in value if isinstance(value, tuple) else (value,):
+                if add:
+                    lookups[field].setdefault(member, set()).add(record_id)
+                else:
+                    ids = lookups[field][member]
+                    ids.discard(record_id)
+                    if not ids:
+                        del lookups[field][member]
+
+    def _set(self, collection: str, record_id: str, data: str, row: Dict):
+        # Caller holds the lock
+        old = self.rows[collection].get(record_id)
+        if old is not None:
+            self._link(collection, record_id, old, add=False)
+        self.collections[collection][record_id] = data
+        self.rows[collection][record_id] = row
+        self._link(collection, record_id, row, add=True)
+
+    def _unset(self, collection: str, record_id: str):
+        row = self.rows[collection].pop(record_id, None)
+        if row is not None:
+            del self.collections[collection][record_id]
+            self._link(collection, record_id, row, add=False)
+
+    def _log_change(self, collection: str, record_ids: Iterable[str]):
+        version = self._versions.get(collection, 0) + 1
+        self._versions[collection] = version
+        self._changes[collection].append((version, tuple(record_ids)))
+
+    def _store(self, collection: str, encoded: List[Tuple[str, str, Dict]]):
+        for record_id, data, row in encoded:
+            self._set(collection, record_id, data, row)
+        self._log_change(collection, (record_id for record_id, _, _ in encoded))
+
+    def _discard(self, collection: str, record_ids: List[str]):
+        for record_id in record_ids:
+            self._unset(collection, record_id)
+        self._log_change(collection, record_ids)
+
+    def _serialize(self, collection: str, records: List[Tuple[str, Dict]]) -> List[Tuple[str, str, Dict]]:
+        # Records are stored serialized so callers can't mutate them behind the store's back
+        spec = _collection(collection)
+        return [(record_id, dumps(record), _row(spec, record)) for record_id, record in records]
+
+    def put_many(self, collection: str, records: List[Tuple[str, Dict]]):
+        encoded = self._serialize(collection, records)
+        with self._lock:
+            self._store(collection, encoded)
+
+    def delete_many(self, collection: str, record_ids: List[str]):
+        _collection(collection)
+        with self._lock:
+            self._discard(collection, record_ids)
+
+    def _swap(self, collection: str, record_ids: List[str], field: str, expected, value) -> List[Tuple[str, str, Dict]]:
+        # Caller holds the lock; returns the re-encoded records whose field matched
+        spec = _swap_field(collection, field)
+        rows, expected = self.rows[collection], _column_value(expected)
+        swapped = []
+        for record_id in dict.fromkeys(record_ids):
+            row = rows.get(record_id)
+            if row is not None and row[field] == expected:
+                record = loads(self.collections[collection][record_id])
+                record[field] = value
+                swapped.append((record_id, dumps(record), _row(spec, record)))
+        return swapped
+
+    def compare_and_set(self, collection: str, record_ids: List[str], field: str, expected, value) -> List[str]:
+        with self._lock:
+            swapped = self._swap(collection, record_ids, field, expected, value)
+            if swapped:
+                self._store(collection, swapped)
+        return [record_id for record_id, _, _ in swapped]
+
+    def get(self, collection: str, record_id: str) -> Dict:
+        data = self.collections[collection].get(record_id)
+        return loads(data) if data is not None else None
+
+    def get_many(self, collection: str, record_ids: List[str]) -> Dict[str, Dict]:
+        records = self.collections[collection]
+        found = [(record_id, records.get(record_id)) for record_id in record_ids]
+        return {record_id: loads(data) for record_id, data in found if data is not None}
+
+    def changes_since(self, collection: str, version: int = None) -> Tuple[int, List[str]]:
+        _collection(collection)
+        with self._lock:
+            current = self._versions.get(collection, 0)
+            log = self._changes[collection]
+            if version is None or version < current - len(log):
+                return current, None
+            changed = {}
+            for logged, record_ids in reversed(log):
+                if logged <= version:
+                    break
+                changed.update(dict.fromkeys(record_ids))
+        return current, list(changed)
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        _collection(collection)
+        with self._lock:
+            # Seeded from the stored ids the first time, so recovered data keeps its numbers
+            last = self._sequences.get(collection)
+            if last is None:
+                last = highest_id_suffix(self.collections[collection])
+            self._sequences[collection] = last + count
+        return last + 1
+
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        for record_id, data in list(self.collections[collection].items()):
+            yield record_id, loads(data)
+
+    def query(
+        self,
+        collection: str,
+        filters: Dict = None,
+        order_by: str = None,
+        descending: bool = False,
+        limit: int = None
+    ) -> List[Dict]:
+        spec = _collection(collection)
+        lookups = self._lookups[collection]
+        conditions = {}
+        for field, condition in (filters or {}).items():
+            if field not in lookups or (field == spec["list_field"] and set(normalize_conditions(condition)) != {"eq"}):
+                raise ValueError(f"'{field}' is not an indexed field of '{collection}'")
+            # Operands compared as stored: ISO strings for datetimes, strings for list members
+            convert = str if field == spec["list_field"] else _column_value
+            conditions[field] = {
+                operator: [convert(item) for item in operand] if operator == "in" else convert(operand)
+                for operator, operand in normalize_conditions(condition).items()
+            }
+        if order_by and order_by not in spec["columns"]:
+            raise ValueError(f"'{order_by}' is not an indexed field of '{collection}'")
+
+        with self._lock:
+            rows = self.rows[collection]
+            # Equality and membership conditions come straight from the lookups, smallest first
+            candidates = None
+            for ids in sorted(
+                (
+                    set().union(*(lookups[field].get(item, ()) for item in operations["in"]))
+                    if "in" in operations else lookups[field].get(operations["eq"], set())
+                    for field, operations in conditions.items() if "eq" in operations or "in" in operations
+                ),
+                key=len
+            ):
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+            matched = [
+                (record_id, row) for record_id, row in (
+                    rows.items() if candidates is None else ((record_id, rows[record_id]) for record_id in candidates)
+                )
+                if all(
+                    (operand in row[field]) if field == spec["list_field"]
+                    else compare(row[field], operator, operand)
+                    for field, operations in conditions.items()
+                    for operator, operand in operations.items()
+                )
+            ]
+            if order_by:
+                present = [item for item in matched if item[1][order_by] is not None]
+                present.sort(key=lambda item: item[1][order_by], reverse=descending)
+                matched = present + [item for item in matched if item[1][order_by] is None]
+            if limit is not None:
+                matched = matched[:limit]
+            found = [self.collections[collection][record_id] for record_id, _ in matched]
+        # Only the matching records are decoded
+        return [loads(data) for data in found]
+
+
+class _SQLStorage(StorageBackend):
+    """
+    Shared SQL for the SQLite and PostgreSQL backends: one table per collection with the
+    record as JSON plus indexed columns, and a link table for the list field.
+    """
+
+    placeholder = "?"
+    json_type = "TEXT"
+
+    def _schema(self) -> List[str]:
+        statements = []
+        for name, spec in COLLECTIONS.items():
+            columns = "".join(f', "{column}" {sql_type}' for column, sql_type in spec["columns"].items())
+            statements.append(
+                f'CREATE TABLE IF NOT EXISTS {name} (id TEXT PRIMARY KEY, data {self.json_type} NOT NULL{columns})'
+            )
+            for column in spec["columns"]:
+                statements.append(f'CREATE INDEX IF NOT EXISTS {name}_{column}_idx ON {name} ("{column}")')
+            if spec["list_field"]:
+                link = f'{name}_{spec["list_field"]}'
+                statements.append(
+                    f"CREATE TABLE IF NOT EXISTS {link} (id TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (id, value))"
+                )
+                statements.append(f"CREATE INDEX IF NOT EXISTS {link}_value_idx ON {link} (value)")
+        # Last id number handed out per collection
+        statements.append("CREATE TABLE IF NOT EXISTS id_sequences (name TEXT PRIMARY KEY, value BIGINT NOT NULL)")
+        # Change log: each write batch bumps its collection's version and records the ids it touched
+        statements.append("CREATE TABLE IF NOT EXISTS change_versions (name TEXT PRIMARY KEY, value BIGINT NOT NULL)")
+        statements.append(
+            "CREATE TABLE IF NOT EXISTS change_log (collection TEXT NOT NULL, version BIGINT NOT NULL, id TEXT NOT NULL)"
+        )
+        statements.append("CREATE INDEX IF NOT EXISTS change_log_version_idx ON change_log (collection, version)")
+        return statements
+
+    def _swappable(
+        self,
+        fetch: Callable[[str, Tuple], List[Tuple]],
+        collection: str,
+        record_ids: List[str],
+        field: str,
+        expected,
+        value,
+        lock: str = ""
+    ) -> List[Tuple[str, Dict]]:
+        # The records whose field still equals expected, updated to value, ready to write back
+        _swap_field(collection, field)
+        marker = self.placeholder
+        condition = f'"{field}" IS NULL' if expected is None else f'"{field}" = {marker}'
+        record_ids = list(dict.fromkeys(record_ids))
+        records = []
+        for start in range(0, len(record_ids), 500):
+            chunk = record_ids[start:start + 500]
+            rows = fetch(
+                f"SELECT id, data FROM {collection} WHERE id IN ({', '.join([marker] * len(chunk))}) AND {condition}{lock}",
+                tuple(chunk) + (() if expected is None else (_column_value(expected),))
+            )
+            records.extend((record_id, dict(loads(data), **{field: value})) for record_id, data in rows)
+        return records
+
+    def _changes_since(self, fetch: Callable[[str, Tuple], List[Tuple]], collection: str, version: int):
+        _collection(collection)
+        marker = self.placeholder
+
+        def current() -> int:
+            rows = fetch(f"SELECT value FROM change_versions WHERE name = {marker}", (collection,))
+            return rows[0][0] if rows else 0
+
+        latest = current()
+        if version is None or version < latest - CHANGE_LOG_VERSIONS:
+            return latest, None
+        rows = fetch(
+            f"SELECT DISTINCT id FROM change_log WHERE collection = {marker} AND version > {marker} AND version <= {marker}",
+            (collection, version, latest)
+        )
+        # Writers prune the log as they go; if they pruned past version meanwhile, the ids are incomplete
+        if version < current() - CHANGE_LOG_VERSIONS:
+            return latest, None
+        return latest, [record_id for record_id, in rows]
+
+    def _rows(self, collection: str, records: List[Tuple[str, Dict]]) -> List[Tuple]:
+        columns = _collection(collection)["columns"]
+        return [
+            (record_id, dumps(record)) + tuple(_column_value(record.get(column)) for column in columns)
+            for record_id, record in records
+        ]
+
+    def _links(self, collection: str, records: List[Tuple[str, Dict]]) -> List[Tuple[str, str]]:
+        field = _collection(collection)["list_field"]
+        return [
+            (record_id, str(value))
+            for record_id, record in records
+            for value in dict.fromkeys(record.get(field) or ())
+        ]
+
+    def _where(self, collection: str, filters: Dict) -> Tuple[str, List]:
+        spec = _collection(collection)
+        clauses, params = [], []
+        for field, condition in (filters or {}).items():
+            for operator, operand in normalize_conditions(condition).items():
+                if field == spec["list_field"] and operator == "eq":
+                    clauses.append(
+                        f'id IN (SELECT id FROM {collection}_{field} WHERE value = {self.placeholder})'
+                    )
+                    params.append(str(operand))
+                elif field not in spec["columns"]:
+                    raise ValueError(f"'{field}' is not an indexed field of '{collection}'")
+                elif operator == "in":
+                    operands = [_column_value(item) for item in operand]
+                    if not operands:
+                        clauses.append("1 = 0")
+                        continue
+                    clauses.append(f'"{field}" IN ({", ".join([self.placeholder] * len(operands))})')
+                    params.extend(operands)
+                elif operand is None and operator in ("eq", "ne"):
+                    # SQL's = NULL matches nothing; None asks for a missing value
+                    clauses.append(f'"{field}" IS {"NULL" if operator == "eq" else "NOT NULL"}')
+                else:
+                    clauses.append(f'"{field}" {_SQL_OPERATORS[operator]} {self.placeholder}')
+                    params.append(_column_value(operand))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _select(
+        self,
+        collection: str,
+        filters: Dict,
+        order_by: str,
+        descending: bool,
+        limit: int
+    ) -> Tuple[str, List]:
+        where, params = self._where(collection, filters)
+        sql = f"SELECT data FROM {collection}{where}"
+        if order_by:
+            if order_by not in _collection(collection)["columns"]:
+                raise ValueError(f"'{order_by}' is not an indexed field of '{collection}'")
+            # Records missing the field go last in either direction
+            sql += f' ORDER BY ("{order_by}" IS NULL), "{order_by}" {"DESC" if descending else "ASC"}'
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, params
+
+
+class SQLiteStorage(_SQLStorage):
+    def __init__(self, path: str = "automation.db", cached_statements: int = 256):
+        """
+        SQLite backend for local development and tests.
+        Each thread gets its own connection (SQLite connections can't be shared across
+        threads), WAL journaling lets readers run alongside the writer, and sqlite3's
+        statement cache keeps the parameterized statements prepared.
+        """
+        self.path = path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        connection = self._connection()
+        with connection:
+            for statement in self._schema():
+                connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, check_same_thread=False, cached_statements=self.cached_statements
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def put_many(self, collection: str, records: List[Tuple[str, Dict]]):
+        if not records:
+            return
+        connection = self._connection()
+        with connection:  # One transaction per batch
+            self._write(connection, collection, records)
+
+    def _write(self, connection: sqlite3.Connection, collection: str, records: List[Tuple[str, Dict]]):
+        spec = _collection(collection)
+        columns = ["id", "data"] + [f'"{column}"' for column in spec["columns"]]
+        connection.executemany(
+            f"INSERT OR REPLACE INTO {collection} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})",
+            self._rows(collection, records)
+        )
+        if spec["list_field"]:
+            link = f'{collection}_{spec["list_field"]}'
+            connection.executemany(f"DELETE FROM {link} WHERE id = ?", [(record_id,) for record_id, _ in records])
+            connection.executemany(f"INSERT INTO {link} (id, value) VALUES (?, ?)", self._links(collection, records))
+        self._log_change(connection, collection, [record_id for record_id, _ in records])
+
+    def delete_many(self, collection: str, record_ids: List[str]):
+        if not record_ids:
+            return
+        spec = _collection(collection)
+        connection = self._connection()
+        with connection:
+            connection.executemany(f"DELETE FROM {collection} WHERE id = ?", [(record_id,) for record_id in record_ids])
+            if spec["list_field"]:
+                connection.executemany(
+                    f'DELETE FROM {collection}_{spec["list_field"]} WHERE id = ?',
+                    [(record_id,) for record_id in record_ids]
+                )
+            self._log_change(connection, collection, record_ids)
+
+    @staticmethod
+    def _log_change(connection: sqlite3.Connection, collection: str, record_ids: List[str]):
+        # Inside the write's transaction; SQLite's single writer keeps versions in commit order
+        connection.execute("INSERT OR IGNORE INTO change_versions (name, value) VALUES (?, 0)", (collection,))
+        connection.execute("UPDATE change_versions SET value = value + 1 WHERE name = ?", (collection,))
+        version = connection.execute("SELECT value FROM change_versions WHERE name = ?", (collection,)).fetchone()[0]
+        connection.executemany(
+            "INSERT INTO change_log (collection, version, id) VALUES (?, ?, ?)",
+            [(collection, version, record_id) for record_id in dict.fromkeys(record_ids)]
+        )
+        connection.execute(
+            "DELETE FROM change_log WHERE collection = ? AND version <= ?", (collection, version - CHANGE_LOG_VERSIONS)
+        )
+
+    def get(self, collection: str, record_id: str) -> Dict:
+        _collection(collection)
+        row = self._connection().execute(f"SELECT data FROM {collection} WHERE id = ?", (record_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def get_many(self, collection: str, record_ids: List[str]) -> Dict[str, Dict]:
+        _collection(collection)
+        connection = self._connection()
+        found = {}
+        record_ids = list(record_ids)
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(record_ids), 500):
+            chunk = record_ids[start:start + 500]
+            rows = connection.execute(
+                f"SELECT id, data FROM {collection} WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update((record_id, loads(data)) for record_id, data in rows)
+        return found
+
+    def changes_since(self, collection: str, version: int = None) -> Tuple[int, List[str]]:
+        connection = self._connection()
+        return self._changes_since(lambda sql, params: connection.execute(sql, params).fetchall(), collection, version)
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        _collection(collection)
+        connection = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent allocators serialize
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT value FROM id_sequences WHERE name = ?", (collection,)).fetchone()
+            if row is None:
+                last = highest_id_suffix(record_id for record_id, in connection.execute(f"SELECT id FROM {collection}"))
+                connection.execute("INSERT INTO id_sequences (name, value) VALUES (?, ?)", (collection, last + count))
+            else:
+                last = row[0]
+                connection.execute("UPDATE id_sequences SET value = ? WHERE name = ?", (last + count, collection))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return last + 1
+
+    def compare_and_set(self, collection: str, record_ids: List[str], field: str, expected, value) -> List[str]:
+        connection = self._connection()
+        # BEGIN IMMEDIATE holds the write lock from the check to the write, so only one caller wins
+        connection.execute("BEGIN IMMEDIATE")
+        with connection:  # Commits, or rolls back on error
+            records = self._swappable(
+                lambda sql, params: connection.execute(sql, params).fetchall(),
+                collection, record_ids, field, expected, value
+            )
+            if records:
+                self._write(connection, collection, records)
+        return [record_id for record_id, _ in records]
+
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        _collection(collection)
+        cursor = self._connection().execute(f"SELECT id, data FROM {collection}")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                return
+            for record_id, data in rows:
+                yield record_id, loads(data)
+
+    def query(
+        self,
+        collection: str,
+        filters: Dict = None,
+        order_by: str = None,
+        descending: bool = False,
+        limit: int = None
+    ) -> List[Dict]:
+        sql, params = self._select(collection, filters, order_by, descending, limit)
+        return [loads(data) for data, in self._connection().execute(sql, params)]
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class PostgresStorage(_SQLStorage):
+    placeholder = "%s"
+    json_type = "JSONB"
+
+    def __init__(self, dsn: str, min_connections: int = 1, max_connections: int = 10, page_size: int = 1000):
+        """
+        PostgreSQL backend.
+        Connections come from a psycopg2 ThreadedConnectionPool; the hot single-row
+        statements are PREPAREd once per connection, and bulk writes go through
+        execute_values so a batch is a single round trip.
+        Args:
+            dsn (str): libpq connection string or URL.
+            min_connections (int): Connections opened up front.
+            max_connections (int): Upper bound on pooled connections.
+            page_size (int): Rows per statement for execute_values.
+        """
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.page_size = page_size
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, dsn)
+        self._prepared: Dict[int, set] = {}
+        with self._connection() as connection, connection.cursor() as cursor:
+            for statement in self._schema():
+                cursor.execute(statement)
+
+    @contextmanager
+    def _connection(self):
+        # Borrow a pooled connection for one transaction: commit on success, roll back on error
+        connection = self.pool.getconn()
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self.pool.putconn(connection)
+
+    def _execute_prepared(self, cursor, name: str, sql: str, params: Tuple):
+        # PREPARE once per connection, then EXECUTE skips parsing and planning
+        prepared = self._prepared.setdefault(id(cursor.connection), set())
+        if name not in prepared:
+            cursor.execute(f"PREPARE {name} AS {sql}")
+            prepared.add(name)
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+    def put_many(self, collection: str, records: List[Tuple[str, Dict]]):
+        if not records:
+            return
+        with self._connection() as connection, connection.cursor() as cursor:
+            self._write(cursor, collection, records)
+
+    def _write(self, cursor, collection: str, records: List[Tuple[str, Dict]]):
+        from psycopg2.extras import execute_values
+
+        spec = _collection(collection)
+        columns = ["id", "data"] + [f'"{column}"' for column in spec["columns"]]
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns[1:])
+        execute_values(
+            cursor,
+            f"INSERT INTO {collection} ({', '.join(columns)}) VALUES %s "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}",
+            self._rows(collection, records),
+            page_size=self.page_size
+        )
+        if spec["list_field"]:
+            link = f'{collection}_{spec["list_field"]}'
+            cursor.execute(f"DELETE FROM {link} WHERE id = ANY(%s)", ([record_id for record_id, _ in records],))
+            links = self._links(collection, records)
+            if links:
+                execute_values(
+                    cursor, f"INSERT INTO {link} (id, value) VALUES %s ON CONFLICT DO NOTHING",
+                    links, page_size=self.page_size
+                )
+        self._log_change(cursor, collection, [record_id for record_id, _ in records])
+
+    def delete_many(self, collection: str, record_ids: List[str]):
+        if not record_ids:
+            return
+        spec = _collection(collection)
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {collection} WHERE id = ANY(%s)", (list(record_ids),))
+            if spec["list_field"]:
+                cursor.execute(
+                    f'DELETE FROM {collection}_{spec["list_field"]} WHERE id = ANY(%s)', (list(record_ids),)
+                )
+            self._log_change(cursor, collection, record_ids)
+
+    def _log_change(self, cursor, collection: str, record_ids: List[str]):
+        from psycopg2.extras import execute_values
+
+        cursor.execute(
+            "INSERT INTO change_versions (name, value) VALUES (%s, 0) ON CONFLICT (name) DO NOTHING", (collection,)
+        )
+        # The row lock is held until commit, so a collection's versions commit in order and a
+        # reader that has seen version n never misses a later-committing n - 1
+        cursor.execute("UPDATE change_versions SET value = value + 1 WHERE name = %s RETURNING value", (collection,))
+        version = cursor.fetchone()[0]
+        execute_values(
+            cursor, "INSERT INTO change_log (collection, version, id) VALUES %s",
+            [(collection, version, record_id) for record_id in dict.fromkeys(record_ids)], page_size=self.page_size
+        )
+        cursor.execute(
+            "DELETE FROM change_log WHERE collection = %s AND version <= %s", (collection, version - CHANGE_LOG_VERSIONS)
+        )
+
+    def get(self, collection: str, record_id: str) -> Dict:
+        _collection(collection)
+        with self._connection() as connection, connection.cursor() as cursor:
+            self._execute_prepared(
+                cursor, f"get_{collection}", f"SELECT data FROM {collection} WHERE id = $1", (record_id,)
+            )
+            row = cursor.fetchone()
+        return loads(row[0]) if row else None
+
+    def get_many(self, collection: str, record_ids: List[str]) -> Dict[str, Dict]:
+        _collection(collection)
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(f"SELECT id, data FROM {collection} WHERE id = ANY(%s)", (list(record_ids),))
+            return {record_id: loads(data) for record_id, data in cursor.fetchall()}
+
+    def changes_since(self, collection: str, version: int = None) -> Tuple[int, List[str]]:
+        with self._connection() as connection, connection.cursor() as cursor:
+
+            def fetch(sql: str, params: Tuple) -> List[Tuple]:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+            return self._changes_since(fetch, collection, version)
+
+    def compare_and_set(self, collection: str, record_ids: List[str], field: str, expected, value) -> List[str]:
+        with self._connection() as connection, connection.cursor() as cursor:
+
+            def fetch(sql: str, params: Tuple) -> List[Tuple]:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+
+            # FOR UPDATE locks the matched rows; a concurrent caller waits, then re-checks the
+            # condition against the committed row and skips it
+            records = self._swappable(fetch, collection, record_ids, field, expected, value, lock=" FOR UPDATE")
+            if records:
+                self._write(cursor, collection, records)
+        return [record_id for record_id, _ in records]
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        _collection(collection)
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM id_sequences WHERE name = %s", (collection,))
+            if cursor.fetchone() is None:
+                cursor.execute(f"SELECT id FROM {collection}")
+                seed = highest_id_suffix(record_id for record_id, in cursor.fetchall())
+                cursor.execute(
+                    "INSERT INTO id_sequences (name, value) VALUES (%s, %s) ON CONFLICT (name) DO NOTHING",
+                    (collection, seed)
+                )
+            # The row lock taken by UPDATE serializes allocators across processes
+            cursor.execute(
+                "UPDATE id_sequences SET value = value + %s WHERE name = %s RETURNING value", (count, collection)
+            )
+            last = cursor.fetchone()[0]
+        return last - count + 1
+
+    def load(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        _collection(collection)
+        with self._connection() as connection:
+            # Named (server-side) cursor streams the table instead of buffering it client-side
+            with connection.cursor(name=f"load_{collection}") as cursor:
+                cursor.itersize = 10000
+                cursor.execute(f"SELECT id, data FROM {collection}")
+                for record_id, data in cursor:
+                    yield record_id, loads(data)
+
+    def query(
+        self,
+        collection: str,
+        filters: Dict = None,
+        order_by: str = None,
+        descending: bool = False,
+        limit: int = None
+    ) -> List[Dict]:
+        sql, params = self._select(collection, filters, order_by, descending, limit)
+        with self._connection() as connection, connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [loads(data) for data, in cursor.fetchall()]
+
+    def close(self):
+        self.pool.closeall()
+        self._prepared.clear()
+
+
+def create_storage(url: str) -> StorageBackend:
+    """
+    Build a backend from a URL: memory://, wal:///path/to/dir, sqlite:///path/to.db or postgresql://...
+    """
+    if url.startswith("memory:"):
+        return InMemoryStorage()
+    if url.startswith("wal:"):
+        from integrations.wal import WALStorage
+
+        return WALStorage(
+            url.split("wal://", 1)[-1] if "//" in url else url[len("wal:"):],
+            sync_commit=os.getenv("WAL_SYNC_COMMIT", "1").lower() in ("1", "true", "yes"),
+            fsync=os.getenv("WAL_FSYNC", "1").lower() in ("1", "true", "yes"),
+            snapshot_every=int(os.getenv("WAL_SNAPSHOT_EVERY", 100000))
+        )
+    if url.startswith("sqlite:"):
+        return SQLiteStorage(url.split("sqlite:///", 1)[-1] if "///" in url else url[len("sqlite:"):])
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresStorage(
+            url,
+            min_connections=int(os.getenv("STORAGE_POOL_MIN", 1)),
+            max_connections=int(os.getenv("STORAGE_POOL_MAX", 10))
+        )
+    raise ValueError(f"Unsupported storage URL '{url}'")
+
+
+_default_storage: StorageBackend = None
+_default_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """
+    Shared backend configured by STORAGE_URL, created on first use; None keeps the
+    integrations purely in memory as before.
+    """
+    global _default_storage
+    url = os.getenv("STORAGE_URL")
+    if not url:
+        return None
+    with _default_lock:
+        if _default_storage is None:
+            _default_storage = create_storage(url)
+    return _default_storage
+
+
+async def run_storage(storage: StorageBackend, method: str, *args, **kwargs):
+    """
+    Call a backend method, in a worker thread when it blocks on I/O.
+    """
+    function = getattr(storage, method)
+    if not storage.blocking:
+        return function(*args, **kwargs)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, lambda: function(*args, **kwargs))
+
+
+class CollectionMirror:
+    def __init__(
+        self,
+        storage: StorageBackend,
+        collection: str,
+        apply: Callable[[str, Dict], None],
+        clear: Callable[[], None]
+    ):
+        """
+        Keeps an integration's in-memory records and indexes for one collection in step with a
+        shared backend, so reads are served by the indexes rather than by backend scans.
+        Each sync asks the backend's change log which ids were written since the last one, by
+        this process or any other, and re-reads just those; the first sync, or one that has
+        fallen further behind than the log keeps, reloads the whole collection.
+        Args:
+            storage (StorageBackend): The shared store.
+            collection (str): Collection to mirror.
+            apply (Callable): Called with (id, record) for each changed record; record is None
+                when it was deleted.
+            clear (Callable): Drops every local record before a full reload.
+        """
+        self.storage = storage
+        self.collection = collection
+        self.version: int = None
+        self._apply = apply
+        self._clear = clear
+        self._lock: asyncio.Lock = None
+
+    async def sync(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # Concurrent syncs would apply fetched records out of order
+            version, changed = await run_storage(self.storage, "changes_since", self.collection, self.version)
+            if changed is None:
+                records = await run_storage(self.storage, "load_all", self.collection)
+                # Creation order, as the in-memory integrations list records
+                records.sort(key=lambda item: highest_id_suffix([item[0]]))
+                self._clear()
+                for record_id, record in records:
+                    self._apply(record_id, record)
+            elif changed:
+                records = await run_storage(self.storage, "get_many", self.collection, changed)
+                for record_id in changed:
+                    self._apply(record_id, records.get(record_id))
+            self.version = version
+
+
+def highest_id_suffix(ids: Iterable[str]) -> int:
+    """
+    Highest numeric suffix among "<prefix>_<n>" ids, for resuming monotonic counters.
+    """
+    highest = 0
+    for record_id in ids:
+        suffix = record_id.rsplit("_", 1)[-1]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
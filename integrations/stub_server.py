@@ -0,0 +1,171 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from aiohttp import web
+
+from integrations.calendar_api import CalendarAPI
+from integrations.http_client import dumps
+from integrations.storage import InMemoryStorage
+from integrations.task_api import TaskAPI
+
+
+class StubBackend:
+    def __init__(self, latency: float = 0.0):
+        """
+        Local stand-in for the task, calendar and email services, for exercising the
+        real-API mode against a socket. Requests are answered by simulation-mode TaskAPI
+        and CalendarAPI objects, so the stub behaves like the in-memory integrations.
+        Args:
+            latency (float): Seconds to wait before answering each request.
+        """
+        self.latency = latency
+        self.tasks = TaskAPI(storage=InMemoryStorage())
+        self.calendar = CalendarAPI(storage=InMemoryStorage())
+        self.sent_emails: List[Dict] = []
+        self.invitations: List[Dict] = []
+        self.requests: List[tuple] = []  # (method, path) in arrival order
+        self.connections = set()  # Distinct client sockets; stays small when keep-alive works
+        self._failures: List[tuple] = []  # (path prefix, status, Retry-After) to answer before serving
+
+    def fail_next(self, count: int = 1, status: int = 503, path: str = "/", retry_after: str = None):
+        """
+        Answer the next count requests under path with status instead of serving them.
+        """
+        self._failures.extend([(path, status, retry_after)] * count)
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        self.requests.append((request.method, request.path))
+        self.connections.add(request.transport.get_extra_info("peername"))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for position, (prefix, status, retry_after) in enumerate(self._failures):
+            if request.path.startswith(prefix):
+                del self._failures[position]
+                headers = {"Retry-After": retry_after} if retry_after else None
+                return web.Response(status=status, text="injected failure", headers=headers)
+        try:
+            return await handler(request)
+        except ValueError as error:
+            return web.json_response({"detail": str(error)}, status=404 if "not found" in str(error) else 400)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes([
+            web.post("/tasks", self.create_task),
+            web.get("/tasks", self.get_tasks),
+            web.get("/tasks/{task_id}", self.get_task),
+            web.patch("/tasks/{task_id}", self.update_task),
+            web.delete("/tasks/{task_id}", self.delete_task),
+            web.post("/tasks/{task_id}/reminders", self.create_reminder),
+            web.delete("/tasks/{task_id}/reminders", self.delete_pending_reminders),
+            web.post("/events", self.create_event),
+            web.get("/events/{event_id}", self.get_event),
+            web.patch("/events/{event_id}", self.update_event),
+            web.delete("/events/{event_id}", self.cancel_event),
+            web.post("/events/{event_id}/invitations", self.send_invitation),
+            web.get("/calendars/{user_email}/events", self.get_calendar),
+            web.delete("/calendars/{user_email}/events/{event_id}", self.delete_event),
+            web.post("/emails", self.send_email),
+        ])
+        return app
+
+    @staticmethod
+    def _json(value, status: int = 200) -> web.Response:
+        return web.json_response(value, status=status, dumps=dumps)
+
+    @staticmethod
+    def _not_found() -> web.Response:
+        return web.json_response({"detail": "Not found"}, status=404)
+
+    async def create_task(self, request: web.Request) -> web.Response:
+        return self._json(await self.tasks.create_task(await request.json()), status=201)
+
+    async def get_tasks(self, request: web.Request) -> web.Response:
+        query = request.query
+        return self._json(await self.tasks.get_tasks_page(
+            filters=json.loads(query["filters"]) if "filters" in query else None,
+            sort_by=query.get("sort_by"),
+            descending=query.get("descending") == "true",
+            limit=int(query["limit"]) if "limit" in query else None,
+            cursor=query.get("cursor")
+        ))
+
+    async def get_task(self, request: web.Request) -> web.Response:
+        task = await self.tasks.get_task(request.match_info["task_id"])
+        return self._not_found() if task is None else self._json(task)
+
+    async def update_task(self, request: web.Request) -> web.Response:
+        return self._json(await self.tasks.update_task(request.match_info["task_id"], await request.json()))
+
+    async def delete_task(self, request: web.Request) -> web.Response:
+        if not await self.tasks.delete_task(request.match_info["task_id"]):
+            return self._not_found()
+        return web.Response(status=204)
+
+    async def create_reminder(self, request: web.Request) -> web.Response:
+        reminder = await request.json()
+        await self.tasks.create_reminder(request.match_info["task_id"], reminder)
+        return self._json(reminder, status=201)
+
+    async def delete_pending_reminders(self, request: web.Request) -> web.Response:
+        return self._json({"deleted": await self.tasks.delete_pending_reminders(request.match_info["task_id"])})
+
+    async def create_event(self, request: web.Request) -> web.Response:
+        return self._json(await self.calendar.create_event(await request.json()), status=201)
+
+    async def get_event(self, request: web.Request) -> web.Response:
+        event = await self.calendar.get_event(request.match_info["event_id"])
+        return self._not_found() if event is None else self._json(event)
+
+    async def update_event(self, request: web.Request) -> web.Response:
+        return self._json(await self.calendar.update_event(request.match_info["event_id"], await request.json()))
+
+    async def cancel_event(self, request: web.Request) -> web.Response:
+        if not await self.calendar.cancel_event(request.match_info["event_id"]):
+            return self._not_found()
+        return web.Response(status=204)
+
+    async def send_invitation(self, request: web.Request) -> web.Response:
+        invitation = dict(await request.json(), event_id=request.match_info["event_id"])
+        self.invitations.append(invitation)
+        return self._json(invitation, status=202)
+
+    async def get_calendar(self, request: web.Request) -> web.Response:
+        return self._json(await self.calendar.get_calendar(request.match_info["user_email"]))
+
+    async def delete_event(self, request: web.Request) -> web.Response:
+        if not await self.calendar.delete_event(request.match_info["user_email"], request.match_info["event_id"]):
+            return self._not_found()
+        return web.Response(status=204)
+
+    async def send_email(self, request: web.Request) -> web.Response:
+        email = await request.json()
+        email["id"] = f"email_{len(self.sent_emails) + 1}"
+        self.sent_emails.append(email)
+        return self._json(email, status=201)
+
+
+@asynccontextmanager
+async def run_stub_server(backend: StubBackend = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serve a StubBackend for the duration of the block and yield (base URL, backend).
+    Port 0 picks a free port.
+    """
+    backend = backend or StubBackend()
+    runner = web.AppRunner(backend.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}", backend
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    # python -m integrations.stub_server: serve the stub on port 8081 for manual runs
+    web.run_app(StubBackend().app(), host="127.0.0.1", port=8081)
@@ -1,54 +1,398 @@
-from typing import Dict, List
+import asyncio
+import heapq
+import itertools
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from integrations.http_client import BackendError, dumps, get_client
+from integrations.storage import CollectionMirror, StorageBackend, get_storage, run_storage
+from integrations.task_index import (
+    FieldIndex, SortedIndex, decode_cursor, encode_cursor, compare, normalize_conditions, parse_timestamp
+)
+
+# Fields with maintained secondary indexes
+HASH_INDEXED_FIELDS = ("status", "priority")
+SORTED_INDEXED_FIELDS = ("deadline", "created_at")
 
 class TaskAPI:
-    def __init__(self, api_key: str = None, api_url: str = None):
+    def __init__(self, api_key: str = None, api_url: str = None, storage: StorageBackend = None):
         self.tasks = {}  # In-memory storage for tasks
         self.reminders = {}  # In-memory storage for reminders
+        # Optional durable store; STORAGE_URL configures the default. When set it is the source
+        # of truth: ids are allocated by the backend and writes go there first, so several worker
+        # processes can share it. The tasks dict and indexes then act as a write-through cache,
+        # brought up to date from the backend's change log before each query
+        self.storage = storage if storage is not None else get_storage()
+        self._task_seqs = itertools.count(1)
+        self._reminder_ids = itertools.count(1)
+        self.field_indexes = {field: FieldIndex() for field in HASH_INDEXED_FIELDS}
+        self.sorted_indexes = {field: SortedIndex() for field in SORTED_INDEXED_FIELDS}
+        self._mirror = None
+        if self.storage is not None:
+            self._mirror = CollectionMirror(self.storage, "tasks", self._apply, self._clear)
         self.api_key = api_key
         self.api_url = api_url or "https://api.task-service.example.com"
         self.headers = {"Authorization": f"Bearer {self.api_key}"} if api_key else {}
         
         # Flag to determine if we're using simulation or real API
         self.use_real_api = bool(api_key)
+        # Real-API calls share one pooled client per backend (see integrations.http_client)
+        self.client = None
+        if self.use_real_api:
+            self.client = get_client(self.api_url, self.headers)
+
+    async def _persist(self, collection: str, records: List[Tuple[str, Dict]]):
+        if self.storage is not None and records:
+            await run_storage(self.storage, "put_many", collection, records)
+
+    async def _forget(self, collection: str, record_ids: List[str]):
+        if self.storage is not None and record_ids:
+            await run_storage(self.storage, "delete_many", collection, record_ids)
+
+    async def _allocate(self, collection: str, counter: Iterator[int], count: int) -> List[int]:
+        # IDs come from a monotonic counter, so they stay unique after deletes; with storage
+        # the counter lives in the backend so other processes never reuse them
+        if self.storage is not None:
+            first = await run_storage(self.storage, "allocate_ids", collection, count)
+            return list(range(first, first + count))
+        return [next(counter) for _ in range(count)]
+
+    @staticmethod
+    def _remote_params(filters: Dict, sort_by: str, descending: bool, limit: int, cursor: str) -> Dict:
+        params = {"filters": dumps(filters) if filters else None, "sort_by": sort_by,
+                  "descending": "true" if descending else None, "limit": limit, "cursor": cursor}
+        return {key: value for key, value in params.items() if value is not None}
+
+    @staticmethod
+    def _task_id(seq: int) -> str:
+        return f"task_{seq}"
+
+    @staticmethod
+    def _seq(task_id: str) -> int:
+        return int(task_id.rsplit("_", 1)[1])
+
+    def _index(self, seq: int, task: Dict, fields: Iterable[str] = None):
+        for field in HASH_INDEXED_FIELDS + SORTED_INDEXED_FIELDS if fields is None else fields:
+            if field in self.field_indexes:
+                self.field_indexes[field].add(task.get(field), seq)
+            elif field in self.sorted_indexes:
+                self.sorted_indexes[field].add(task.get(field), seq)
+
+    def _unindex(self, seq: int, task: Dict, fields: Iterable[str] = None):
+        for field in HASH_INDEXED_FIELDS + SORTED_INDEXED_FIELDS if fields is None else fields:
+            if field in self.field_indexes:
+                self.field_indexes[field].remove(task.get(field), seq)
+            elif field in self.sorted_indexes:
+                self.sorted_indexes[field].remove(task.get(field), seq)
+
+    def _apply(self, task_id: str, task: Dict):
+        # Put a stored version of a task (None once deleted) into the local dict and indexes
+        seq = self._seq(task_id)
+        old = self.tasks.pop(task_id, None)
+        if old is not None:
+            self._unindex(seq, old)
+        if task is not None:
+            self.tasks[task_id] = task
+            self._index(seq, task)
+
+    def _clear(self):
+        self.tasks.clear()
+        self.field_indexes = {field: FieldIndex() for field in HASH_INDEXED_FIELDS}
+        self.sorted_indexes = {field: SortedIndex() for field in SORTED_INDEXED_FIELDS}
 
     async def create_task(self, task_data: Dict) -> Dict:
         """
         Create a new task
         """
-        task_id = f"task_{len(self.tasks) + 1}"
-        task_data["id"] = task_id
-        self.tasks[task_id] = task_data
-        return self.tasks[task_id]
+        if self.client is not None:
+            # Only the server-assigned id is taken, so the caller's values (datetimes) keep their types
+            task_data["id"] = (await self.client.post("/tasks", task_data))["id"]
+            return task_data
+        return (await self.create_tasks([task_data]))[0]
+
+    async def create_tasks(self, tasks: List[Dict]) -> List[Dict]:
+        """
+        Create many tasks with one storage write
+        """
+        if self.client is not None:
+            # The client's pool bounds how many of these are in flight at once
+            return list(await asyncio.gather(*(self.create_task(task_data) for task_data in tasks)))
+        records = []
+        for seq, task_data in zip(await self._allocate("tasks", self._task_seqs, len(tasks)), tasks):
+            task_data["id"] = self._task_id(seq)
+            records.append((task_data["id"], task_data))
+        # Stored first, so the local indexes never hold a task the backend lacks
+        await self._persist("tasks", records)
+        for task_id, task_data in records:
+            self._apply(task_id, task_data)
+        return tasks
 
-    async def get_tasks(self, filters: Dict = None) -> List[Dict]:
+    async def get_task(self, task_id: str) -> Dict:
         """
-        Get tasks based on optional filters
+        Get a single task by ID (None when it doesn't exist)
         """
-        if not filters:
-            return list(self.tasks.values())
+        if self.client is not None:
+            try:
+                return await self.client.get(f"/tasks/{task_id}")
+            except BackendError as error:
+                if error.status == 404:
+                    return None
+                raise
+        if self.storage is not None:
+            return await run_storage(self.storage, "get", "tasks", task_id)
+        return self.tasks.get(task_id)
+
+    async def get_tasks_by_id(self, task_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get several tasks by ID in one storage round trip; missing ones are left out
+        """
+        if self.client is not None:
+            # The client's pool bounds how many of these are in flight at once
+            tasks = await asyncio.gather(*(self.get_task(task_id) for task_id in task_ids))
+            return {task_id: task for task_id, task in zip(task_ids, tasks) if task is not None}
+        if self.storage is not None:
+            return await run_storage(self.storage, "get_many", "tasks", list(task_ids))
+        return {task_id: self.tasks[task_id] for task_id in task_ids if task_id in self.tasks}
+
+    async def get_tasks(
+        self,
+        filters: Dict = None,
+        sort_by: str = None,
+        descending: bool = False,
+        limit: int = None,
+        cursor: str = None
+    ) -> List[Dict]:
+        """
+        Get tasks based on optional filters.
+        A filter value is either matched for equality or is a dict of operators
+        (eq, ne, lt, lte, gt, gte, in), e.g. {"deadline": {"lt": "2030-01-01T00:00:00"}}.
+        Deadline and created_at are compared as datetimes. Results come in creation order
+        unless sort_by is given; see get_tasks_page for cursor pagination.
+        """
+        if self.client is not None:
+            page = await self.client.get("/tasks", self._remote_params(filters, sort_by, descending, limit, cursor))
+            return page["tasks"]
+        tasks, _ = await self._run_query(filters, sort_by, descending, limit, cursor)
+        return tasks
+
+    async def get_tasks_page(
+        self,
+        filters: Dict = None,
+        sort_by: str = None,
+        descending: bool = False,
+        limit: int = 100,
+        cursor: str = None
+    ) -> Dict:
+        """
+        Get one page of tasks plus the cursor for the next page (None on the last page)
+        """
+        if self.client is not None:
+            return await self.client.get("/tasks", self._remote_params(filters, sort_by, descending, limit, cursor))
+        tasks, next_cursor = await self._run_query(filters, sort_by, descending, limit, cursor)
+        return {"tasks": tasks, "next_cursor": next_cursor}
+
+    async def _run_query(
+        self,
+        filters: Dict,
+        sort_by: str,
+        descending: bool,
+        limit: int,
+        cursor: str
+    ) -> Tuple[List[Dict], str]:
+        if self._mirror is not None:
+            # Pick up writes from other processes, then answer from the indexes as in memory
+            await self._mirror.sync()
+        return self._query(filters, sort_by, descending, limit, cursor)
+
+    def _sort_key(self, task: Dict, sort_by: str) -> Tuple:
+        # Tasks missing the sort field go last; the sequence number breaks ties
+        seq = self._seq(task["id"])
+        if sort_by is None:
+            return (seq,)
+        value = task.get(sort_by)
+        if sort_by in self.sorted_indexes:
+            value = parse_timestamp(value)
+        return (0, value, seq) if value is not None else (1, seq)
+
+    def _encode_position(self, key: Tuple, sort_by: str) -> str:
+        if sort_by in self.sorted_indexes and key[0] == 0:
+            key = (0, key[1].isoformat(), key[2])
+        return encode_cursor({"sort_by": sort_by, "key": list(key)})
+
+    def _decode_position(self, cursor: str, sort_by: str) -> Tuple:
+        position = decode_cursor(cursor)
+        if not isinstance(position, dict) or position.get("sort_by") != sort_by:
+            raise ValueError("Cursor does not match this query")
+        key = tuple(position["key"])
+        if sort_by in self.sorted_indexes and key[0] == 0:
+            key = (0, parse_timestamp(key[1]), key[2])
+        return key
+
+    def _matches(self, task: Dict, conditions: Dict[str, Dict]) -> bool:
+        for field, operations in conditions.items():
+            value = task.get(field)
+            if field in self.sorted_indexes:
+                value = parse_timestamp(value)
+                if value is None:
+                    return False
+                operations = {
+                    operator: (
+                        [parse_timestamp(item) for item in operand] if operator == "in" else parse_timestamp(operand)
+                    )
+                    for operator, operand in operations.items()
+                }
+            if not all(compare(value, operator, operand) for operator, operand in operations.items()):
+                return False
+        return True
+
+    def _select(
+        self,
+        pool: Iterable[Dict],
+        conditions: Dict[str, Dict],
+        sort_by: str,
+        descending: bool,
+        wanted: int,
+        after: Tuple
+    ) -> List[Dict]:
+        # Filter, resume after the cursor and order a candidate pool
+        tasks = [task for task in pool if self._matches(task, conditions)]
+        if after is not None:
+            if descending:
+                tasks = [task for task in tasks if self._sort_key(task, sort_by) < after]
+            else:
+                tasks = [task for task in tasks if self._sort_key(task, sort_by) > after]
+
+        def key(task: Dict) -> Tuple:
+            return self._sort_key(task, sort_by)
+
+        if wanted is not None:
+            return (heapq.nlargest if descending else heapq.nsmallest)(wanted, tasks, key=key)
+        tasks.sort(key=key, reverse=descending)
+        return tasks
+
+    def _page(self, tasks: List[Dict], sort_by: str, limit: int) -> Tuple[List[Dict], str]:
+        next_cursor = None
+        if limit is not None and len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = self._encode_position(self._sort_key(tasks[-1], sort_by), sort_by)
+        return tasks, next_cursor
+
+    def _query(
+        self,
+        filters: Dict,
+        sort_by: str,
+        descending: bool,
+        limit: int,
+        cursor: str
+    ) -> Tuple[List[Dict], str]:
+        conditions = {field: normalize_conditions(condition) for field, condition in (filters or {}).items()}
+        after = self._decode_position(cursor, sort_by) if cursor else None
+
+        # Hash indexes answer their conditions exactly; intersect the smallest sets first
+        candidates: Set[int] = None
+        for matched in sorted(
+            (self.field_indexes[field].matching(conditions.pop(field))
+             for field in list(conditions) if field in self.field_indexes),
+            key=len
+        ):
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return [], None
+
+        range_field = next((field for field in conditions if field in self.sorted_indexes), None)
+        sorted_index = self.sorted_indexes.get(sort_by)
+        wanted = None if limit is None else limit + 1  # One extra tells whether another page exists
+
+        if sorted_index is not None and (candidates is None or len(candidates) * 8 >= len(sorted_index)):
+            # Walk the sort index in order and stop as soon as the page is full
+            scan_after = None
+            if after is not None:
+                scan_after = (after[1], after[2]) if after[0] == 0 else (None, after[1])
+            seqs = sorted_index.scan(
+                conditions.get(sort_by) if range_field == sort_by else None,
+                descending=descending,
+                after=scan_after
+            )
+            tasks = []
+            for seq in seqs:
+                if candidates is not None and seq not in candidates:
+                    continue
+                task = self.tasks[self._task_id(seq)]
+                if self._matches(task, conditions):
+                    tasks.append(task)
+                    if wanted is not None and len(tasks) >= wanted:
+                        break
+        else:
+            if candidates is not None:
+                seqs = candidates
+            elif range_field is not None:
+                index = self.sorted_indexes[range_field]
+                seqs = index.scan(conditions[range_field])
+            else:
+                seqs = None
+
+            if seqs is None:
+                pool = reversed(self.tasks.values()) if descending and sort_by is None else self.tasks.values()
+            else:
+                pool = (self.tasks[self._task_id(seq)] for seq in seqs)
+            tasks = self._select(pool, conditions, sort_by, descending, wanted, after)
+
+        return self._page(tasks, sort_by, limit)
 
-        filtered_tasks = []
-        for task in self.tasks.values():
-            match = all(task.get(key) == value for key, value in filters.items())
-            if match:
-                filtered_tasks.append(task)
-        return filtered_tasks
 
     async def update_task(self, task_id: str, updates: Dict) -> Dict:
         """
         Update an existing task
         """
+        if self.client is not None:
+            try:
+                return await self.client.patch(f"/tasks/{task_id}", updates)
+            except BackendError as error:
+                if error.status == 404:
+                    raise ValueError("Task not found")
+                raise
+        if self.storage is not None:
+            task = await self.get_task(task_id)
+            if task is None:
+                raise ValueError("Task not found")
+            task.update(updates)
+            task["id"] = task_id
+            await self._persist("tasks", [(task_id, task)])
+            self._apply(task_id, task)
+            return task
         if task_id in self.tasks:
-            self.tasks[task_id].update(updates)
-            return self.tasks[task_id]
+            task = self.tasks[task_id]
+            seq = self._seq(task_id)
+            changed = [field for field in updates if field in self.field_indexes or field in self.sorted_indexes]
+            self._unindex(seq, task, changed)
+            task.update(updates)
+            task["id"] = task_id
+            self._index(seq, task, changed)
+            return task
         raise ValueError("Task not found")
 
     async def delete_task(self, task_id: str) -> bool:
         """
         Delete a task
         """
+        if self.client is not None:
+            try:
+                await self.client.delete(f"/tasks/{task_id}")
+                return True
+            except BackendError as error:
+                if error.status == 404:
+                    return False
+                raise
+        if self.storage is not None:
+            if await self.get_task(task_id) is None:
+                return False
+            reminders = await run_storage(self.storage, "query", "reminders", {"task_id": task_id})
+            await self._forget("tasks", [task_id])
+            await self._forget("reminders", [reminder["id"] for reminder in reminders if "id" in reminder])
+            self._apply(task_id, None)
+            return True
         if task_id in self.tasks:
-            del self.tasks[task_id]
+            self._unindex(self._seq(task_id), self.tasks.pop(task_id))
+            self.reminders.pop(task_id, None)
             return True
         return False
 
@@ -56,9 +400,106 @@ class TaskAPI:
         """
         Create a reminder for a task
         """
-        if task_id not in self.reminders:
-            self.reminders[task_id] = []
-        self.reminders[task_id].append(reminder)
+        if self.client is not None:
+            reminder["id"] = (await self.client.post(f"/tasks/{task_id}/reminders", reminder))["id"]
+            return
+        await self.create_reminders([(task_id, reminder)])
+
+    async def create_reminders(self, reminders: List[Tuple[str, Dict]]):
+        """
+        Create reminders for many (task_id, reminder) pairs with one storage write
+        """
+        if self.client is not None:
+            await asyncio.gather(*(self.create_reminder(task_id, reminder) for task_id, reminder in reminders))
+            return
+        unnamed = [reminder for _, reminder in reminders if "id" not in reminder]
+        for number, reminder in zip(await self._allocate("reminders", self._reminder_ids, len(unnamed)), unnamed):
+            reminder["id"] = f"reminder_{number}"
+        if self.storage is None:
+            for task_id, reminder in reminders:
+                self.reminders.setdefault(task_id, []).append(reminder)
+        await self._persist("reminders", [
+            (reminder["id"], dict(reminder, task_id=task_id)) for task_id, reminder in reminders
+        ])
+
+    async def delete_pending_reminders(self, task_id: str) -> int:
+        """
+        Delete a task's reminders that have not been delivered yet; returns how many there were
+        """
+        if self.client is not None:
+            try:
+                return (await self.client.delete(f"/tasks/{task_id}/reminders") or {}).get("deleted", 0)
+            except BackendError as error:
+                if error.status == 404:
+                    return 0
+                raise
+        if self.storage is not None:
+            reminders = await run_storage(self.storage, "query", "reminders", {"task_id": task_id, "delivered_at": None})
+            await self._forget("reminders", [reminder["id"] for reminder in reminders])
+            return len(reminders)
+        reminders = self.reminders.get(task_id, [])
+        delivered = [reminder for reminder in reminders if reminder.get("delivered_at")]
+        if delivered:
+            self.reminders[task_id] = delivered
+        else:
+            self.reminders.pop(task_id, None)
+        return len(reminders) - len(delivered)
+
+    async def get_pending_reminders(self) -> List[Tuple[str, Dict]]:
+        """
+        (task_id, reminder) pairs not yet delivered, for the reminder dispatcher
+        """
+        if self.storage is None:
+            return [
+                (task_id, reminder)
+                for task_id, reminders in self.reminders.items()
+                for reminder in reminders
+                if not reminder.get("delivered_at")
+            ]
+        # Only the undelivered rows leave the backend
+        stored = await run_storage(self.storage, "query", "reminders", {"delivered_at": None})
+        return [(reminder.pop("task_id"), reminder) for reminder in stored]
+
+    async def mark_reminders_delivered(self, delivered: List[Tuple[str, Dict]], delivered_at: str):
+        """
+        Record that (task_id, reminder) pairs were delivered, in one storage write
+        """
+        for _, reminder in delivered:
+            reminder["delivered_at"] = delivered_at
+        await self._persist("reminders", [
+            (reminder["id"], dict(reminder, task_id=task_id)) for task_id, reminder in delivered if "id" in reminder
+        ])
+
+    async def claim_reminders(self, reminders: List[Tuple[str, Dict]], claimed_at: str) -> List[Tuple[str, Dict]]:
+        """
+        Mark undelivered (task_id, reminder) pairs delivered at claimed_at and return the ones
+        this caller won. The claim is atomic in the store, so dispatchers sharing it never
+        both deliver a reminder.
+        """
+        if self.storage is not None:
+            won = set(await run_storage(
+                self.storage, "compare_and_set", "reminders",
+                [reminder["id"] for _, reminder in reminders if "id" in reminder], "delivered_at", None, claimed_at
+            ))
+            claimed = [(task_id, reminder) for task_id, reminder in reminders if reminder.get("id") in won]
+        else:
+            claimed = [(task_id, reminder) for task_id, reminder in reminders if not reminder.get("delivered_at")]
+        for _, reminder in claimed:
+            reminder["delivered_at"] = claimed_at
+        return claimed
+
+    async def release_reminders(self, reminders: List[Tuple[str, Dict]], claimed_at: str):
+        """
+        Undo claim_reminders for pairs that could not be delivered, so they can be retried
+        """
+        if self.storage is not None:
+            await run_storage(
+                self.storage, "compare_and_set", "reminders",
+                [reminder["id"] for _, reminder in reminders if "id" in reminder], "delivered_at", claimed_at, None
+            )
+        for _, reminder in reminders:
+            if reminder.get("delivered_at") == claimed_at:
+                reminder["delivered_at"] = None
 
 # from typing import Dict, List
 
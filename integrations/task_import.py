@@ -0,0 +1,128 @@
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Union
+
+Chunks = Union[Iterable[bytes], AsyncIterable[bytes]]
+
+
+class InvalidRow(ValueError):
+    """
+    A row that could not be parsed; yielded in place of the row so the import can go on.
+    """
+
+
+async def iter_lines(chunks: Chunks) -> AsyncIterator[str]:
+    """
+    Decode UTF-8 byte chunks into lines without the line break, holding only one partial line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+
+    def split(text: str):
+        nonlocal buffer
+        *lines, buffer = (buffer + text).split("\n")
+        return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            for line in split(decoder.decode(chunk)):
+                yield line
+    else:
+        for chunk in chunks:
+            for line in split(decoder.decode(chunk)):
+                yield line
+    for line in split(decoder.decode(b"", final=True)):
+        yield line
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_jsonl_rows(chunks: Chunks) -> AsyncIterator[Union[Dict, InvalidRow]]:
+    """
+    Parse one JSON object per non-blank line.
+    """
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield InvalidRow(f"Line {number}: invalid JSON ({error})")
+            continue
+        yield row if isinstance(row, dict) else InvalidRow(f"Line {number}: expected a JSON object")
+
+
+def _ends_quoted(line: str, quoted: bool) -> bool:
+    """
+    Whether a line leaves a quoted cell open, given whether it starts inside one. Follows the
+    csv module's rules: a quote opens a cell only at the start of the cell, "" is an escaped quote.
+    """
+    position = 0
+    while True:
+        if quoted:
+            end = line.find('"', position)
+            if end < 0:
+                return True
+            if line.startswith('"', end + 1):
+                position = end + 2
+                continue
+            quoted, position = False, end + 1
+        else:
+            start = line.find('"', position)
+            if start < 0:
+                return False
+            quoted = start == 0 or line[start - 1] == ","
+            position = start + 1
+
+
+async def iter_csv_rows(
+    chunks: Chunks, max_record_size: int = 1 << 20
+) -> AsyncIterator[Union[Dict, InvalidRow]]:
+    """
+    Parse CSV with a header row into dicts. Empty cells are left out, so defaults apply.
+    Quoted cells may span lines; a record longer than max_record_size characters is
+    reported and skipped without being held in memory.
+    """
+    # One reader fed record by record, so it sees the lines exactly as they arrive
+    pending = deque()
+    reader = csv.reader(iter(pending.popleft, None))
+    header = None
+    quoted, size, start = False, 0, 0
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        start = start or number
+        if size <= max_record_size:
+            pending.append(line + "\n")
+        size += len(line) + 1
+        quoted = _ends_quoted(line, quoted)
+        if quoted:
+            continue
+        line_number, oversized = start, size > max_record_size
+        size, start = 0, 0
+        if oversized:
+            pending.clear()
+            yield InvalidRow(f"Line {line_number}: record longer than {max_record_size} characters")
+            continue
+        if not "".join(pending).strip():
+            pending.clear()
+            continue
+        try:
+            cells = next(reader)
+        except csv.Error as error:
+            pending.clear()
+            yield InvalidRow(f"Line {line_number}: {error}")
+            continue
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        if len(cells) > len(header):
+            yield InvalidRow(f"Line {line_number}: {len(cells)} cells for {len(header)} columns")
+            continue
+        yield {column: cell for column, cell in zip(header, cells) if cell != ""}
+    if start:
+        yield InvalidRow(f"Line {start}: unterminated quoted cell")
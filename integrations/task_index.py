@@ -0,0 +1,264 @@
+import base64
+import bisect
+import json
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Set, Tuple
+
+# Filter operators accepted by TaskAPI.get_tasks, e.g. {"deadline": {"lt": "2030-01-01"}}
+OPERATORS: Dict[str, Callable[[object, object], bool]] = {
+    "eq": lambda value, operand: value == operand,
+    "ne": lambda value, operand: value != operand,
+    "lt": lambda value, operand: value < operand,
+    "lte": lambda value, operand: value <= operand,
+    "gt": lambda value, operand: value > operand,
+    "gte": lambda value, operand: value >= operand,
+    "in": lambda value, operand: value in operand,
+}
+
+
+def compare(value, operator: str, operand) -> bool:
+    try:
+        return OPERATORS[operator](value, operand)
+    except TypeError:
+        return False
+
+
+def parse_timestamp(value) -> datetime:
+    """
+    Parse an ISO string or datetime into a naive local datetime; None when it isn't one.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def normalize_conditions(condition) -> Dict[str, object]:
+    """
+    Turn a filter value into {operator: operand}; plain values mean equality.
+    """
+    if isinstance(condition, dict) and condition and set(condition) <= set(OPERATORS):
+        return dict(condition)
+    return {"eq": condition}
+
+
+def encode_cursor(position: Dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Dict:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class FieldIndex:
+    def __init__(self):
+        """
+        Hash index from a low-cardinality field value (status, priority) to task sequence numbers.
+        """
+        self.values: Dict[Hashable, Set[int]] = {}
+
+    def add(self, value, seq: int):
+        if isinstance(value, Hashable):
+            self.values.setdefault(value, set()).add(seq)
+
+    def remove(self, value, seq: int):
+        if isinstance(value, Hashable) and value in self.values:
+            self.values[value].discard(seq)
+            if not self.values[value]:
+                del self.values[value]
+
+    def matching(self, conditions: Dict[str, object]) -> Set[int]:
+        """
+        Return the sequence numbers whose value satisfies every condition.
+        Equality and "in" are direct lookups; other operators test each distinct value once.
+        """
+        if set(conditions) <= {"eq", "in"}:
+            keys = None
+            if "eq" in conditions:
+                keys = {conditions["eq"]} if isinstance(conditions["eq"], Hashable) else set()
+            if "in" in conditions:
+                allowed = {key for key in conditions["in"] if isinstance(key, Hashable)}
+                keys = allowed if keys is None else keys & allowed
+        else:
+            keys = [
+                key for key in self.values
+                if all(compare(key, operator, operand) for operator, operand in conditions.items())
+            ]
+
+        matched: Set[int] = set()
+        for key in keys:
+            matched |= self.values.get(key, set())
+        return matched
+
+
+class SortedKeyList:
+    def __init__(self, load: int = 1000):
+        """
+        Sorted list of tuples split into sublists of about load items, so an insert or
+        delete moves at most a couple of thousand pointers instead of the whole list.
+        """
+        self.load = load
+        self._lists: List[List[Tuple]] = []
+        self._maxes: List[Tuple] = []
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: Tuple):
+        self._len += 1
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            return
+        position = bisect.bisect_left(self._maxes, key)
+        if position == len(self._maxes):
+            position -= 1
+            self._lists[position].append(key)
+            self._maxes[position] = key
+        else:
+            bisect.insort(self._lists[position], key)
+        if len(self._lists[position]) > 2 * self.load:
+            sublist = self._lists[position]
+            self._lists[position:position + 1] = [sublist[:self.load], sublist[self.load:]]
+            self._maxes[position:position + 1] = [sublist[self.load - 1], sublist[-1]]
+
+    def remove(self, key: Tuple) -> bool:
+        position = bisect.bisect_left(self._maxes, key)
+        if position == len(self._maxes):
+            return False
+        sublist = self._lists[position]
+        offset = bisect.bisect_left(sublist, key)
+        if offset == len(sublist) or sublist[offset] != key:
+            return False
+        del sublist[offset]
+        self._len -= 1
+        if sublist:
+            self._maxes[position] = sublist[-1]
+        else:
+            del self._lists[position], self._maxes[position]
+        return True
+
+    def _locate(self, key: Tuple) -> Tuple[int, int]:
+        # (sublist, offset) of the first item >= key; None means the start
+        if key is None:
+            return 0, 0
+        position = bisect.bisect_left(self._maxes, key)
+        if position == len(self._maxes):
+            return position, 0
+        return position, bisect.bisect_left(self._lists[position], key)
+
+    def irange(self, low: Tuple = None, high: Tuple = None, reverse: bool = False) -> Iterator[Tuple]:
+        """
+        Yield the items with low <= item < high (None leaves that side open).
+        """
+        start = self._locate(low)
+        stop = self._locate(high) if high is not None else (len(self._lists), 0)
+        if start >= stop:
+            return
+        if not reverse:
+            position, offset = start
+            while (position, offset) < stop:
+                sublist = self._lists[position]
+                end = stop[1] if position == stop[0] else len(sublist)
+                yield from sublist[offset:end]
+                position, offset = position + 1, 0
+        else:
+            position, end = stop
+            if end == 0:
+                position, end = position - 1, None
+            while position >= start[0]:
+                sublist = self._lists[position]
+                offset = start[1] if position == start[0] else 0
+                end = len(sublist) if end is None else end
+                yield from reversed(sublist[offset:end])
+                position, end = position - 1, None
+
+
+class SortedIndex:
+    def __init__(self):
+        """
+        (timestamp, seq) pairs kept in sorted order, for range predicates and ordered scans.
+        Tasks whose field is missing or unparseable are kept apart and sort last.
+        """
+        self.entries = SortedKeyList()
+        self.missing: Dict[int, None] = {}  # Insertion-ordered set
+
+    def add(self, value, seq: int):
+        timestamp = parse_timestamp(value)
+        if timestamp is None:
+            self.missing[seq] = None
+        else:
+            self.entries.add((timestamp, seq))
+
+    def remove(self, value, seq: int):
+        timestamp = parse_timestamp(value)
+        if timestamp is None:
+            self.missing.pop(seq, None)
+        else:
+            self.entries.remove((timestamp, seq))
+
+    def __len__(self) -> int:
+        return len(self.entries) + len(self.missing)
+
+    @staticmethod
+    def bounds(conditions: Dict[str, object]) -> Tuple[Tuple, Tuple]:
+        """
+        Return the (low, high) keys bracketing the entries that can satisfy the range conditions.
+        """
+        low = high = None
+        for operator, operand in conditions.items():
+            timestamp = parse_timestamp(operand)
+            if timestamp is None:
+                continue
+            # (timestamp,) sorts before every (timestamp, seq); (timestamp, inf) after them
+            if operator in ("gt", "gte", "eq"):
+                edge = (timestamp,) if operator != "gt" else (timestamp, float("inf"))
+                low = edge if low is None else max(low, edge)
+            if operator in ("lt", "lte", "eq"):
+                edge = (timestamp,) if operator == "lt" else (timestamp, float("inf"))
+                high = edge if high is None else min(high, edge)
+        return low, high
+
+    def scan(
+        self,
+        conditions: Dict[str, object] = None,
+        descending: bool = False,
+        after: Tuple[datetime, int] = None
+    ) -> Iterator[int]:
+        """
+        Yield sequence numbers in field order, restricted to the range conditions and
+        resuming strictly after the (timestamp, seq) position when given.
+        A None timestamp in after means the cursor is already inside the missing-value tail.
+        """
+        low, high = self.bounds(conditions) if conditions else (None, None)
+        tail: Iterable[int] = () if conditions else self.missing
+
+        if not descending:
+            if after is not None:
+                if after[0] is None:
+                    yield from (seq for seq in tail if seq > after[1])
+                    return
+                # after + (0,) sorts right after after and before the next entry
+                low = after + (0,) if low is None else max(low, after + (0,))
+            for _, seq in self.entries.irange(low, high):
+                yield seq
+            yield from tail
+        else:
+            if after is None:
+                yield from reversed(list(tail))
+            elif after[0] is None:
+                yield from (seq for seq in reversed(list(tail)) if seq < after[1])
+            else:
+                high = after if high is None else min(high, after)
+            for _, seq in self.entries.irange(low, high, reverse=True):
+                yield seq
@@ -0,0 +1,95 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class InvertedIndex:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Incremental full-text index ranked with BM25.
+        Postings map each term to {document id: weighted term frequency}; adding or removing
+        a document only touches that document's own terms.
+        Args:
+            k1 (float): BM25 term-frequency saturation.
+            b (float): BM25 document-length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[Hashable, float]] = {}
+        self.lengths: Dict[Hashable, float] = {}
+        self.terms: Dict[Hashable, Tuple[str, ...]] = {}  # Forward index, so removal touches only these
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self.lengths
+
+    def add(self, doc_id: Hashable, fields: Iterable[Tuple[str, float]]):
+        """
+        Index a document given as (text, weight) fields, replacing any earlier version.
+        """
+        if doc_id in self.lengths:
+            self.remove(doc_id)
+
+        frequencies: Dict[str, float] = {}
+        for text, weight in fields:
+            # Counter counts in C; weights are applied once per distinct term
+            for term, count in Counter(tokenize(text)).items():
+                frequencies[term] = frequencies.get(term, 0.0) + count * weight
+        postings = self.postings
+        for term, frequency in frequencies.items():
+            documents = postings.get(term)
+            if documents is None:
+                postings[term] = {doc_id: frequency}
+            else:
+                documents[doc_id] = frequency
+        self.terms[doc_id] = tuple(frequencies)
+        length = sum(frequencies.values())
+        self.lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: Hashable) -> bool:
+        length = self.lengths.pop(doc_id, None)
+        if length is None:
+            return False
+        self._total_length -= length
+        for term in self.terms.pop(doc_id):
+            documents = self.postings[term]
+            del documents[doc_id]
+            if not documents:
+                del self.postings[term]
+        return True
+
+    def search(self, query: str, limit: int = 10, candidates: Set[Hashable] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Return up to limit (document id, score) pairs, best first.
+        candidates, when given, restricts the results (e.g. to one sender's mail).
+        """
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average_length = self._total_length / count or 1.0
+        scores: Dict[Hashable, float] = {}
+
+        for term in set(tokenize(query)):
+            documents = self.postings.get(term)
+            if not documents:
+                continue
+            idf = math.log(1 + (count - len(documents) + 0.5) / (len(documents) + 0.5))
+            for doc_id, frequency in documents.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
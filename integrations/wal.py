@@ -0,0 +1,306 @@
+import glob
+import mmap
+import os
+import pickle
+import struct
+import threading
+import zlib
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from integrations.storage import COLLECTIONS, InMemoryStorage, _collection, _row, highest_id_suffix, loads
+
+# Frame: payload length and CRC32, then the payload
+_FRAME = struct.Struct("<II")
+# Payload header: operation, collection name length, record id length
+_ENTRY = struct.Struct("<BBH")
+_PUT, _DELETE, _SEQUENCE = 1, 2, 3
+# A _SEQUENCE entry's data: the collection's last allocated id number
+_COUNTER = struct.Struct("<Q")
+
+
+def encode_entry(operation: int, collection: str, record_id: str, data: bytes = b"") -> bytes:
+    name, key = collection.encode(), record_id.encode()
+    payload = _ENTRY.pack(operation, len(name), len(key)) + name + key + data
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def iter_entries(data) -> Iterator[Tuple[int, int, str, str, bytes]]:
+    """
+    Yield (end offset, operation, collection, record id, data) for each intact frame.
+    Stops at the first torn or corrupt frame, which marks the end of the usable log.
+    """
+    offset, size = 0, len(data)
+    while offset + _FRAME.size <= size:
+        length, checksum = _FRAME.unpack_from(data, offset)
+        start, end = offset + _FRAME.size, offset + _FRAME.size + length
+        if end > size or length < _ENTRY.size:
+            return
+        payload = data[start:end]
+        if zlib.crc32(payload) != checksum:
+            return
+        operation, name_length, key_length = _ENTRY.unpack_from(payload)
+        position = _ENTRY.size
+        collection = payload[position:position + name_length].decode()
+        position += name_length
+        record_id = payload[position:position + key_length].decode()
+        yield end, operation, collection, record_id, payload[position + key_length:]
+        offset = end
+
+
+class WALStorage(InMemoryStorage):
+    def __init__(
+        self,
+        directory: str,
+        sync_commit: bool = True,
+        fsync: bool = True,
+        snapshot_every: int = 100000
+    ):
+        """
+        In-memory store made durable by an append-only write-ahead log.
+        Writers append CRC-framed binary entries to a shared buffer; one flusher thread writes
+        and fsyncs whatever has accumulated, so concurrent writers share a single fsync
+        (group commit). Every snapshot_every entries the state is snapshotted and the log
+        rotated, so recovery loads the latest snapshot (memory-mapped) and replays only the tail.
+        Args:
+            directory (str): Where log segments and snapshots live.
+            sync_commit (bool): Wait until a write is on disk before returning; when False a
+                write returns once buffered and is flushed by the next group commit.
+            fsync (bool): fsync after each group commit (otherwise rely on the OS page cache).
+            snapshot_every (int): Log entries between snapshots.
+        """
+        super().__init__()
+        self.directory = directory
+        self.sync_commit = sync_commit
+        self.blocking = sync_commit  # Buffer-only writes are cheap enough for the event loop
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+
+        self._changed = threading.Condition(self._lock)
+        self._buffer: List[bytes] = []
+        self._appended = 0  # Sequence number of the last buffered entry batch
+        self._durable = 0  # Sequence number of the last batch on disk
+        self._since_snapshot = 0
+        self._closed = False
+        self._error: Exception = None  # Set when the flusher hits an I/O error; the log stops there
+        self._snapshotter: threading.Thread = None
+        self.stats = {"commits": 0, "entries": 0, "snapshots": 0, "replayed": 0}
+
+        self._segment = self._recover()
+        self._log = open(self._segment_path(self._segment), "ab")
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"wal.{segment:08d}.log")
+
+    def _snapshot_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"snapshot.{segment:08d}.pkl")
+
+    @staticmethod
+    def _number(path: str) -> int:
+        return int(os.path.basename(path).split(".")[1])
+
+    def _recover(self) -> int:
+        # Latest snapshot first, then every log segment written after it
+        snapshots = sorted(glob.glob(os.path.join(self.directory, "snapshot.*.pkl")), key=self._number)
+        segment = 0
+        if snapshots:
+            segment = self._number(snapshots[-1])
+            with open(snapshots[-1], "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                state = pickle.loads(data)
+            if "collections" not in state:  # Older snapshots hold only the serialized records
+                state = {"collections": state, "rows": {}}
+            self._sequences.update(state.get("sequences", {}))
+            for name, records in state["collections"].items():
+                rows = state["rows"].get(name, {})
+                for record_id, record in records.items():
+                    row = rows.get(record_id)
+                    self._set(name, record_id, record, row if row is not None else _row(COLLECTIONS[name], loads(record)))
+
+        segments = sorted(
+            (path for path in glob.glob(os.path.join(self.directory, "wal.*.log")) if self._number(path) >= segment),
+            key=self._number
+        )
+        for path in segments:
+            segment = self._number(path)
+            self._replay(path)
+        return segment
+
+    def _replay(self, path: str):
+        size = os.path.getsize(path)
+        if not size:
+            return
+        valid = 0
+        with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for valid, operation, collection, record_id, record in iter_entries(data):
+                if operation == _PUT:
+                    record = record.decode()
+                    self._set(collection, record_id, record, _row(COLLECTIONS[collection], loads(record)))
+                elif operation == _DELETE:
+                    self._unset(collection, record_id)
+                else:
+                    (last,) = _COUNTER.unpack(record)
+                    self._sequences[collection] = max(self._sequences.get(collection, 0), last)
+                self.stats["replayed"] += 1
+                self._since_snapshot += 1
+        if valid < size:
+            # A crash mid-write leaves a torn frame at the tail; drop it so appends stay aligned
+            with open(path, "r+b") as handle:
+                handle.truncate(valid)
+
+    def _append(self, apply: Callable[[], List[bytes]]) -> int:
+        # apply changes the in-memory state under the lock and returns the entries recording it
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("Storage is closed")
+            self._raise_if_failed()
+            entries = apply()
+            if not entries:
+                return 0  # Nothing to log, so nothing to wait for
+            self._buffer.extend(entries)
+            self._appended += 1
+            self._since_snapshot += len(entries)
+            self._changed.notify_all()
+            return self._appended
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise RuntimeError(f"Write-ahead log failed: {self._error}") from self._error
+
+    def _wait_durable(self, sequence: int):
+        if self.sync_commit:
+            with self._changed:
+                self._changed.wait_for(lambda: self._durable >= sequence or self._error is not None)
+                if self._durable < sequence:
+                    self._raise_if_failed()
+
+    def put_many(self, collection: str, records: List[Tuple[str, Dict]]):
+        encoded = self._serialize(collection, records)
+        entries = [encode_entry(_PUT, collection, record_id, data.encode()) for record_id, data, _ in encoded]
+
+        def apply() -> List[bytes]:
+            self._store(collection, encoded)
+            return entries
+
+        self._wait_durable(self._append(apply))
+
+    def delete_many(self, collection: str, record_ids: List[str]):
+        entries = [encode_entry(_DELETE, collection, record_id) for record_id in record_ids]
+
+        def apply() -> List[bytes]:
+            self._discard(collection, record_ids)
+            return entries
+
+        self._wait_durable(self._append(apply))
+
+    def compare_and_set(self, collection: str, record_ids: List[str], field: str, expected, value) -> List[str]:
+        swapped = []
+
+        def apply() -> List[bytes]:
+            swapped.extend(self._swap(collection, record_ids, field, expected, value))
+            if swapped:
+                self._store(collection, swapped)
+            return [encode_entry(_PUT, collection, record_id, data.encode()) for record_id, data, _ in swapped]
+
+        self._wait_durable(self._append(apply))
+        return [record_id for record_id, _, _ in swapped]
+
+    def allocate_ids(self, collection: str, count: int = 1) -> int:
+        _collection(collection)
+        reserved = []
+
+        def apply() -> List[bytes]:
+            # The advance is logged, so a deleted highest record's number isn't handed out again after a restart
+            last = self._sequences.get(collection)
+            if last is None:
+                last = highest_id_suffix(self.collections[collection])
+            self._sequences[collection] = last + count
+            reserved.append(last + 1)
+            return [encode_entry(_SEQUENCE, collection, "", _COUNTER.pack(last + count))]
+
+        self._wait_durable(self._append(apply))
+        return reserved[0]
+
+    def _flush_loop(self):
+        try:
+            self._flush_batches()
+        except Exception as error:
+            # Wake every waiting writer with the error instead of leaving them blocked
+            with self._changed:
+                self._error = error
+                self._changed.notify_all()
+
+    def _flush_batches(self):
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._buffer or self._closed)
+                if not self._buffer and self._closed:
+                    return
+                # Everything buffered while the previous fsync ran goes out as one group
+                entries, self._buffer = self._buffer, []
+                sequence = self._appended
+                snapshot = None
+                snapshotting = self._snapshotter is not None and self._snapshotter.is_alive()
+                if self._since_snapshot >= self.snapshot_every and not snapshotting:
+                    # Indexed rows go along, so recovery needn't decode every record to rebuild them
+                    snapshot = {
+                        "collections": {name: dict(records) for name, records in self.collections.items()},
+                        "rows": {name: dict(rows) for name, rows in self.rows.items()},
+                        "sequences": dict(self._sequences),
+                    }
+                    self._since_snapshot = 0
+
+            self._log.write(b"".join(entries))
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+
+            with self._changed:
+                self._durable = sequence
+                self.stats["commits"] += 1
+                self.stats["entries"] += len(entries)
+                self._changed.notify_all()
+
+            if snapshot is not None:
+                # The copy reflects every entry written so far, so later entries start a new segment
+                self._log.close()
+                self._segment += 1
+                self._log = open(self._segment_path(self._segment), "ab")
+                # Pickling a large state takes a while; keep committing meanwhile
+                self._snapshotter = threading.Thread(
+                    target=self._write_snapshot, args=(snapshot, self._segment), name="wal-snapshot"
+                )
+                self._snapshotter.start()
+
+    def _write_snapshot(self, state: Dict[str, Dict], segment: int):
+        path = self._snapshot_path(segment)
+        with open(path + ".tmp", "wb") as handle:
+            pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(path + ".tmp", path)
+        # Older snapshots and the segments they cover are no longer needed
+        for old in glob.glob(os.path.join(self.directory, "snapshot.*.pkl")) + glob.glob(
+            os.path.join(self.directory, "wal.*.log")
+        ):
+            if self._number(old) < segment:
+                os.remove(old)
+        self.stats["snapshots"] += 1
+
+    def snapshot(self):
+        """
+        Request a snapshot at the next group commit.
+        """
+        with self._changed:
+            self._since_snapshot = self.snapshot_every
+            self._changed.notify_all()
+
+    def close(self):
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+        self._flusher.join()
+        if self._snapshotter is not None:
+            self._snapshotter.join()
+        self._log.close()
@@ -1,11 +1,23 @@
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Form
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from core.ai_engine import AIEngine
 from core.email_processor import EmailProcessor
 from core.meeting_scheduler import MeetingScheduler
-from core.task_manager import TaskManager
+from core.task_manager import InvalidTask, TaskManager
+from core.model_registry import model_registry
+from core.result_cache import result_cache
+from core.inference import InferenceQueueFullError, InferenceTimeoutError, inference_executor
+from integrations.http_client import close_clients
+from integrations.storage import get_storage
+from integrations.task_import import iter_csv_rows, iter_jsonl_rows
 from datetime import datetime
+import asyncio
+import hashlib
+import json
+import os
+import orjson
 
 app = FastAPI()
 
@@ -14,10 +26,66 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # Initialize core components
+ai_engine = AIEngine()
 email_processor = EmailProcessor()
 meeting_scheduler = MeetingScheduler()
 task_manager = TaskManager()
 
+@app.on_event("startup")
+async def warm_up_models():
+    # Models load lazily on first use; set WARM_UP_MODELS=1 to load them in the
+    # background right after startup so the server can accept requests immediately
+    if os.getenv("WARM_UP_MODELS", "").lower() in ("1", "true", "yes"):
+        asyncio.get_event_loop().run_in_executor(None, model_registry.warm_up)
+
+@app.on_event("startup")
+async def start_reminders():
+    await task_manager.reminder_dispatcher.start()
+
+@app.on_event("shutdown")
+async def stop_reminders():
+    await task_manager.reminder_dispatcher.stop()
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    inference_executor.shutdown(wait=False)
+
+@app.on_event("shutdown")
+async def finish_invitations():
+    # Invitations are delivered after the scheduling response; let them finish
+    await meeting_scheduler.wait_for_invitations()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    # Runs after finish_invitations, so pending invitation requests still have their pool
+    await close_clients()
+
+@app.on_event("shutdown")
+async def close_storage():
+    storage = get_storage()
+    if storage is not None:
+        storage.close()
+
+@app.exception_handler(InferenceQueueFullError)
+async def inference_queue_full(request: Request, exc: InferenceQueueFullError):
+    return JSONResponse({"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+@app.exception_handler(InferenceTimeoutError)
+async def inference_timeout(request: Request, exc: InferenceTimeoutError):
+    return JSONResponse({"detail": str(exc)}, status_code=504)
+
+@app.get("/models/status")
+async def models_status():
+    return JSONResponse(model_registry.report())
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return JSONResponse(result_cache.stats())
+
+@app.get("/reminders/status")
+async def reminders_status():
+    return JSONResponse(task_manager.reminder_dispatcher.report())
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
     return templates.TemplateResponse("dashboard.html", {"request": request})
@@ -40,8 +108,51 @@ async def process_email(request: Request, content: str = Form(...), sender: str
     result = await email_processor.process(email_data)
     return templates.TemplateResponse("email.html", {"request": request, "result": result})
 
+async def _iter_jsonl(request: Request):
+    # Parse newline-delimited JSON from the request body as it arrives
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+@app.post("/email/process/batch")
+async def process_email_batch(request: Request, batch_size: int = 64, n_process: int = 1):
+    # Accepts a JSON array or JSONL (one email object per line) and streams JSONL results back
+    if request.headers.get("content-type", "").startswith("application/json"):
+        emails = json.loads(await request.body())
+    else:
+        emails = _iter_jsonl(request)
+
+    async def results():
+        async for result in email_processor.process_many(emails, batch_size=batch_size, n_process=n_process):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 
 
+@app.post("/ai/summarize/stream")
+async def summarize_stream(request: Request):
+    # Body: {"text": ..., optional "max_length", "min_length", "chunk_tokens"};
+    # streams JSONL partial chunk summaries followed by the final summary
+    payload = await request.json()
+    options = {
+        key: int(payload[key])
+        for key in ("max_length", "min_length", "chunk_tokens")
+        if key in payload
+    }
+
+    async def events():
+        async for event in ai_engine.summarize_long_text_stream(payload["text"], **options):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @app.post("/meeting/schedule")
 async def schedule_meeting(request: Request, title: str = Form(...), participants: str = Form(...)):
     participants_list = participants.split(",")
@@ -61,13 +172,147 @@ async def manage_task(request: Request, task_name: str = Form(...), deadline: st
     task_data = {"name": task_name, "deadline": deadline}
     result = await task_manager.process_task(task_data)
 
-    # Preprocess the task details for template rendering
+    # Format copies for the template; the stored reminders keep their datetimes for dispatch
     if "reminders" in result:
-        for reminder in result["reminders"]:
-            reminder["time"] = reminder["time"].strftime("%Y-%m-%d %H:%M:%S")
+        result["reminders"] = [
+            {**reminder, "time": reminder["time"].strftime("%Y-%m-%d %H:%M:%S")}
+            for reminder in result["reminders"]
+        ]
 
     return templates.TemplateResponse("task.html", {"request": request, "result": result})
 
+@app.post("/task/import")
+async def import_tasks(request: Request, batch_size: int = 1000):
+    # Accepts streamed CSV (text/csv, with a header row) or JSONL and streams one JSONL result
+    # per row, then a summary line; bad rows are reported without stopping the import
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        rows = iter_csv_rows(request.stream())
+    else:
+        rows = iter_jsonl_rows(request.stream())
+
+    async def results():
+        counts = {"created": 0, "error": 0}
+        async for result in task_manager.import_tasks(rows, batch_size=batch_size):
+            counts[result["status"]] += 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"summary": counts}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# Versioned JSON API for automation clients, next to the HTML routes
+API_V1 = "/api/v1"
+MAX_PAGE_SIZE = 1000
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 7232 asks for If-None-Match
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+def api_response(request: Request, payload, status_code: int = 200) -> Response:
+    # orjson encodes datetimes (ISO 8601) and numpy values natively, so results go out as they are
+    body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    if request.method != "GET":
+        return Response(body, status_code=status_code, media_type="application/json")
+    # Pollers that send back the ETag get an empty 304 while the payload is unchanged
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+async def _json_object(request: Request) -> dict:
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="Body must be a JSON object")
+    return payload
+
+@app.post(f"{API_V1}/emails/process")
+async def api_process_email(request: Request):
+    payload = await _json_object(request)
+    if not isinstance(payload.get("content"), str):
+        raise HTTPException(status_code=422, detail="content is required")
+    return api_response(request, await email_processor.process(payload))
+
+@app.post(f"{API_V1}/meetings")
+async def api_schedule_meeting(request: Request):
+    payload = await _json_object(request)
+    if not payload.get("participants") or not isinstance(payload["participants"], list):
+        raise HTTPException(status_code=422, detail="participants must be a non-empty list")
+    result = await meeting_scheduler.schedule(payload)
+    return api_response(request, result, status_code=201 if result["success"] else 409)
+
+@app.post(f"{API_V1}/tasks")
+async def api_create_task(request: Request):
+    payload = await _json_object(request)
+    try:
+        result = await task_manager.process_task(payload)
+    except ValueError as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    return api_response(request, result, status_code=201)
+
+@app.get(f"{API_V1}/tasks")
+async def api_list_tasks(
+    request: Request,
+    filters: str = None,
+    sort_by: str = None,
+    descending: bool = False,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None
+):
+    # filters is a JSON object in TaskAPI.get_tasks form, e.g. {"status": "pending"}
+    try:
+        filters = orjson.loads(filters) if filters else None
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="filters is not valid JSON")
+    if filters is not None and not isinstance(filters, dict):
+        raise HTTPException(status_code=400, detail="filters must be a JSON object")
+    try:
+        page = await task_manager.get_tasks_page(
+            filters, sort_by=sort_by, descending=descending, limit=limit, cursor=cursor
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return api_response(request, page)
+
+@app.patch(f"{API_V1}/tasks/{{task_id}}")
+async def api_update_task(request: Request, task_id: str):
+    updates = await _json_object(request)
+    try:
+        task = await task_manager.update_task(task_id, updates)
+    except InvalidTask as error:
+        raise HTTPException(status_code=422, detail=str(error))
+    except ValueError as error:
+        raise HTTPException(status_code=404, detail=str(error))
+    return api_response(request, task)
+
+@app.get(f"{API_V1}/calendars/{{user_email}}/events")
+async def api_list_events(
+    request: Request,
+    user_email: str,
+    start: datetime = None,
+    end: datetime = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str = None
+):
+    # Events starting in [start, end), in start order. Stored times are naive local time,
+    # so bounds with an offset (e.g. ...Z) are converted to match
+    start, end = (
+        bound.astimezone().replace(tzinfo=None) if bound is not None and bound.tzinfo else bound
+        for bound in (start, end)
+    )
+    try:
+        page = await meeting_scheduler.calendar_api.get_calendar_page(user_email, start, end, limit, cursor)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    return api_response(request, page)
+
 # Add this to run the application
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+from core.availability_grid import AvailabilityGrid
+from core.free_time import candidate_starts, merge_intervals, subtract_intervals, working_windows
+
+MONDAY = datetime(2026, 1, 5)
+
+
+def at(hour: float, day: int = 0) -> datetime:
+    return MONDAY + timedelta(days=day, hours=hour)
+
+
+def test_merge_intervals_sweeps_several_calendars():
+    alice = [(at(9), at(10)), (at(13), at(14))]
+    bob = [(at(9.5), at(11)), (at(11), at(12)), (at(15), at(16))]
+    assert merge_intervals([alice, bob]) == [(at(9), at(12)), (at(13), at(14)), (at(15), at(16))]
+    assert merge_intervals([[], []]) == []
+
+
+def test_working_windows_skip_weekends_and_clip():
+    windows = working_windows(at(12), at(10, day=7))
+    assert windows[0] == (at(12), at(17))
+    assert len(windows) == 6  # Mon (clipped) to Fri, then next Monday until 10:00
+    assert windows[-1] == (at(9, day=7), at(10, day=7))
+    assert all(start.weekday() < 5 for start, _ in windows)
+
+
+def test_free_ranges_and_candidate_starts():
+    windows = working_windows(at(0), at(23))
+    busy = merge_intervals([[(at(8), at(10)), (at(12), at(13))], [(at(12.5), at(14))]])
+    free = subtract_intervals(windows, busy)
+    assert free == [(at(10), at(12)), (at(14), at(17))]
+
+    hour = timedelta(hours=1)
+    assert candidate_starts(free, hour) == [at(10), at(14)]
+    assert candidate_starts(free, hour, granularity=hour) == [at(10), at(11), at(14), at(15), at(16)]
+    assert candidate_starts(free, hour, granularity=hour, limit=3) == [at(10), at(11), at(14)]
+    assert candidate_starts(free, timedelta(hours=4)) == []
+
+
+def test_grid_common_starts():
+    grid = AvailabilityGrid(["a", "b"], at(9), at(12), resolution=30)
+    grid.mark_busy({"a": [(at(9), at(10))], "b": [(at(10.5), at(11))]})
+    assert grid.common_starts(30) == [at(10), at(11), at(11.5)]
+    assert grid.common_starts(60) == [at(11)]
+    grid.restrict_to([(at(9), at(11.5))])
+    assert grid.common_starts(30) == [at(10), at(11)]
+
+
+def test_grid_quorum_prefers_best_attended():
+    grid = AvailabilityGrid(["a", "b", "c"], at(9), at(11), resolution=30)
+    grid.mark_busy({"a": [(at(9), at(9.5))], "b": [(at(9), at(10))], "c": [(at(10.5), at(11))]})
+    slots = grid.quorum_starts(30, quorum=2)
+    assert [slot["start"] for slot in slots] == [at(10), at(9.5), at(10.5)]
+    assert slots[0]["free_count"] == 3 and slots[0]["unavailable"] == []
+    assert slots[1]["unavailable"] == ["b"]
+    assert slots[2]["unavailable"] == ["c"]
+    # Nobody can make 9:00 except c, so it falls below quorum
+    assert all(slot["start"] != at(9) for slot in slots)
+    assert grid.quorum_starts(30, quorum=3, limit=1)[0]["start"] == at(10)
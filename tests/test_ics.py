@@ -0,0 +1,111 @@
+import io
+import time
+from datetime import datetime
+
+import pytest
+
+from integrations import ics
+from integrations.ics import iter_ics_events
+
+
+@pytest.fixture(autouse=True)
+def utc_local_time(monkeypatch):
+    """
+    Events come out in naive local time; pin local time to UTC so expectations are fixed.
+    """
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    ics._local_offset.cache_clear()
+    ics._zone_shift.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    ics._local_offset.cache_clear()
+    ics._zone_shift.cache_clear()
+
+
+def calendar(*events: str) -> io.BytesIO:
+    body = "".join(f"BEGIN:VEVENT\r\n{event.strip()}\r\nEND:VEVENT\r\n" for event in events)
+    return io.BytesIO(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{body}END:VCALENDAR\r\n".replace("\n    ", "\n").encode())
+
+
+def starts(events) -> list:
+    return sorted(event["start_time"] for event in events)
+
+
+def test_one_off_event_with_tzid_and_utc():
+    source = calendar(
+        """UID:a
+    SUMMARY:Standup\\, daily
+    DTSTART;TZID=America/New_York:20260115T100000
+    DURATION:PT30M
+    ATTENDEE:mailto:bob@example.com""",
+        """UID:b
+    DTSTART:20260115T100000Z
+    DTEND:20260115T110000Z""",
+    )
+    first, second = iter_ics_events(source)
+    assert first["title"] == "Standup, daily"
+    assert first["start_time"] == datetime(2026, 1, 15, 15)
+    assert first["end_time"] == datetime(2026, 1, 15, 15, 30)
+    assert first["participants"] == ["bob@example.com"]
+    assert second["start_time"] == datetime(2026, 1, 15, 10)
+
+
+def test_recurrence_with_exdate_in_window():
+    source = calendar(
+        """UID:weekly
+    DTSTART:20260105T090000Z
+    DTEND:20260105T100000Z
+    RRULE:FREQ=WEEKLY;COUNT=6
+    EXDATE:20260119T090000Z"""
+    )
+    events = list(iter_ics_events(source, datetime(2026, 1, 10), datetime(2026, 2, 3)))
+    assert starts(events) == [datetime(2026, 1, 12, 9), datetime(2026, 1, 26, 9), datetime(2026, 2, 2, 9)]
+    assert all("rrule" not in event for event in events)
+
+    # Without a window the series comes back once, unexpanded
+    (master,) = iter_ics_events(calendar("UID:weekly\nDTSTART:20260105T090000Z\nRRULE:FREQ=DAILY"))
+    assert master["rrule"] == "FREQ=DAILY"
+
+
+def test_recurrence_keeps_wall_clock_time_of_its_tzid_across_dst():
+    source = calendar(
+        """UID:berlin
+    DTSTART;TZID=Europe/Berlin:20260323T090000
+    DTEND;TZID=Europe/Berlin:20260323T093000
+    RRULE:FREQ=WEEKLY;UNTIL=20260406T090000"""
+    )
+    events = list(iter_ics_events(source, datetime(2026, 3, 1), datetime(2026, 5, 1)))
+    # 09:00 in Berlin is 08:00 UTC before the switch to summer time on 29 March, 07:00 after
+    assert starts(events) == [datetime(2026, 3, 23, 8), datetime(2026, 3, 30, 7), datetime(2026, 4, 6, 7)]
+
+
+def test_overrides_and_cancellations():
+    source = calendar(
+        # Instances may come before their series in the file
+        """UID:series
+    RECURRENCE-ID:20260107T090000Z
+    DTSTART:20260107T140000Z
+    DTEND:20260107T150000Z
+    SUMMARY:Moved""",
+        """UID:series
+    DTSTART:20260105T090000Z
+    DTEND:20260105T100000Z
+    RRULE:FREQ=DAILY;COUNT=5
+    SUMMARY:Daily""",
+        """UID:series
+    RECURRENCE-ID:20260108T090000Z
+    DTSTART:20260108T090000Z
+    STATUS:CANCELLED""",
+        """UID:gone
+    DTSTART:20260106T120000Z
+    STATUS:CANCELLED""",
+    )
+    events = list(iter_ics_events(source, datetime(2026, 1, 1), datetime(2026, 2, 1)))
+    assert [(event["title"], event["start_time"]) for event in sorted(events, key=lambda event: event["start_time"])] == [
+        ("Daily", datetime(2026, 1, 5, 9)),
+        ("Daily", datetime(2026, 1, 6, 9)),
+        ("Moved", datetime(2026, 1, 7, 14)),
+        ("Daily", datetime(2026, 1, 9, 9)),
+    ]
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from integrations.interval_index import IntervalIndex
+
+BASE = datetime(2026, 1, 5, 9)
+
+
+def at(minutes: int) -> datetime:
+    return BASE + timedelta(minutes=minutes)
+
+
+def build(*events) -> IntervalIndex:
+    index = IntervalIndex()
+    for event_id, start, end in events:
+        index.add(event_id, at(start), at(end), {"id": event_id})
+    return index
+
+
+def ids(events) -> list:
+    return [event["id"] for event in events]
+
+
+def test_overlapping_and_is_free():
+    index = build(("a", 0, 60), ("b", 30, 90), ("c", 120, 150))
+    assert ids(index.overlapping(at(45), at(60))) == ["a", "b"]
+    assert ids(index.overlapping(at(90), at(120))) == []
+    # Touching intervals don't overlap
+    assert index.is_free(at(90), at(120))
+    assert not index.is_free(at(100), at(125))
+    assert index.busy_intervals(at(140), at(200)) == [(at(120), at(150))]
+
+
+def test_add_replaces_and_remove():
+    index = build(("a", 0, 60), ("b", 30, 90))
+    index.add("a", at(200), at(210), {"id": "a"})
+    assert len(index) == 2
+    assert ids(index) == ["b", "a"]
+    assert index.is_free(at(0), at(30))
+
+    assert index.remove("b")
+    assert not index.remove("b")
+    assert "b" not in index
+    assert index.get("b") is None
+    assert index.get("a") == {"id": "a"}
+
+
+def test_window_shrinks_after_removing_longest_event():
+    # A long event widens the look-back window; removing it must shrink it again,
+    # while a second event of the same duration keeps it
+    index = build(("short", 0, 30), ("long", 0, 600), ("long2", 60, 660))
+    assert index._max_duration == timedelta(minutes=600)
+    index.remove("long")
+    assert index._max_duration == timedelta(minutes=600)
+    index.remove("long2")
+    assert index._max_duration == timedelta(minutes=30)
+    assert ids(index.overlapping(at(10), at(20))) == ["short"]
+    assert index.is_free(at(300), at(400))
+
+
+def test_scan_resumes_after_position_even_if_deleted():
+    index = build(("a", 0, 30), ("b", 0, 30), ("c", 0, 30), ("d", 60, 90))
+    first = list(index.scan())[:2]
+    assert ids(first) == ["a", "b"]
+    index.remove("b")
+    # Same-start events after the deleted cursor event are not skipped
+    assert ids(index.scan(after=(at(0), "b"))) == ["c", "d"]
+    assert ids(index.scan(after=(at(0), "a"))) == ["c", "d"]
+    assert ids(index.scan(at(0), at(60))) == ["a", "c"]
+    assert ids(index.starting_between(at(30), at(120))) == ["d"]
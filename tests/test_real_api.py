@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from core.reminder_dispatcher import ReminderDispatcher
+from integrations.calendar_api import CalendarAPI
+from integrations.http_client import close_clients
+from integrations.stub_server import run_stub_server
+from integrations.task_api import TaskAPI
+
+
+@pytest.fixture
+def stub():
+    """
+    Serve the stub backend from its own thread and event loop, so the app under test
+    reaches it over a real socket; yields (base URL, backend).
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    stop = asyncio.Event()
+    served = {}
+
+    async def serve():
+        async with run_stub_server() as (url, backend):
+            served.update(url=url, backend=backend)
+            started.set()
+            await stop.wait()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True)
+    thread.start()
+    assert started.wait(5)
+    yield served["url"], served["backend"]
+    loop.call_soon_threadsafe(stop.set)
+    thread.join(5)
+
+
+@pytest.fixture
+def real_api_app(stub, monkeypatch):
+    url, backend = stub
+    task_api = TaskAPI(api_key="test-key", api_url=url)
+    calendar_api = CalendarAPI(api_key="test-key", api_url=url)
+    monkeypatch.setattr(main.task_manager, "task_api", task_api)
+    monkeypatch.setattr(main.task_manager, "reminder_dispatcher", ReminderDispatcher(task_api))
+    monkeypatch.setattr(main.meeting_scheduler, "calendar_api", calendar_api)
+    monkeypatch.setattr(main.meeting_scheduler, "background_invitations", False)
+    # Entering the client runs the startup and shutdown hooks on one loop, so the pooled
+    # HTTP sessions are created and closed there
+    with TestClient(main.app) as client:
+        yield client, backend
+
+
+def test_schedule_meeting_against_stub(real_api_app):
+    client, backend = real_api_app
+    response = client.post(
+        "/meeting/schedule", data={"title": "Sync", "participants": "a@example.com,b@example.com"}
+    )
+    assert response.status_code == 200
+    events = asyncio.run(backend.calendar.get_calendar("a@example.com"))
+    assert len(events) == 1
+    assert {invitation["event_id"] for invitation in backend.invitations} == {events[0]["id"]}
+
+
+def test_manage_task_against_stub(real_api_app):
+    client, backend = real_api_app
+    deadline = (datetime.now() + timedelta(days=3)).isoformat()
+    response = client.post("/task/manage", data={"task_name": "Report", "deadline": deadline})
+    assert response.status_code == 200
+    tasks = asyncio.run(backend.tasks.get_tasks())
+    assert [task["name"] for task in tasks] == ["Report"]
+    assert asyncio.run(backend.tasks.get_pending_reminders())
+
+
+def test_dispatcher_reads_tasks_through_api(stub):
+    url, backend = stub
+
+    async def run():
+        task_api = TaskAPI(api_key="test-key", api_url=url)
+        try:
+            task = await task_api.create_task({"name": "Call", "status": "pending"})
+            dispatcher = ReminderDispatcher(task_api)
+            due = datetime.now()
+            batch = [(due, 0, task["id"], {"type": "deadline"}, 0, 0), (due, 1, "task_missing", {"type": "deadline"}, 0, 0)]
+            tasks = await dispatcher._live_tasks(batch)
+            assert {task_id: task["name"] for task_id, task in tasks.items()} == {task["id"]: "Call"}
+        finally:
+            await close_clients()
+
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+import asyncio
+
+from integrations.task_import import InvalidRow, iter_csv_rows, iter_jsonl_rows, iter_lines
+
+
+def chunked(data: str, size: int = 7) -> list:
+    encoded = data.encode()
+    return [encoded[i:i + size] for i in range(0, len(encoded), size)]
+
+
+def collect(rows) -> list:
+    async def run():
+        return [row async for row in rows]
+
+    return asyncio.run(run())
+
+
+def errors(rows: list) -> list:
+    return [str(row) for row in rows if isinstance(row, InvalidRow)]
+
+
+def test_lines_survive_split_characters_and_crlf():
+    lines = collect(iter_lines(chunked("naïve café\r\nsecond\nlast", size=3)))
+    assert lines == ["naïve café", "second", "last"]
+
+
+def test_csv_rows_with_multiline_cells_and_empty_cells():
+    data = 'name,priority,description\r\nReport,2,"line one\nline ""two"""\r\nCall,,\r\n\r\nPlan,1,x\n'
+    rows = collect(iter_csv_rows(chunked(data)))
+    assert rows == [
+        {"name": "Report", "priority": "2", "description": 'line one\nline "two"'},
+        {"name": "Call"},
+        {"name": "Plan", "priority": "1", "description": "x"},
+    ]
+
+
+def test_csv_error_rows_are_reported_and_import_goes_on():
+    data = 'name,priority\nA,1\nB,2,extra\nC,3\n"D,4\n'
+    rows = collect(iter_csv_rows(chunked(data)))
+    assert [row["name"] for row in rows if not isinstance(row, InvalidRow)] == ["A", "C"]
+    assert errors(rows) == ["Line 3: 3 cells for 2 columns", "Line 5: unterminated quoted cell"]
+
+
+def test_csv_oversized_record_is_skipped():
+    huge = "x" * 500
+    data = f'name,notes\nsmall,ok\nbig,"{huge}\n{huge}"\nafter,ok\nalso,{huge}\n'
+    rows = collect(iter_csv_rows(chunked(data, size=64), max_record_size=200))
+    assert [row["name"] for row in rows if not isinstance(row, InvalidRow)] == ["small", "after"]
+    assert errors(rows) == [
+        "Line 3: record longer than 200 characters",
+        "Line 6: record longer than 200 characters",
+    ]
+
+
+def test_jsonl_rows():
+    data = '{"name": "A"}\n\nnot json\n[1, 2]\n{"name": "B"}'
+    rows = collect(iter_jsonl_rows(chunked(data)))
+    assert [row["name"] for row in rows if not isinstance(row, InvalidRow)] == ["A", "B"]
+    assert [message.split(":")[0] for message in errors(rows)] == ["Line 3", "Line 4"]
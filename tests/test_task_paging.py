@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from integrations.storage import InMemoryStorage, SQLiteStorage
+from integrations.task_api import TaskAPI
+
+
+@pytest.fixture(params=["memory", "in-memory storage", "sqlite"])
+def make_api(request, tmp_path, monkeypatch):
+    """
+    Yields a factory for TaskAPIs sharing one store, so writes made through one
+    instance show up in another's pages as they would across worker processes.
+    """
+    monkeypatch.delenv("STORAGE_URL", raising=False)
+    if request.param == "memory":
+        api = TaskAPI()
+        yield lambda: api
+        return
+    storage = InMemoryStorage() if request.param == "in-memory storage" else SQLiteStorage(str(tmp_path / "tasks.db"))
+    yield lambda: TaskAPI(storage=storage)
+    storage.close()
+
+
+def collect(api: TaskAPI, pages: list, **query) -> list:
+    """
+    Page through the tasks, running pages[i] (if any) before fetching page i + 1.
+    """
+    async def run():
+        names, cursor, page_number = [], None, 0
+        while True:
+            page = await api.get_tasks_page(limit=2, cursor=cursor, **query)
+            names += [task["name"] for task in page["tasks"]]
+            cursor = page["next_cursor"]
+            if page_number < len(pages):
+                await pages[page_number]()
+            page_number += 1
+            if cursor is None:
+                return names
+
+    return asyncio.run(run())
+
+
+def test_paging_in_creation_order_across_inserts_and_deletes(make_api):
+    api, writer = make_api(), make_api()
+    created = asyncio.run(api.create_tasks([{"name": f"t{i}", "status": "pending"} for i in range(6)]))
+
+    async def after_first_page():
+        # An already-sent task and an unsent one go away; a new task lands at the end
+        await writer.delete_task(created[0]["id"])
+        await writer.delete_task(created[3]["id"])
+        await writer.create_task({"name": "t6", "status": "pending"})
+
+    assert collect(api, [after_first_page]) == ["t0", "t1", "t2", "t4", "t5", "t6"]
+
+
+def test_paging_by_deadline_keeps_ties_and_missing_values(make_api):
+    api, writer = make_api(), make_api()
+    created = asyncio.run(api.create_tasks([
+        {"name": "late", "deadline": "2026-03-01T00:00:00"},
+        {"name": "none"},
+        {"name": "early-a", "deadline": "2026-01-01T00:00:00"},
+        {"name": "early-b", "deadline": "2026-01-01T00:00:00"},
+        {"name": "mid", "deadline": "2026-02-01T00:00:00"},
+    ]))
+
+    async def after_first_page():
+        # The cursor's own task is deleted; paging resumes after its position anyway
+        await writer.delete_task(created[3]["id"])
+        await writer.create_task({"name": "earliest", "deadline": "2025-12-01T00:00:00"})
+        await writer.create_task({"name": "mid-b", "deadline": "2026-02-01T00:00:00"})
+
+    names = collect(api, [after_first_page], sort_by="deadline")
+    assert names == ["early-a", "early-b", "mid", "mid-b", "late", "none"]
+    assert collect(api, [], sort_by="deadline", descending=True)[:2] == ["none", "late"]
+
+
+def test_cursor_must_match_query(make_api):
+    api = make_api()
+    asyncio.run(api.create_tasks([{"name": f"t{i}"} for i in range(3)]))
+    cursor = asyncio.run(api.get_tasks_page(limit=1))["next_cursor"]
+    with pytest.raises(ValueError):
+        asyncio.run(api.get_tasks_page(limit=1, cursor=cursor, sort_by="deadline"))
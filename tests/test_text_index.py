@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from integrations.text_index import InvertedIndex, tokenize
+
+
+def ranked(index: InvertedIndex, query: str, **options) -> list:
+    return [doc_id for doc_id, _ in index.search(query, **options)]
+
+
+def test_tokenize():
+    assert tokenize("Re: Q3 Budget-review, FINAL") == ["re", "q3", "budget", "review", "final"]
+    assert tokenize(None) == []
+
+
+def test_bm25_score_matches_formula():
+    index = InvertedIndex(k1=1.2, b=0.75)
+    index.add("a", [("invoice overdue invoice", 1.0)])
+    index.add("b", [("meeting notes", 1.0)])
+    index.add("c", [("invoice attached for the meeting", 1.0)])
+
+    (doc_id, score), _ = index.search("invoice")
+    average = (3 + 2 + 5) / 3
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    norm = 1.2 * (1 - 0.75 + 0.75 * 3 / average)
+    assert doc_id == "a"
+    assert score == pytest.approx(idf * 2 * 2.2 / (2 + norm))
+
+
+def test_rare_terms_shorter_documents_and_field_weights_rank_higher():
+    index = InvertedIndex()
+    index.add("x", [("alpha one", 1.0)])
+    index.add("y", [("beta two", 1.0)])
+    index.add("z", [("alpha three", 1.0)])
+    # "beta" is in fewer documents, so it carries more weight
+    assert ranked(index, "alpha beta")[0] == "y"
+
+    index.add("long", [("kickoff " + "filler " * 30, 1.0)])
+    index.add("short", [("kickoff call", 1.0)])
+    # Equal counts: the shorter document wins
+    assert ranked(index, "kickoff") == ["short", "long"]
+
+    index.add("subject", [("kickoff", 3.0), ("body text here", 1.0)])
+    assert ranked(index, "kickoff")[0] == "subject"
+
+
+def test_remove_replace_and_candidates():
+    index = InvertedIndex()
+    index.add(1, [("quarterly budget", 1.0)])
+    index.add(2, [("budget approval", 1.0)])
+    index.add(3, [("lunch", 1.0)])
+    assert set(ranked(index, "budget")) == {1, 2}
+    assert ranked(index, "budget", candidates={2, 3}) == [2]
+    assert ranked(index, "budget", limit=1) in ([1], [2])
+
+    index.add(2, [("travel approval", 1.0)])
+    assert ranked(index, "budget") == [1]
+    assert index.remove(1) and not index.remove(1)
+    assert ranked(index, "budget") == []
+    assert "budget" not in index.postings
+    assert len(index) == 2 and 2 in index